@@ -0,0 +1,129 @@
+"""
+Compare throughput and memory of the process and thread backends of pylazors.solve_many().
+
+Usage (from the repository root):
+
+    $ python3 benchmarks/bench_backends.py --boards all --max-complexity 100000 --workers 4
+    $ python3.13t -X gil=0 benchmarks/bench_backends.py --boards all --workers 4
+
+Every backend runs in a fresh interpreter, so that memory of one run does not count in the next. Memory is the
+peak of the total resident memory of the solving process and all its worker processes, sampled every 10 ms
+from /proc (Linux only, reported as 0 elsewhere).
+
+With the GIL enabled, solve_many() replaces the thread backend by the process one. --force-threads uses threads
+anyway, which shows the overhead of the thread backend, but not its parallel speed.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pylazors
+import pylazors.batch
+from pylazors.utils import gil_enabled
+
+from bench_solver import load_boards
+
+
+def _rss_kb(pid):
+    try:
+        with open('/proc/%d/status' % pid) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    children = []
+    try:
+        for task in os.listdir('/proc/%d/task' % pid):
+            with open('/proc/%d/task/%s/children' % (pid, task)) as f:
+                children += [int(c) for c in f.read().split()]
+    except OSError:
+        pass
+    return children
+
+
+class _MemorySampler(threading.Thread):
+    """ Record the peak total RSS of this process and its children, in kB """
+
+    def __init__(self, interval=0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        pid = os.getpid()
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, _rss_kb(pid) + sum(_rss_kb(c) for c in _children(pid)))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_backend(args):
+    """ Solve all boards with one backend in this process, and print a JSON record """
+
+    boards = [b for b in load_boards(args.boards) if b.get_estimate_complexity() <= args.max_complexity]
+    if args.force_threads:
+        pylazors.batch.gil_enabled = lambda: False
+    sampler = _MemorySampler()
+    sampler.start()
+    start_time = time.perf_counter()
+    solved = sum(solution is not None for _, solution in pylazors.solve_many(
+        boards, processes=args.workers, backend=args.backend))
+    wall_time = time.perf_counter() - start_time
+    sampler.stop()
+    print(json.dumps({'backend': args.backend, 'boards': len(boards), 'solved': solved, 'wall': wall_time,
+                      'peak_rss_kb': sampler.peak}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--boards', default='handout',
+                        help='directory name inside boards/ (handout, all), a path or a glob pattern')
+    parser.add_argument('--max-complexity', type=float, default=float('inf'),
+                        help='skip boards of higher pylazors.Board.get_estimate_complexity()')
+    parser.add_argument('--workers', type=int, default=max(os.cpu_count() or 1, 2))
+    parser.add_argument('--backends', default='processes,threads', help='comma separated: processes, threads')
+    parser.add_argument('--force-threads', action='store_true', help='use threads even with the GIL enabled')
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        run_backend(args)
+        return 0
+
+    print('[bench] Python %s, GIL %s, %d worker(s)' % (
+        sys.version.split()[0], 'enabled' if gil_enabled() else 'disabled', args.workers))
+    if gil_enabled() and not args.force_threads:
+        print('[bench] the thread backend falls back to processes here, see --force-threads')
+    for backend in args.backends.split(','):
+        command = [sys.executable] + sys.argv[:1] + ['--backend', backend, '--boards', args.boards,
+                                                     '--max-complexity', str(args.max_complexity),
+                                                     '--workers', str(args.workers)]
+        if args.force_threads:
+            command.append('--force-threads')
+        # Keep interpreter options, e.g. -X gil=0
+        command[1:1] = ['-X%s' % k if v is True else '-X%s=%s' % (k, v) for k, v in sys._xoptions.items()]
+        record = json.loads(subprocess.check_output(command).decode().strip().splitlines()[-1])
+        print('[bench] %-10s %d boards (%d solved) in %.2f s, %.1f boards/s, peak memory %.1f MB' % (
+            backend, record['boards'], record['solved'], record['wall'], record['boards'] / record['wall'],
+            record['peak_rss_kb'] / 1024))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
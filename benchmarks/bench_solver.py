@@ -0,0 +1,269 @@
+"""
+Benchmark solver strategies over a set of boards, and compare results against a saved baseline.
+
+Usage (from the repository root):
+
+    # Run and save a baseline
+    $ python3 benchmarks/bench_solver.py run --boards handout --strategies large,auto -o baseline.json
+
+    # Run again later, and compare with the baseline. Exits with 1 if any board regressed.
+    $ python3 benchmarks/bench_solver.py run --boards handout --strategies large,auto -o current.json
+    $ python3 benchmarks/bench_solver.py compare baseline.json current.json --threshold 0.2
+
+For every board and strategy, the wall and CPU time (min and median of *repeat* runs, after *warmup*
+runs), the number of _trace_lasers() calls and the number of candidates tested are recorded. Solvers stop at
+the first solution, so on solved boards, candidates are the candidates tested before the first solution.
+
+The exhaustive solvers (large, compiled) can also be run with each ordering of block locations (see
+pylazors._solver._order_locations()), as strategies "<strategy>/<ordering>", 'none' standing for no ordering:
+
+    $ python3 benchmarks/bench_solver.py run --boards all --strategies large --orderings beams,none
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pylazors
+import pylazors._compiled
+import pylazors._solver
+import pylazors.solver
+
+
+board_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'boards')
+
+
+def _solve_small(board):
+    # Same limit as used by pylazors.solve_board(), boards above it are reported as skipped.
+    return pylazors.solver._solve_board(board, print_log=False)
+
+
+strategies = {
+    'auto': lambda board: pylazors.solve_board(board, print_log=False),
+    'large': lambda board: pylazors._solver._solve_large_board(board, print_log=False),
+    'small': _solve_small,
+    'compiled': lambda board: pylazors._solver._solve_compiled_board(board, print_log=False),
+    'anytime': lambda board: pylazors.solver.solve_anytime(board, seed=0, print_log=False)[0],
+    'sat': lambda board: pylazors.solve_board(board, strategy='sat', print_log=False),
+    'portfolio': lambda board: pylazors.solve_board(board, strategy='portfolio', print_log=False),
+}
+
+
+# Exhaustive strategies taking an ordering of locations, see get_solver()
+ordered_strategies = {
+    'large': lambda board, ordering: pylazors._solver._solve_large_board(board, print_log=False, ordering=ordering),
+    'compiled': lambda board, ordering: pylazors._solver._solve_compiled_board(board, print_log=False,
+                                                                               ordering=ordering),
+}
+
+
+def get_solver(name):
+    """ Return the solving function of strategy *name*, "<strategy>" or "<strategy>/<ordering>" """
+
+    base, _, ordering = name.partition('/')
+    if not ordering:
+        return strategies[name]
+    solve = ordered_strategies[base]
+    ordering = None if ordering == 'none' else ordering
+    return lambda board: solve(board, ordering)
+
+
+class _CallCounter:
+    """ Replace function *name* in all *modules* with a wrapper counting the number of calls. """
+
+    def __init__(self, modules, name):
+        self.modules, self.name = modules, name
+        self.funcs = [getattr(m, name) for m in modules]
+        self.count = 0
+
+    def __enter__(self):
+        func = self.funcs[0]
+
+        def wrapper(*args, **kwargs):
+            self.count += 1
+            return func(*args, **kwargs)
+        for module in self.modules:
+            setattr(module, self.name, wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        for module, func in zip(self.modules, self.funcs):
+            setattr(module, self.name, func)
+
+
+def load_boards(boards, only=None):
+    """ Load boards from a directory name inside boards/, a path, or a glob pattern """
+
+    path = boards if os.path.exists(boards) or glob.has_magic(boards) else os.path.join(board_dir, boards)
+    errors = []
+    loaded = sorted(pylazors.iter_bff(path, errors=errors), key=lambda b: b.name)
+    if only:
+        loaded = [b for b in loaded if b.name in only]
+    return loaded
+
+
+def bench_board(board, strategy, warmup=1, repeat=3):
+    """ Return benchmark record of solving *board* with *strategy* """
+
+    solve = get_solver(strategy)
+    for _ in range(warmup):
+        solve(board)
+
+    wall_times, cpu_times = [], []
+    for _ in range(repeat):
+        # The small board solver tests candidates in random order, fix the seed to make it repeatable.
+        random.seed(0)
+        with _CallCounter([pylazors._solver, pylazors.solver], '_trace_lasers') as trace_counter, \
+                _CallCounter([pylazors.solver], 'lazor_on') as lazor_on_counter, \
+                _CallCounter([pylazors._compiled.CompiledBoard], 'trace') as compiled_counter, \
+                _CallCounter([pylazors._compiled.TraceCache], 'lit_points') as cache_counter:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            solution = solve(board)
+            wall_times.append(time.perf_counter() - wall_start)
+            cpu_times.append(time.process_time() - cpu_start)
+
+    return {
+        'solved': solution is not None,
+        'wall_min': min(wall_times),
+        'wall_median': statistics.median(wall_times),
+        'cpu_min': min(cpu_times),
+        'cpu_median': statistics.median(cpu_times),
+        'trace_calls': trace_counter.count + compiled_counter.count,
+        # The small board solver tests candidates with lazor_on(), and only calls _trace_lasers() on the solution.
+        # Solvers on compiled boards test candidates with CompiledBoard.trace(), or TraceCache.lit_points() which
+        # only calls CompiledBoard.trace() for beams not cached.
+        'candidates': lazor_on_counter.count or cache_counter.count or compiled_counter.count or trace_counter.count,
+    }
+
+
+def run(args):
+    boards = load_boards(args.boards, args.only.split(',') if args.only else None)
+    result = {
+        'meta': {
+            'boards': args.boards,
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': {},
+    }
+
+    names = args.strategies.split(',')
+    if args.orderings:
+        names = [name + '/' + ordering if name in ordered_strategies else name
+                 for name in names for ordering in args.orderings.split(',')]
+        names = list(dict.fromkeys(names))
+    for strategy in names:
+        if strategy.partition('/')[0] not in (ordered_strategies if '/' in strategy else strategies):
+            raise SystemExit('Unknown strategy: %s (choose from %s)' % (strategy, ', '.join(strategies)))
+        records = result['results'][strategy] = {}
+        for board in boards:
+            records[board.name] = bench_board(board, strategy, args.warmup, args.repeat)
+            print('[bench] %-8s %-16s %8.3f s  %10d candidates' % (
+                strategy, board.name, records[board.name]['wall_median'], records[board.name]['candidates']))
+        report(strategy, records)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=1, sort_keys=True)
+        print('[bench] results saved to %s' % args.output)
+
+
+def report(strategy, records):
+    """ Print summary of one strategy, in the same format as lazors.solve_all() """
+
+    t_list = [r['cpu_median'] for r in records.values()]
+    if not t_list:
+        return
+    t_sum = sum(t_list)
+    print('=' * 80)
+    print('[bench] %s: %d boards, total wall time: %.2f seconds.' % (
+        strategy, len(records), sum(r['wall_median'] for r in records.values())))
+    print('[bench] %s: total CPU time: %.3f seconds (min/avg/max %.3f/%.3f/%.3f).' % (
+        strategy, t_sum, min(t_list), t_sum / len(t_list), max(t_list)))
+    print('[bench] %s: total candidates: %d, total _trace_lasers calls: %d' % (
+        strategy, sum(r['candidates'] for r in records.values()), sum(r['trace_calls'] for r in records.values())))
+    solved = [r['candidates'] for r in records.values() if r['solved']]
+    if solved:
+        print('[bench] %s: candidates before the first solution: %d in total, median %d (%d solved boards)' % (
+            strategy, sum(solved), statistics.median(solved), len(solved)))
+    top_5 = sorted(records.items(), key=lambda r: r[1]['wall_median'], reverse=True)[:5]
+    print('[bench] %s: 5 slowest boards: ' % strategy + ', '.join(
+        ['%s (%.1fs)' % (name, r['wall_median']) for name, r in top_5]))
+    print('=' * 80)
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    for strategy in sorted(set(baseline) & set(current)):
+        for name in sorted(set(baseline[strategy]) & set(current[strategy])):
+            old, new = baseline[strategy][name], current[strategy][name]
+            ratio = new['wall_min'] / old['wall_min'] if old['wall_min'] else float('inf')
+            # Ignore boards solved too fast to be timed reliably.
+            if new['wall_min'] >= args.min_time and ratio > 1 + args.threshold:
+                regressions.append('%s/%s: %.3f s -> %.3f s (%+.1f %%)' % (
+                    strategy, name, old['wall_min'], new['wall_min'], (ratio - 1) * 100))
+            if new['candidates'] > old['candidates']:
+                regressions.append('%s/%s: %d -> %d candidates' % (
+                    strategy, name, old['candidates'], new['candidates']))
+            if old['solved'] and not new['solved']:
+                regressions.append('%s/%s: no longer solved' % (strategy, name))
+        report(strategy, current[strategy])
+
+    if regressions:
+        print('[compare] %d regression(s) over %.0f %% threshold:' % (len(regressions), args.threshold * 100))
+        for r in regressions:
+            print('[compare]     ' + r)
+        return 1
+    print('[compare] no regression found.')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run benchmark')
+    run_parser.add_argument('--boards', default='handout',
+                            help='directory name inside boards/ (handout, all), a path or a glob pattern')
+    run_parser.add_argument('--only', help='comma separated board names to run')
+    run_parser.add_argument('--strategies', default='large', help='comma separated: ' + ', '.join(strategies))
+    run_parser.add_argument('--orderings',
+                            help='comma separated location orderings (beams, none) to run large and compiled with')
+    run_parser.add_argument('--warmup', type=int, default=1)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('-o', '--output', help='save results as a JSON baseline')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown ratio (default 0.2)')
+    compare_parser.add_argument('--min-time', type=float, default=0.05,
+                                help='ignore boards faster than this in seconds (default 0.05)')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Compare the time of one laser trace with _trace_lasers(), CompiledBoard.trace() and the kernel of pylazors._jit.
+
+Usage (from the repository root):
+
+    $ python3 benchmarks/bench_tracer.py --boards all --placements 20 --repeat 50
+
+Every board is traced with *placements* random placements of its available blocks, each traced *repeat* times
+by every tracer. Compiling the tables of a board and the first call of the kernel (numba compiles it then, or
+loads it from its cache) are not timed. The kernel is only run if numba is installed.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard
+from pylazors._jit import KernelTracer, numba
+from pylazors._solver import _trace_lasers
+
+from bench_solver import load_boards
+
+
+def _placements(board, compiled, count, seed):
+    rng = random.Random(seed)
+    blocks = board.get_available_blocks()
+    placements = []
+    for _ in range(count):
+        cells = [Block(v) if v >= 0 else Block.BLANK for v in compiled.fixed]
+        for c, block in zip(rng.sample(compiled.free_cells, len(blocks)), blocks):
+            cells[c] = block
+        placements.append([cells[y * compiled.width:(y + 1) * compiled.width] for y in range(compiled.height)])
+    return placements
+
+
+def bench_board(board, placements, repeat, seed=0):
+    """ Return {tracer name: seconds per trace} of *board* """
+
+    compiled = CompiledBoard(board)
+    laser_sources = board.get_laser_sources()
+    source_states = [compiled.state(*l) for l in laser_sources]
+    placements = _placements(board, compiled, placements, seed)
+    cells = [compiled.cells(blocks) for blocks in placements]
+
+    tracers = [('_trace_lasers', lambda i: _trace_lasers(placements[i], laser_sources)),
+               ('compiled', lambda i: compiled.trace(cells[i], source_states))]
+    if numba is not None:
+        kernel = KernelTracer(compiled).trace
+        kernel(cells[0], source_states)
+        tracers.append(('numba', lambda i: kernel(cells[i], source_states)))
+
+    times = {}
+    for name, trace in tracers:
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            for i in range(len(placements)):
+                trace(i)
+        times[name] = (time.perf_counter() - start_time) / (repeat * len(placements))
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--boards', default='handout',
+                        help='directory name inside boards/ (handout, all), a path or a glob pattern')
+    parser.add_argument('--placements', type=int, default=20, help='random placements traced per board')
+    parser.add_argument('--repeat', type=int, default=50, help='number of times every placement is traced')
+    parser.add_argument('--verbose', action='store_true', help='print the time of every board')
+    args = parser.parse_args(argv)
+
+    if numba is None:
+        print('[bench] numba is not installed, the kernel is not run (pip install numba)')
+    totals = {}
+    boards = load_boards(args.boards)
+    for board in boards:
+        times = bench_board(board, args.placements, args.repeat)
+        for name, t in times.items():
+            totals[name] = totals.get(name, 0.0) + t
+        if args.verbose:
+            print('[bench] %-20s %s' % (board.name, ', '.join('%s %.1f us' % (name, t * 1e6)
+                                                             for name, t in times.items())))
+    print('=' * 80)
+    baseline = totals['_trace_lasers']
+    for name, total in totals.items():
+        print('[bench] %-14s %.1f us per trace on average, %.1fx faster than _trace_lasers' % (
+            name, total / len(boards) * 1e6, baseline / total))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
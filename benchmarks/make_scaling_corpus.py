@@ -0,0 +1,50 @@
+"""
+Generate reproducible sets of random solvable boards of growing size, for scaling benchmarks.
+
+Usage (from the repository root):
+
+    $ python3 benchmarks/make_scaling_corpus.py -o boards/scaling --sizes 8,10,12 --count 20
+    $ python3 benchmarks/bench_solver.py run --boards boards/scaling/8x8 --strategies large
+
+Board i of a size uses seed *seed* + i, so the same command always gives the same boards.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pylazors.generator import generate_corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', required=True,
+                        help='output directory, one sub-directory (or .lzc file with --corpus) per size')
+    parser.add_argument('--sizes', default='8,9,10,11,12', help='comma separated board sizes (N for NxN)')
+    parser.add_argument('--count', type=int, default=10, help='number of boards per size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--opaque', type=int, default=1)
+    parser.add_argument('--reflect', type=int, default=4)
+    parser.add_argument('--refract', type=int, default=2)
+    parser.add_argument('--fixed', type=int, default=4, help='number of fixed opaque/reflect/refract blocks')
+    parser.add_argument('--fixed-blank', type=int, default=2, help='number of locations where no block is allowed')
+    parser.add_argument('--lasers', type=int, default=2)
+    parser.add_argument('--targets', type=int, default=4)
+    parser.add_argument('--corpus', action='store_true', help='write a .lzc corpus file instead of BFF files')
+    args = parser.parse_args(argv)
+
+    for size in map(int, args.sizes.split(',')):
+        out = os.path.join(args.output, '%dx%d' % (size, size)) + ('.lzc' if args.corpus else '')
+        if args.corpus:
+            os.makedirs(args.output, exist_ok=True)
+        count = generate_corpus(out, args.count, size, size, seed=args.seed, num_opaque=args.opaque,
+                                num_reflect=args.reflect, num_refract=args.refract, num_fixed=args.fixed,
+                                num_fixed_blank=args.fixed_blank, num_lasers=args.lasers,
+                                num_targets=args.targets)
+        print('[make_scaling_corpus] %d boards of %dx%d written to %s' % (count, size, size, out))
+
+
+if __name__ == '__main__':
+    main()
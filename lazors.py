@@ -1,4 +1,5 @@
 import pylazors
+import pylazors.profiling
 import glob
 import os
 import time
@@ -10,9 +11,10 @@ board_dir = 'boards'
 solution_dir = 'solutions'
 
 
-def solve_one(board, verbose=True):
-    """ Solve one of board, print solution, and return solution board and timing info.
+def solve_one(board, verbose=True, profile=None):
+    """ Solve one of board, print solution, and return solution board, timing info and solving statistics.
     Set *verbose* to False to disable detail logging inside pylazors.solve_board.
+    Set *profile* to a directory to write profiling outputs of solving into it.
     """
 
     if verbose:
@@ -20,7 +22,7 @@ def solve_one(board, verbose=True):
     print('[solve_one] %s: start solving' % str(board))
 
     start_time = time.time()
-    solution_board = pylazors.solve_board(board, print_log=verbose)
+    solution_board, stats = pylazors.solve_board(board, return_stats=True, profile=profile, print_log=verbose)
     time_used = time.time() - start_time
 
     if solution_board is not None:
@@ -31,10 +33,10 @@ def solve_one(board, verbose=True):
     else:
         print('[solve_one] %s: No solution found after testing all possible combinations, time used: %f seconds' %
               (str(board), time_used))
-    return solution_board, time_used
+    return solution_board, time_used, stats
 
 
-def solve_all(boards, processes=1):
+def solve_all(boards, processes=1, jsonl_file=None, profile=None):
     """ Solve a list of boards, print timing information, and return solution boards.
 
      *processes* controls how many processes will be used to solve boards in parallel, set this to 0 will set
@@ -42,6 +44,11 @@ def solve_all(boards, processes=1):
 
      Note: when *processes* > 1, the returned *solution_board* list may not have the same order as the input
      *boards* list, because this function will try to solve largest board first to maximize performance.
+
+     If *jsonl_file* is given, all solutions (and the time used) are also exported to it as JSON lines.
+
+     If *profile* (or the PYLAZORS_PROFILE environment variable) is set to a directory, every board is profiled,
+     profiling outputs are written into that directory, and a summary of hottest functions is printed.
     """
 
     if processes == 0:
@@ -56,7 +63,7 @@ def solve_all(boards, processes=1):
     print('[solve_all] List of boards:', ', '.join([b.name for b in boards]))
     pool = Pool(processes)
     start_time = time.time()
-    results = pool.map(partial(solve_one, verbose=verbose), boards, chunksize=1)
+    results = pool.map(partial(solve_one, verbose=verbose, profile=profile), boards, chunksize=1)
 
     print('\n' + '=' * 80)
 
@@ -64,7 +71,12 @@ def solve_all(boards, processes=1):
         len(boards), time.time() - start_time))
 
     solutions = [r[0] for r in results]
-    time_history = [(r[0].name, r[1]) for r in results]
+    if jsonl_file:
+        with pylazors.JSONLWriter(jsonl_file) as writer:
+            for board, (solution, time_used, stats) in zip(boards, results):
+                writer.write(solution if solution is not None else board, stats, time_used=time_used)
+        print('[solve_all] Solutions exported to %s.' % jsonl_file)
+    time_history = [(b.name, r[1]) for b, r in zip(boards, results)]
     t_list = [x[1] for x in time_history]
     t_sum, t_min, t_max = sum(t_list), min(t_list), max(t_list)
 
@@ -73,26 +85,34 @@ def solve_all(boards, processes=1):
     if len(boards) > 5:
         top_5 = list(reversed(sorted(time_history, key=lambda x: x[1])))[:5]
         print('[solve_all] 5 slowest boards: ' + ', '.join(['%s (%.1fs)' % h for h in top_5]))
+    total_stats = pylazors.SolveStats.sum([r[2] for r in results])
+    for line in total_stats.report().splitlines():
+        print('[solve_all] Stats: ' + line)
+    profile = pylazors.profiling.profile_dir(profile)
+    if profile:
+        for line in pylazors.profiling.summarize(profile).splitlines():
+            print('[solve_all] Profile: ' + line)
     print('=' * 80 + '\n')
 
     return solutions
 
 
-def load_dir(dir_name):
-    """ Load all BFF file inside *dir_name* """
+def load_dir(dir_name, workers=4):
+    """ Load all BFF file inside *dir_name*.
+
+    *dir_name* can be a path to a directory, or the name of a directory inside *board_dir*.
+    """
+
+    if not os.path.isdir(dir_name):
+        dir_name = os.path.join(board_dir, dir_name)
 
-    skipped = 0
-    all_boards = []
-    for bff_file in sorted(glob.glob(os.path.join(board_dir, dir_name, '*.bff'))):
-        try:
-            all_boards.append(pylazors.read_bff(bff_file))
-            print('[load_dir] load board:', all_boards[-1])
-        except pylazors.BFFReaderError as e:
-            skipped += 1
-            print('[load_dir] Skip loading due to error:', e)
+    errors = []
+    all_boards = sorted(pylazors.iter_bff(dir_name, workers=workers, errors=errors), key=lambda b: b.name)
     print('[load_dir] %d boards loaded from "%s".' % (len(all_boards), dir_name))
-    if skipped:
-        print('[load_dir] %d boards skipped because of error from "%s".' % (skipped, dir_name))
+    if errors:
+        print('[load_dir] %d boards skipped because of error from "%s":' % (len(errors), dir_name))
+        for e in sorted(errors, key=lambda e: e.file_name):
+            print('[load_dir]     %s' % e)
     return all_boards
 
 
@@ -4,10 +4,78 @@ import sys
 
 if sys.version_info[0] < 3 or sys.version_info[1] < 6:
     raise Exception('Must be using at least Python 3.6')
-else:
+
+# Public names and the modules defining them. They are imported on first access, so that `import pylazors`
+# does not load numpy, PIL or the block textures unless a caller actually needs them.
+_lazy_attributes = {
+    'Board': 'pylazors.board',
+    'Block': 'pylazors.block',
+    'solve_board': 'pylazors.solver',
+    'solve_anytime': 'pylazors.solver',
+    'resolve': 'pylazors.solver',
+    'hint': 'pylazors.solver',
+    'SolveStats': 'pylazors.stats',
+    'solve_many': 'pylazors.batch',
+    'solve_board_async': 'pylazors.aio',
+    'solve_board_events': 'pylazors.aio',
+    'iter_solutions_async': 'pylazors.aio',
+    'AsyncSolverPool': 'pylazors.aio',
+    'verify_solution': 'pylazors.verify',
+    'verify_many': 'pylazors.verify',
+    'compile_level': 'pylazors.verify',
+    'SolverService': 'pylazors.service',
+    'SolverClient': 'pylazors.service',
+    'ServiceError': 'pylazors.service',
+    'encode_board': 'pylazors.sat',
+    'write_dimacs': 'pylazors.sat',
+    'generate_board': 'pylazors.generator',
+    'generate_corpus': 'pylazors.generator',
+    'write_png': 'pylazors.formats.png',
+    'write_svg': 'pylazors.formats.svg',
+    'write_bff': 'pylazors.formats.bff',
+    'read_bff': 'pylazors.formats.bff',
+    'parse_bff': 'pylazors.formats.bff',
+    'BFFReaderError': 'pylazors.formats.bff',
+    'iter_bff': 'pylazors.formats.bff',
+    'JSONLWriter': 'pylazors.formats.jsonl',
+    'write_jsonl': 'pylazors.formats.jsonl',
+    'read_jsonl': 'pylazors.formats.jsonl',
+    'board_to_dict': 'pylazors.formats.jsonl',
+    'board_from_dict': 'pylazors.formats.jsonl',
+    'Corpus': 'pylazors.formats.corpus',
+    'CorpusError': 'pylazors.formats.corpus',
+    'read_corpus': 'pylazors.formats.corpus',
+    'write_corpus': 'pylazors.formats.corpus',
+    'bff_dir_to_corpus': 'pylazors.formats.corpus',
+}
+
+__all__ = list(_lazy_attributes)
+
+if sys.version_info[1] < 7:
+    # Module level __getattr__ (PEP 562) requires Python 3.7, import everything eagerly instead.
     from .board import Board
     from .block import Block
-    from .solver import solve_board
+    from .solver import solve_board, solve_anytime, resolve, hint
+    from .stats import SolveStats
+    from .batch import solve_many
+    from .aio import solve_board_async, solve_board_events, iter_solutions_async, AsyncSolverPool
+    from .verify import verify_solution, verify_many, compile_level
+    from .service import SolverService, SolverClient, ServiceError
+    from .sat import encode_board, write_dimacs
+    from .generator import generate_board, generate_corpus
     from .formats.png import write_png
-    from .formats.bff import write_bff, read_bff, BFFReaderError
+    from .formats.svg import write_svg
+    from .formats.bff import write_bff, read_bff, parse_bff, BFFReaderError, iter_bff
+    from .formats.jsonl import JSONLWriter, write_jsonl, read_jsonl, board_to_dict, board_from_dict
+    from .formats.corpus import Corpus, CorpusError, read_corpus, write_corpus, bff_dir_to_corpus
+else:
+    def __getattr__(name):
+        if name not in _lazy_attributes:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        import importlib
+        value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+        globals()[name] = value
+        return value
 
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy_attributes))
@@ -0,0 +1,214 @@
+"""
+This file contains an anytime solver, which keeps the best partial solution found so far.
+
+The exhaustive solvers test candidates in an order which has nothing to do with how close a candidate is to a
+solution. Here, a candidate is scored by (number of targets lit, number of points lit), and the search is a beam
+search over neighbouring placements: from the best few candidates, move one block to another free cell (or swap
+two blocks of different types), keep the best *beam_width* new candidates, and repeat. When the beam stops
+improving, the search restarts from a random placement.
+
+Local search alone may never find an existing solution. To stay complete, testing is interleaved with the same
+exhaustive generator _solve_large_board() uses (see *systematic_share*): given unlimited time, every combination is
+tested eventually, and a board without solution is proven so.
+"""
+
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard
+from pylazors._solver import _block_combinations, _banned_locations, _order_locations
+import heapq
+import random
+import time
+
+
+_movable_types = (Block.OPAQUE, Block.REFLECT, Block.REFRACT)
+
+
+def _solve_anytime(board, time_limit=None, max_candidates=None, seed=None, beam_width=8, branching=16,
+                   patience=4, systematic_share=0.5, print_log=True, stats=None, progress=None):
+    """ Solve a Lazors board, or find the placement closest to a solution within a budget.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        time_limit: *float, optional*
+            maximum seconds to search. No limit if None.
+
+        max_candidates: *int, optional*
+            maximum number of candidates to test. No limit if None.
+
+        seed: *int, optional*
+            random seed of the local search, the same seed and budget give the same result.
+
+        beam_width, branching: *int, optional*
+            number of candidates kept in the beam, and number of random neighbours tested from each of them.
+
+        patience: *int, optional*
+            number of beam steps without improvement before a random restart.
+
+        systematic_share: *float, optional*
+            share of candidates tested in the exhaustive order, between 0 and 1. With 0 the search is not
+            complete anymore, with 1 it is the same as _solve_large_board().
+
+        stats, progress:
+            see _solve_large_board().
+
+    **Returns**
+
+        best_board: *pylazors.Board object*
+            the solution board if solved, otherwise the board with the most targets lit (most lit points if
+            equal). None if no block placement is possible at all.
+
+        targets_hit: *int*
+            number of targets lit on *best_board*.
+    """
+
+    start_time = time.perf_counter()
+    if stats is not None:
+        stats.strategy = 'anytime'
+    rng = random.Random(seed)
+
+    compiled = CompiledBoard(board)
+    width, free_cells = compiled.width, compiled.free_cells
+    available_blocks = board.get_available_blocks()
+    counts = [available_blocks.count(t) for t in _movable_types]
+    # A placement is a tuple of cell indexes, one for each movable block, ordered by type as in *types*.
+    types = [int(t) for t, n in zip(_movable_types, counts) for _ in range(n)]
+    laser_sources, targets = board.get_laser_sources(), board.get_targets()
+    source_states = [compiled.state(*l) for l in laser_sources]
+    target_points = [compiled.point(*p) for p in targets]
+    org_cells = [v if v >= 0 else int(Block.BLANK) for v in compiled.fixed]
+    trace, lit_points = compiled.trace, compiled.lit_points
+
+    def canonical(placement):
+        # Blocks of the same type are interchangeable
+        key, i = [], 0
+        for n in counts:
+            key += sorted(placement[i:i + n])
+            i += n
+        return tuple(key)
+
+    def cells_of(placement):
+        cells = org_cells[:]
+        for c, t in zip(placement, types):
+            cells[c] = t
+        return cells
+
+    tested = [0]
+    best = [None, None]     # score, placement
+
+    def evaluate(placement):
+        tested[0] += 1
+        if progress is not None and tested[0] % 1000 == 0:
+            progress(tested[0])
+        lit = lit_points(trace(cells_of(placement), source_states))
+        score = (sum([p in lit for p in target_points]), len(lit))
+        if best[0] is None or score > best[0]:
+            best[0], best[1] = score, placement
+        return score
+
+    def out_of_budget():
+        if max_candidates is not None and tested[0] >= max_candidates:
+            return True
+        return time_limit is not None and time.perf_counter() - start_time >= time_limit
+
+    def solved():
+        return best[0] is not None and best[0][0] == len(target_points)
+
+    # Exhaustive part, same order as _solve_large_board()
+    banned_single, banned_pair = _banned_locations(counts[0], counts[1], laser_sources, targets)
+    locations = _order_locations([(c % width, c // width) for c in free_cells], board.get_blocks(), laser_sources,
+                                 targets)
+    exhaustive = _block_combinations(locations, counts[0], counts[1], counts[2], banned_single, banned_pair,
+                                     prefix_first=True)
+    exhausted = False
+
+    # Local search part
+    can_move = 0 < len(types) < len(free_cells) or (len(types) == len(free_cells) and len(set(types)) > 1)
+    visited = set()
+    beam, stale, beam_best = [], 0, None
+    systematic, local = 0, 0
+
+    while not solved() and not out_of_budget():
+        if not exhausted and (not can_move or systematic <= systematic_share * (systematic + local)):
+            for _ in range(64):
+                try:
+                    loc_opaque, loc_reflect, loc_refract = next(exhaustive)
+                except StopIteration:
+                    exhausted = True
+                    break
+                placement = tuple(x + y * width for locations in (loc_opaque, loc_reflect, loc_refract)
+                                  for x, y in (locations or ()))
+                evaluate(placement)
+                systematic += 1
+                if solved():
+                    break
+            continue
+        if not can_move:
+            break
+        if exhausted and systematic_share > 0:
+            # Every combination has been tested.
+            break
+
+        if not beam or stale >= patience:
+            # Random restart
+            placement = tuple(rng.sample(free_cells, len(types)))
+            visited.add(canonical(placement))
+            beam, stale, beam_best = [(evaluate(placement), placement)], 0, None
+            local += 1
+            continue
+
+        candidates = []
+        for score, placement in beam:
+            for _ in range(branching):
+                i = rng.randrange(len(types))
+                new = list(placement)
+                if rng.random() < 0.5:
+                    occupied = set(placement)
+                    cell = rng.choice(free_cells)
+                    if cell in occupied:
+                        j = placement.index(cell)
+                        if types[j] == types[i]:
+                            continue
+                        new[j] = placement[i]
+                    new[i] = cell
+                else:
+                    j = rng.randrange(len(types))
+                    if types[j] == types[i]:
+                        continue
+                    new[i], new[j] = placement[j], placement[i]
+                new = tuple(new)
+                key = canonical(new)
+                if key in visited:
+                    continue
+                visited.add(key)
+                candidates.append((evaluate(new), new))
+                local += 1
+                if solved() or out_of_budget():
+                    break
+        if len(visited) > 1 << 20:
+            visited.clear()
+
+        beam = heapq.nlargest(beam_width, candidates + beam)
+        top = beam[0][0] if beam else None
+        if beam_best is not None and top <= beam_best:
+            stale += 1
+        else:
+            stale, beam_best = 0, top
+
+    if stats is not None:
+        stats.candidates += tested[0]
+        stats.traces += tested[0]
+        stats.solved += solved()
+    if best[1] is None:
+        return None, 0
+
+    cells = cells_of(best[1])
+    best_board = board.copy(with_laser_segments=False)
+    best_board.load_blocks([[Block(v) for v in cells[y * width:(y + 1) * width]] for y in range(compiled.height)])
+    best_board.load_laser_segments(compiled.segments(trace(cells, source_states)))
+    if print_log:
+        print('[solve_anytime] %s after %d candidates (%d exhaustive), %d of %d targets lit' % (
+            'solved' if solved() else ('no solution' if exhausted else 'stopped'), tested[0], systematic,
+            best[0][0], len(target_points)))
+    return best_board, best[0][0]
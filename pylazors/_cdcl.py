@@ -0,0 +1,287 @@
+"""
+This file contains a small pure-Python CDCL SAT solver, used by pylazors/sat.py when no SAT library is installed.
+
+It implements the usual parts of a conflict-driven clause learning solver, in the style of MiniSat:
+
+    - unit propagation with two watched literals per clause,
+    - first-UIP conflict analysis, clause learning and non-chronological backtracking,
+    - VSIDS-like variable activities with phase saving,
+    - restarts following the Luby sequence.
+
+Literals are non-zero ints as in DIMACS: v is variable v being true, -v is it being false. Clauses can be added
+between calls to solve(), so the solver can be used incrementally (e.g. adding blocking clauses).
+"""
+
+import heapq
+
+
+def _luby(i):
+    """ Return the i-th (from 1) element of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ... """
+
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while True:
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+
+
+class CDCLSolver:
+    """
+    A CDCL SAT solver.
+
+        solver = CDCLSolver()
+        solver.add_clause([1, -2])
+        solver.add_clause([2, 3])
+        if solver.solve():
+            model = solver.model()      # {1: True, 2: False, 3: True}
+
+    **Attributes**
+
+        conflicts, decisions, propagations: *int*
+            counters of the search so far.
+    """
+
+    restart_unit = 100
+    var_decay = 0.95
+
+    def __init__(self, clauses=()):
+        self.num_vars = 0
+        self._value = [0]           # 1 true, -1 false, 0 unassigned; by variable
+        self._level = [0]
+        self._reason = [None]
+        self._activity = [0.0]
+        self._phase = [-1]
+        self._watches = [[], []]    # clauses watching a literal, by 2 * variable + (literal < 0)
+        self._trail = []
+        self._trail_lim = []
+        self._qhead = 0
+        self._heap = []
+        self._var_inc = 1.0
+        self._ok = True
+        self.conflicts = self.decisions = self.propagations = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def _ensure_vars(self, num_vars):
+        while self.num_vars < num_vars:
+            self.num_vars += 1
+            self._value.append(0)
+            self._level.append(0)
+            self._reason.append(None)
+            self._activity.append(0.0)
+            self._phase.append(-1)
+            self._watches += [[], []]
+            heapq.heappush(self._heap, (0.0, self.num_vars))
+
+    def _lit_value(self, lit):
+        value = self._value[abs(lit)]
+        return value if lit > 0 else -value
+
+    def _enqueue(self, lit, reason):
+        v = abs(lit)
+        self._value[v] = 1 if lit > 0 else -1
+        self._level[v] = len(self._trail_lim)
+        self._reason[v] = reason
+        self._trail.append(lit)
+
+    def _watch(self, clause):
+        self._watches[2 * abs(clause[0]) + (clause[0] < 0)].append(clause)
+        self._watches[2 * abs(clause[1]) + (clause[1] < 0)].append(clause)
+
+    def add_clause(self, clause):
+        """ Add a clause (an iterable of literals). Return False if the formula became unsatisfiable. """
+
+        if not self._ok:
+            return False
+        self._backtrack(0)
+        lits = []
+        for lit in clause:
+            self._ensure_vars(abs(lit))
+            value = self._lit_value(lit)
+            if value == 1 or -lit in lits:
+                return True             # satisfied at level 0, or a tautology
+            if value == 0 and lit not in lits:
+                lits.append(lit)
+        if not lits:
+            self._ok = False
+        elif len(lits) == 1:
+            self._enqueue(lits[0], None)
+            self._ok = self._propagate() is None
+        else:
+            self._watch(lits)
+        return self._ok
+
+    def _propagate(self):
+        """ Propagate all enqueued literals, return a conflicting clause or None """
+
+        value, watches, trail = self._value, self._watches, self._trail
+        while self._qhead < len(trail):
+            p = trail[self._qhead]
+            self._qhead += 1
+            self.propagations += 1
+            false_lit = -p
+            false_index = 2 * abs(false_lit) + (false_lit < 0)
+            watchers = watches[false_index]
+            kept = []
+            for k, clause in enumerate(watchers):
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = value[abs(first)] if first > 0 else -value[abs(first)]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+                for t in range(2, len(clause)):
+                    lit = clause[t]
+                    if (value[abs(lit)] if lit > 0 else -value[abs(lit)]) != -1:
+                        clause[1], clause[t] = lit, false_lit
+                        watches[2 * abs(lit) + (lit < 0)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept += watchers[k + 1:]
+                        watches[false_index] = kept
+                        self._qhead = len(trail)
+                        return clause
+                    self._enqueue(first, clause)
+            watches[false_index] = kept
+        return None
+
+    def _bump(self, v):
+        self._activity[v] += self._var_inc
+        if self._activity[v] > 1e100:
+            self._activity = [a * 1e-100 for a in self._activity]
+            self._var_inc *= 1e-100
+            self._heap = [(-self._activity[u], u) for u in range(1, self.num_vars + 1) if not self._value[u]]
+            heapq.heapify(self._heap)
+        elif not self._value[v]:
+            heapq.heappush(self._heap, (-self._activity[v], v))
+
+    def _analyze(self, conflict):
+        """ Return (learnt clause, backtrack level) of a conflict, the asserting literal first """
+
+        level, reason, trail = self._level, self._reason, self._trail
+        current_level = len(self._trail_lim)
+        seen = set()
+        learnt = [None]
+        counter = 0
+        p = None
+        index = len(trail) - 1
+        clause = conflict
+        while True:
+            for q in (clause if p is None else clause[1:]):
+                v = abs(q)
+                if v not in seen and level[v] > 0:
+                    seen.add(v)
+                    self._bump(v)
+                    if level[v] >= current_level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while abs(trail[index]) not in seen:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            clause = reason[abs(p)]
+            seen.discard(abs(p))
+            counter -= 1
+            if counter == 0:
+                break
+        learnt[0] = -p
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal of the highest level (after the asserting one) as the second literal.
+        i = max(range(1, len(learnt)), key=lambda i: level[abs(learnt[i])])
+        learnt[1], learnt[i] = learnt[i], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def _backtrack(self, to_level):
+        if len(self._trail_lim) <= to_level:
+            return
+        value, phase, reason, activity, heap = self._value, self._phase, self._reason, self._activity, self._heap
+        start = self._trail_lim[to_level]
+        for lit in self._trail[start:]:
+            v = abs(lit)
+            phase[v] = value[v]
+            value[v] = 0
+            reason[v] = None
+            heapq.heappush(heap, (-activity[v], v))
+        del self._trail[start:]
+        del self._trail_lim[to_level:]
+        self._qhead = len(self._trail)
+
+    def _pick_branch_var(self):
+        heap, value = self._heap, self._value
+        while heap:
+            v = heapq.heappop(heap)[1]
+            if not value[v]:
+                return v
+        return None
+
+    def solve(self, max_conflicts=None):
+        """
+        Search for a model.
+
+        **Returns**
+
+            result: *bool or None*
+                True if satisfiable (see model()), False if unsatisfiable, None if *max_conflicts* conflicts
+                are reached first.
+        """
+
+        if not self._ok:
+            return False
+        self._backtrack(0)
+        if self._propagate() is not None:
+            self._ok = False
+            return False
+
+        start_conflicts = self.conflicts
+        restarts = 1
+        restart_limit = _luby(restarts) * self.restart_unit
+        restart_conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                restart_conflicts += 1
+                if not self._trail_lim:
+                    self._ok = False
+                    return False
+                learnt, backtrack_level = self._analyze(conflict)
+                self._backtrack(backtrack_level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._watch(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self._var_inc /= self.var_decay
+
+                if max_conflicts is not None and self.conflicts - start_conflicts >= max_conflicts:
+                    self._backtrack(0)
+                    return None
+                if restart_conflicts >= restart_limit:
+                    self._backtrack(0)
+                    restarts += 1
+                    restart_limit = _luby(restarts) * self.restart_unit
+                    restart_conflicts = 0
+            else:
+                v = self._pick_branch_var()
+                if v is None:
+                    self._model = self._value[:]
+                    return True
+                self.decisions += 1
+                self._trail_lim.append(len(self._trail))
+                self._enqueue(v if self._phase[v] > 0 else -v, None)
+
+    def model(self):
+        """ Return the model found by the last solve(), as {variable: bool} """
+
+        return {v: self._model[v] > 0 for v in range(1, self.num_vars + 1)}
@@ -0,0 +1,283 @@
+"""
+This file contains a "compiled" form of a board, used for tracing lasers many times on the same grid.
+
+The laser tracing in _solver._trace_lasers() works on tuples (x, y, vx, vy) and calls methods of <Block> on
+every step. Here, every possible laser (a point and one of four directions) is numbered as a *state*, and
+everything _trace_lasers() computes on each step is looked up from flat integer tables instead:
+
+    next_cell[s]    index (bx + by * width) of the next block on the path of laser s, or -1 if outside
+    transmit[s]     state of laser s after passing through the next block
+    reflect[s]      state of laser s after being reflected by the next block
+
+Points are numbered on a grid padded by one point on each side (so that a laser leaving the board is still
+a valid state): point index of (x, y) is (y + 1) * (2 * width + 3) + (x + 1), and state index is
+point index * 4 + direction index, where direction index is (vx < 0) + 2 * (vy < 0).
+
+Blocks are given to the tracer as a flat list of their integer values (see pylazors.block), one per cell.
+"""
+
+from pylazors.block import BlockProperty
+from array import array
+from collections import OrderedDict
+from operator import itemgetter
+
+
+# Block properties looked up by the integer value of a block.
+_transparent = [bool(v & BlockProperty.TRANSPARENT) for v in range(16)]
+_reflective = [bool(v & BlockProperty.REFLECTIVE) for v in range(16)]
+
+
+def _direction_index(vx, vy):
+    return (vx < 0) + 2 * (vy < 0)
+
+
+class CompiledBoard:
+    """
+    Flat tracing tables of a board's grid.
+
+    Only the size and the fixed blocks of the board are compiled, so one object can be shared by boards
+    with the same grid but different lasers or targets.
+
+    **Attributes**
+
+        width, height: *int*
+            size of the board, in blocks.
+        fixed: *list, int*
+            integer value of the fixed block in each cell, or -1 if the cell is not fixed.
+        free_cells: *list, int*
+            indexes of all cells not fixed, in where a movable block can be placed.
+        nbytes: *int*
+            approximate memory used by the tables, in bytes.
+    """
+
+    def __init__(self, board=None, width=None, height=None, blocks=None):
+        if board is not None:
+            width, height, blocks = board.width, board.height, board.get_blocks()
+        self.width, self.height = width, height
+        self.point_width = 2 * width + 3
+        num_states = self.point_width * (2 * height + 3) * 4
+
+        self.fixed = [int(b) if b.is_fixed() else -1 for row in blocks for b in row]
+        self.free_cells = [i for i, v in enumerate(self.fixed) if v == -1]
+
+        next_cell, transmit, reflect = array('i', [-1]) * num_states, array('i', [-1]) * num_states, \
+            array('i', [-1]) * num_states
+        for y in range(-1, 2 * height + 2):
+            for x in range(-1, 2 * width + 2):
+                for vx, vy in ((1, 1), (-1, 1), (1, -1), (-1, -1)):
+                    s = self.state(x, y, vx, vy)
+                    # Same as in _solver._trace_lasers()
+                    vertical_wall = True if y % 2 else False
+                    if vertical_wall:
+                        bx, by = x // 2 - (0 if vx > 0 else 1), y // 2
+                    else:
+                        bx, by = x // 2, y // 2 - (0 if vy > 0 else 1)
+                    if bx < 0 or by < 0 or bx >= width or by >= height:
+                        continue
+                    next_cell[s] = bx + by * width
+                    transmit[s] = self.state(x + vx, y + vy, vx, vy)
+                    reflect[s] = self.state(x, y, -vx, vy) if vertical_wall else self.state(x, y, vx, -vy)
+        self.next_cell, self.transmit, self.reflect = next_cell, transmit, reflect
+        self.nbytes = 3 * num_states * next_cell.itemsize + 16 * (len(self.fixed) + len(self.free_cells))
+
+    @classmethod
+    def from_tables(cls, width, height, fixed, next_cell, transmit, reflect):
+        """ Return a CompiledBoard on existing tables (any int sequences, e.g. of another CompiledBoard) """
+
+        compiled = cls.__new__(cls)
+        compiled.width, compiled.height = width, height
+        compiled.point_width = 2 * width + 3
+        compiled.fixed = list(fixed)
+        compiled.free_cells = [i for i, v in enumerate(compiled.fixed) if v == -1]
+        compiled.next_cell, compiled.transmit, compiled.reflect = next_cell, transmit, reflect
+        compiled.nbytes = 3 * len(next_cell) * 4 + 16 * (len(compiled.fixed) + len(compiled.free_cells))
+        return compiled
+
+    def state(self, x, y, vx, vy):
+        """ Return the state index of laser (x, y, vx, vy) """
+
+        return ((y + 1) * self.point_width + x + 1) * 4 + _direction_index(vx, vy)
+
+    def point(self, x, y):
+        """ Return the point index of (x, y), which equals state index // 4 """
+
+        return (y + 1) * self.point_width + x + 1
+
+    def point_xy(self, p):
+        """ Return (x, y) of point index *p* """
+
+        return p % self.point_width - 1, p // self.point_width - 1
+
+    def cells(self, blocks):
+        """ Return a flat list of block values from a list of lists of blocks """
+
+        return [int(b) for row in blocks for b in row]
+
+    def trace(self, cells, source_states, laser_history=None):
+        """
+        Trace lasers and return all states that passed through a block.
+
+        This follows exactly the same order as _solver._trace_lasers(), so segments made from the returned
+        states (see segments()) are identical to the ones returned by _trace_lasers().
+
+        **Parameters**
+
+            cells: *list, int*
+                integer values of blocks, one per cell, see cells().
+            source_states: *list, int*
+                state indexes of laser sources.
+            laser_history: *set, optional*
+                If given, all traced states will be added into it.
+
+        **Returns**
+
+            passed: *list, int*
+                states which produced a laser segment, from point of the state to point of transmit[state].
+        """
+
+        next_cell, transmit, reflect = self.next_cell, self.transmit, self.reflect
+        transparent, reflective = _transparent, _reflective
+        lasers = list(source_states)
+        if laser_history is None:
+            laser_history = set(source_states)
+        else:
+            laser_history.update(source_states)
+        passed = []
+
+        while lasers:
+            s = lasers.pop()
+            c = next_cell[s]
+            if c < 0:
+                continue
+            block = cells[c]
+            if transparent[block]:
+                passed.append(s)
+                new_laser = transmit[s]
+                if new_laser not in laser_history:
+                    lasers.append(new_laser)
+                    laser_history.add(new_laser)
+            if reflective[block]:
+                new_laser = reflect[s]
+                if new_laser not in laser_history:
+                    lasers.append(new_laser)
+                    laser_history.add(new_laser)
+
+        return passed
+
+    def lit_points(self, passed):
+        """ Return the set of point indexes on the laser path, from states returned by trace() """
+
+        transmit = self.transmit
+        points = {s >> 2 for s in passed}
+        points.update([transmit[s] >> 2 for s in passed])
+        return points
+
+    def segments(self, passed):
+        """ Return laser segments [(x0, y0, x1, y1), ...] from states returned by trace() """
+
+        segments = []
+        for s in passed:
+            x0, y0 = self.point_xy(s >> 2)
+            x1, y1 = self.point_xy(self.transmit[s] >> 2)
+            segments.append((x0, y0, x1, y1))
+        return segments
+
+
+class TraceCache:
+    """
+    Trace lasers like CompiledBoard.trace(), remembering the beam of every laser source separately.
+
+    The beam of one source (with all its refract splits) only depends on the blocks of the cells it touched.
+    For every source, traced beams are kept with the cells they touched and the blocks found there; a beam is
+    reused as long as the blocks on those cells are the same, so only sources whose touched cells changed are
+    traced again. Beams of different sources are traced separately here, a state reached by two sources is
+    reported once for each.
+
+    Beams touching the same cells share one entry in *shapes*, where beams are looked up by their blocks. At most
+    *max_shapes* shapes and *maxsize* beams are kept for every source, the least recently used are dropped first.
+    Beams are traced by *trace*, a function like CompiledBoard.trace() (see pylazors._jit.get_tracer()), defaults
+    to the trace() of *compiled*.
+
+    **Attributes**
+
+        hits, misses: *int*
+            number of source beams reused from the cache, and traced.
+    """
+
+    def __init__(self, compiled, source_states, maxsize=4096, max_shapes=16, trace=None):
+        self.compiled = compiled
+        self._trace = trace or compiled.trace
+        self.source_states = list(source_states)
+        self.maxsize, self.max_shapes = maxsize, max_shapes
+        self.hits = self.misses = 0
+        # For every source: OrderedDict {touched cells: (itemgetter of them, OrderedDict {blocks: passed})}
+        self._shapes = [OrderedDict() for _ in self.source_states]
+        self._sizes = [0] * len(self.source_states)
+
+    @property
+    def hit_rate(self):
+        """ Share of source beams reused from the cache, 0.0 before any trace """
+
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def trace(self, cells, laser_history=None):
+        """ Return states which produced a laser segment, as CompiledBoard.trace() (possibly in another order) """
+
+        passed = []
+        for i, source in enumerate(self.source_states):
+            passed += self._beam(i, source, cells, laser_history)[0]
+        return passed
+
+    def lit_points(self, cells):
+        """ Return the set of lit point indexes, same as CompiledBoard.lit_points(trace(cells)), not to be changed """
+
+        if len(self.source_states) == 1:
+            return self._beam(0, self.source_states[0], cells, None)[2]
+        lit = set()
+        for i, source in enumerate(self.source_states):
+            lit.update(self._beam(i, source, cells, None)[2])
+        return lit
+
+    def _beam(self, i, source, cells, laser_history):
+        """ Return (passed, traced states, lit points) of the beam of source *i* """
+
+        shapes = self._shapes[i]
+        # Most recently used shapes first
+        for touched in reversed(shapes):
+            getter, beams = shapes[touched]
+            blocks = getter(cells)
+            beam = beams.get(blocks)
+            if beam is not None:
+                self.hits += 1
+                shapes.move_to_end(touched)
+                beams.move_to_end(blocks)
+                if laser_history is not None:
+                    laser_history.update(beam[1])
+                return beam
+
+        self.misses += 1
+        states = set()
+        passed = self._trace(cells, [source], states)
+        if laser_history is not None:
+            laser_history.update(states)
+        next_cell = self.compiled.next_cell
+        touched = tuple(sorted({next_cell[s] for s in states} - {-1}))
+        if touched not in shapes:
+            # itemgetter() of one index returns the item, not a tuple, which is fine as a key.
+            shapes[touched] = (itemgetter(*touched) if touched else lambda cells: (), OrderedDict())
+            if len(shapes) > self.max_shapes:
+                self._sizes[i] -= len(shapes.popitem(last=False)[1][1])
+        else:
+            shapes.move_to_end(touched)
+        beam = (passed, states, frozenset(self.compiled.lit_points(passed)))
+        shapes[touched][1][shapes[touched][0](cells)] = beam
+        self._sizes[i] += 1
+        while self._sizes[i] > self.maxsize:
+            # Drop the oldest beam of the least recently used shape
+            touched, (getter, beams) = next(iter(shapes.items()))
+            beams.popitem(last=False)
+            self._sizes[i] -= 1
+            if not beams:
+                del shapes[touched]
+        return beam
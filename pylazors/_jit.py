@@ -0,0 +1,163 @@
+"""
+This file contains a laser tracing kernel for the tables of a CompiledBoard, compiled by numba if it is installed.
+
+CompiledBoard.trace() still allocates: it pushes Python ints on a list and keeps the laser history in a set.
+_trace_kernel() does the same steps, in the same order, in restricted Python that numba can compile to machine
+code: flat integer arrays only, a preallocated array as the stack, and the history as a per-state mark array
+which is cleared again (only where marked) before returning. Arguments are packed in as few arrays as possible,
+since the compiled code is called once per trace and each argument adds to the cost of a call.
+
+The kernel is plain Python as written, so it runs (slowly) without numba too, which is how the tests check it.
+Solvers only use it through get_tracer(), which falls back to CompiledBoard.trace() when numba is missing
+(`pip install numba` to enable it).
+"""
+
+from pylazors._compiled import _transparent, _reflective
+from array import array
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _trace_kernel(tables, cells, sources, work):
+    """
+    Trace lasers like CompiledBoard.trace(), on integer arrays.
+
+    *tables* holds next_cell, transmit and reflect of the CompiledBoard one after another, then whether each of
+    the 16 block values is transparent, then whether it is reflective. *work* holds one mark per state, which
+    must be all zeros and is left so, then room for three arrays (stack, marked states, passed states) of
+    (len(work) - number of states) // 3 items each, at least one per state plus one per source.
+
+    Returns (number of passed states, number of traced states), which are written in *work*, see KernelTracer.
+    """
+
+    num_states = (len(tables) - 32) // 3
+    size = (len(work) - num_states) // 3
+    transmit, reflect = num_states, 2 * num_states
+    transparent, reflective = 3 * num_states, 3 * num_states + 16
+    stack, marked, passed = num_states, num_states + size, num_states + 2 * size
+
+    top = 0
+    num_marked = 0
+    for i in range(len(sources)):
+        s = sources[i]
+        work[stack + top] = s
+        top += 1
+        if work[s] == 0:
+            work[s] = 1
+            work[marked + num_marked] = s
+            num_marked += 1
+    num_passed = 0
+
+    while top > 0:
+        top -= 1
+        s = work[stack + top]
+        c = tables[s]
+        if c < 0:
+            continue
+        block = cells[c]
+        if tables[transparent + block]:
+            work[passed + num_passed] = s
+            num_passed += 1
+            new_laser = tables[transmit + s]
+            if work[new_laser] == 0:
+                work[new_laser] = 1
+                work[marked + num_marked] = new_laser
+                num_marked += 1
+                work[stack + top] = new_laser
+                top += 1
+        if tables[reflective + block]:
+            new_laser = tables[reflect + s]
+            if work[new_laser] == 0:
+                work[new_laser] = 1
+                work[marked + num_marked] = new_laser
+                num_marked += 1
+                work[stack + top] = new_laser
+                top += 1
+
+    for i in range(num_marked):
+        work[work[marked + i]] = 0
+    return num_passed, num_marked
+
+
+if numba is not None:
+    _compiled_kernel = numba.njit(cache=True, nogil=True)(_trace_kernel)
+else:
+    _compiled_kernel = None
+
+
+class KernelTracer:
+    """
+    Trace lasers on a CompiledBoard with _trace_kernel(), same interface as CompiledBoard.trace().
+
+    With *compiled_kernel* False, the kernel runs as plain Python on array.array buffers, which needs no numba
+    and is only meant for checking the kernel. A tracer holds its own buffers, so it must not be shared between
+    threads.
+    """
+
+    def __init__(self, compiled, compiled_kernel=True):
+        if compiled_kernel and _compiled_kernel is None:
+            raise ImportError('numba is required to compile the tracing kernel')
+        self.compiled = compiled
+        self._kernel = _compiled_kernel if compiled_kernel else _trace_kernel
+        if compiled_kernel:
+            import numpy
+            self._array = lambda values: numpy.array(values, dtype=numpy.int32)
+        else:
+            self._array = lambda values: array('i', values)
+        self._num_states = len(compiled.next_cell)
+        self._tables = self._array(list(compiled.next_cell) + list(compiled.transmit) + list(compiled.reflect) +
+                                   [int(v) for v in _transparent + _reflective])
+        self._sources = {}
+        self._work = None
+        self._size = 0
+
+    def trace(self, cells, source_states, laser_history=None):
+        """ Return states which produced a laser segment, see CompiledBoard.trace() """
+
+        if laser_history:
+            # States already in the history are not traced, only CompiledBoard.trace() does that.
+            return self.compiled.trace(cells, source_states, laser_history)
+        key = tuple(source_states)
+        sources = self._sources.get(key)
+        if sources is None:
+            sources = self._sources[key] = self._array(key)
+            if self._num_states + len(key) > self._size:
+                self._size = self._num_states + len(key)
+                self._work = self._array([0] * (self._num_states + 3 * self._size))
+        # Block values fit in a byte, and bytes are the fastest to pass to the compiled kernel.
+        num_passed, num_marked = self._kernel(self._tables, bytes(cells), sources, self._work)
+        begin = self._num_states + 2 * self._size
+        if laser_history is not None:
+            laser_history.update(self._work[begin - self._size:begin - self._size + num_marked].tolist())
+        return self._work[begin:begin + num_passed].tolist()
+
+
+def get_tracer(compiled, backend='auto'):
+    """
+    Return a function tracing lasers on *compiled*, same as CompiledBoard.trace().
+
+    **Parameters**
+
+        compiled: *pylazors._compiled.CompiledBoard object*
+
+        backend: *str, optional*
+            'numba' for the compiled kernel (ImportError if numba is missing), 'python' for
+            CompiledBoard.trace(), 'auto' for the kernel if numba is installed.
+
+    **Returns**
+
+        trace: *function*
+            trace(cells, source_states, laser_history=None)
+    """
+
+    if backend in ('auto', 'numba'):
+        if numba is not None:
+            return KernelTracer(compiled).trace
+        if backend == 'numba':
+            raise ImportError('numba is required to compile the tracing kernel')
+    elif backend != 'python':
+        raise ValueError('Unknown tracer backend: %s' % backend)
+    return compiled.trace
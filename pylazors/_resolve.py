@@ -0,0 +1,169 @@
+"""
+This file contains the warm start search of pylazors.resolve(), for re-solving a board after a small edit.
+
+After an edit (a fixed block moved, a target added, block counts changed, ...), the previous solution is often
+still valid, or only a few block moves away from a new one. So instead of starting over, placements are tested
+outward from the previous one: first the previous placement itself, then all placements one move away (a block
+moved to an empty cell, or two blocks of different types swapped), then two moves away, and so on up to
+*max_moves*.
+
+Blocks of the previous solution standing on cells fixed by the edit are dropped, as are blocks over the new
+counts. Missing blocks are added on every empty cell, each addition counting as one move.
+"""
+
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard, TraceCache
+from itertools import combinations
+
+
+_movable_types = (Block.OPAQUE, Block.REFLECT, Block.REFRACT)
+
+
+def _solve_nearby(board, previous_solution, max_moves=2, print_log=True, stats=None, progress=None):
+    """ Search for a solution of *board* within *max_moves* moves of the placement of *previous_solution*.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        previous_solution: *pylazors.Board object*
+            a solution board of an earlier version of *board*.
+
+        max_moves: *int, optional*
+            maximum number of block moves from the previous placement.
+
+        stats, progress:
+            see _solve_large_board().
+
+    **Returns**
+
+        solution_board: *pylazors.Board object*
+            One possible solution board. None if no placement within *max_moves* moves is a solution.
+    """
+
+    if stats is not None:
+        stats.strategy = 'resolve'
+    compiled = CompiledBoard(board)
+    width, free_cells = compiled.width, compiled.free_cells
+    available_blocks = board.get_available_blocks()
+    counts = [available_blocks.count(t) for t in _movable_types]
+    # A placement is a tuple of cell indexes, one for each movable block, ordered by type as in *types*.
+    types = [int(t) for t, n in zip(_movable_types, counts) for _ in range(n)]
+    source_states = [compiled.state(*l) for l in board.get_laser_sources()]
+    target_points = [compiled.point(*p) for p in board.get_targets()]
+    org_cells = [v if v >= 0 else int(Block.BLANK) for v in compiled.fixed]
+    cache = TraceCache(compiled, source_states)
+
+    # Previous blocks still on free cells, by type
+    previous = [[] for _ in _movable_types]
+    if (previous_solution.width, previous_solution.height) == (board.width, board.height):
+        for c in free_cells:
+            block = previous_solution.get_block(c % width, c // width)
+            if block in _movable_types:
+                previous[_movable_types.index(block)].append(c)
+    kept = [cells[:n] for cells, n in zip(previous, counts)]
+    missing = sum(counts) - sum(len(cells) for cells in kept)
+
+    def canonical(placement):
+        # Blocks of the same type are interchangeable
+        key, i = [], 0
+        for n in counts:
+            key += sorted(placement[i:i + n])
+            i += n
+        return tuple(key)
+
+    def cells_of(placement):
+        cells = org_cells[:]
+        for c, t in zip(placement, types):
+            cells[c] = t
+        return cells
+
+    def completions():
+        # Every way of adding the missing blocks on empty cells
+        occupied = {c for cells in kept for c in cells}
+        empty = [c for c in free_cells if c not in occupied]
+        additions = [(i, n - len(cells)) for i, (cells, n) in enumerate(zip(kept, counts)) if n > len(cells)]
+
+        def add(k, placed, used):
+            if k == len(additions):
+                yield tuple(c for cells in placed for c in cells)
+                return
+            i, n = additions[k]
+            for new in combinations([c for c in empty if c not in used], n):
+                yield from add(k + 1, placed[:i] + [placed[i] + list(new)] + placed[i + 1:], used | set(new))
+        yield from add(0, kept, set())
+
+    def neighbours(placement):
+        occupied = set(placement)
+        for i in range(len(types)):
+            for cell in free_cells:
+                if cell not in occupied:
+                    yield placement[:i] + (cell,) + placement[i + 1:]
+            for j in range(i + 1, len(types)):
+                if types[i] != types[j]:
+                    new = list(placement)
+                    new[i], new[j] = placement[j], placement[i]
+                    yield tuple(new)
+
+    tested = [0]
+    solution = [None]
+
+    def test(placement):
+        tested[0] += 1
+        if progress is not None and tested[0] % 1000 == 0:
+            progress(tested[0])
+        cells = cells_of(placement)
+        lit = cache.lit_points(cells)
+        if all([p in lit for p in target_points]):
+            solution[0] = cells
+            return True
+        return False
+
+    moves = missing
+    visited = set()
+    frontier = []
+    if moves <= max_moves:
+        for placement in completions():
+            key = canonical(placement)
+            if key not in visited:
+                visited.add(key)
+                frontier.append(placement)
+                if test(placement):
+                    break
+    while solution[0] is None and frontier and moves < max_moves:
+        moves += 1
+        next_frontier = []
+        for placement in frontier:
+            for new in neighbours(placement):
+                key = canonical(new)
+                if key in visited:
+                    continue
+                visited.add(key)
+                next_frontier.append(new)
+                if test(new):
+                    break
+            if solution[0] is not None:
+                break
+        frontier = next_frontier
+
+    if stats is not None:
+        stats.candidates += tested[0]
+        stats.traces += cache.misses
+        stats.solved += solution[0] is not None
+        stats.trace_cache_hits += cache.hits
+        stats.trace_cache_misses += cache.misses
+    if print_log:
+        if solution[0] is not None:
+            print('[resolve] solution found %d move(s) away from the previous one, %d candidates' % (
+                moves, tested[0]))
+        else:
+            print('[resolve] no solution within %d move(s) of the previous one, %d candidates' % (
+                max_moves, tested[0]))
+    if solution[0] is None:
+        return None
+
+    cells = solution[0]
+    solution_board = board.copy(with_laser_segments=False)
+    solution_board.load_blocks([[Block(v) for v in cells[y * width:(y + 1) * width]] for y in range(compiled.height)])
+    solution_board.load_laser_segments(compiled.segments(compiled.trace(cells, source_states)))
+    return solution_board
@@ -0,0 +1,133 @@
+"""
+This file contains the sharing of CompiledBoard tables with worker processes, used by pylazors.solve_many().
+
+Without it, every worker process compiles every grid it is given again. Here the parent process compiles each
+grid once, and publishes its tables in one multiprocessing.shared_memory block:
+
+    fixed | next_cell | transmit | reflect         (all 32-bit ints)
+
+Workers attach the blocks by name, and build CompiledBoard objects on read-only memoryviews of them, so the
+state tables are never copied or pickled. Only small descriptors (block name, size and grid key) are sent to
+workers.
+
+The parent owns the blocks: SharedTables.close() unlinks them, and is also called at interpreter exit if it has
+not been called before. Where shared memory is not available (Python < 3.8, or no /dev/shm), publish() returns
+None and workers compile grids themselves as before.
+"""
+
+from pylazors._compiled import CompiledBoard
+from array import array
+import atexit
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+class SharedTables:
+    """
+    Shared memory blocks of CompiledBoard tables, owned by the process which created them.
+
+    **Attributes**
+
+        descriptors: *list, tuple*
+            (grid key, block name, width, height) of every grid, picklable, see attach().
+        nbytes: *int*
+            total size of all blocks, in bytes.
+    """
+
+    def __init__(self):
+        self.descriptors = []
+        self.nbytes = 0
+        self._blocks = []
+        atexit.register(self.close)
+
+    def add(self, key, compiled):
+        """ Copy tables of *compiled* into a new shared memory block, for grid *key* """
+
+        tables = [compiled.fixed, compiled.next_cell, compiled.transmit, compiled.reflect]
+        size = sum(len(t) for t in tables) * 4
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        view = block.buf[:size].cast('i')
+        start = 0
+        for table in tables:
+            view[start:start + len(table)] = array('i', table)
+            start += len(table)
+        view.release()
+        self.descriptors.append((key, block.name, compiled.width, compiled.height))
+        self.nbytes += size
+
+    def close(self):
+        """ Unlink all blocks. Processes which attached them keep their mappings until they exit. """
+
+        atexit.unregister(self.close)
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+
+def table_nbytes(width, height):
+    """ Return the size of the shared memory block of a grid of *width* x *height* blocks, in bytes """
+
+    return (width * height + 3 * (2 * width + 3) * (2 * height + 3) * 4) * 4
+
+
+def publish(compiled_boards):
+    """
+    Publish {grid key: CompiledBoard}, or (grid key, CompiledBoard) pairs, in shared memory. Pairs can be given
+    by a generator, so that only one CompiledBoard at a time is kept in this process.
+
+    **Returns**
+
+        shared: *SharedTables object*
+            or None if shared memory is not available.
+    """
+
+    if shared_memory is None:
+        return None
+    shared = SharedTables()
+    try:
+        for key, compiled in (compiled_boards.items() if hasattr(compiled_boards, 'items') else compiled_boards):
+            shared.add(key, compiled)
+    except OSError:
+        shared.close()
+        return None
+    return shared
+
+
+# Blocks attached by this process, kept open as long as their tables are used.
+_attached = []
+
+
+def attach(descriptors):
+    """ Return {grid key: CompiledBoard} on the shared memory blocks of *descriptors*, see SharedTables """
+
+    compiled_boards = {}
+    for key, name, width, height in descriptors:
+        try:
+            block = _attach_block(name)
+        except (OSError, ValueError):
+            # Gone already, this grid is compiled again if needed.
+            continue
+        _attached.append(block)
+        num_cells = width * height
+        num_states = (2 * width + 3) * (2 * height + 3) * 4
+        view = block.buf[:table_nbytes(width, height)].cast('i').toreadonly()
+        tables = [view[num_cells + i * num_states:num_cells + (i + 1) * num_states] for i in range(3)]
+        compiled_boards[key] = CompiledBoard.from_tables(width, height, view[:num_cells], *tables)
+    return compiled_boards
+
+
+def _attach_block(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching also registers the block in the resource tracker, which worker processes
+        # share with the parent process. Registering the same name again changes nothing there.
+        return shared_memory.SharedMemory(name=name)
@@ -12,6 +12,7 @@ docs/optimization.md contains some notes about this file.
 from pylazors.block import Block
 from itertools import combinations
 import pickle
+import time
 
 
 def _target_neighbor_block_positions(x, y):
@@ -29,7 +30,7 @@ def _laser_next_block_position(x, y, vx, vy):
     return (bx - (0 if vx > 0 else 1), by) if y % 2 else (bx, by - (0 if vy > 0 else 1))
 
 
-def _trace_lasers(blocks, laser_sources):
+def _trace_lasers(blocks, laser_sources, laser_history=None):
     """ Trace lasers on board and return all laser paths.
 
     **Parameters**
@@ -42,6 +43,8 @@ def _trace_lasers(blocks, laser_sources):
             A list of tuples holding all laser sources. Format should be
             same as the the return of pylazors.board.Board.get_lasers().
             [(x, y, vx, vy), ...]
+        laser_history: *set, optional*
+            If given, all traced lasers (x, y, vx, vy) will be added into it.
 
     **Returns**
 
@@ -50,7 +53,11 @@ def _trace_lasers(blocks, laser_sources):
             [(x0, y0, x1, y1), ...]
     """
 
-    lasers, laser_history = list(laser_sources), set(laser_sources)
+    lasers = list(laser_sources)
+    if laser_history is None:
+        laser_history = set(laser_sources)
+    else:
+        laser_history.update(laser_sources)
     laser_segments = []
     width, height = len(blocks[0]), len(blocks)
 
@@ -82,7 +89,55 @@ def _trace_lasers(blocks, laser_sources):
     return laser_segments
 
 
-def _block_combinations(available_locations, num_opaque, num_reflect, num_refract, banned_single=None, banned_pair=None):
+def _order_locations(available_locations, blocks, laser_sources, targets):
+    """ Return *available_locations* in order of how likely a block there is part of a solution.
+
+    Lasers are traced with no movable block placed. Locations on or next to these unobstructed beam paths come
+    first, then the others, and locations next to a target come last: a block there hides one side of the target,
+    and on boards/all they hold a block about half as often as other locations. Ties are in row-major order.
+
+    **Parameters**
+
+        available_locations: *list, tuple*
+            [(x, y), ...] locations where a block can be placed.
+
+        blocks: *list, list*
+            blocks of the board, with no movable block placed, see _trace_lasers().
+
+        laser_sources, targets:
+            same as pylazors.Board.get_laser_sources() and pylazors.Board.get_targets().
+
+    **Returns**
+
+        locations: *list, tuple*
+            the same locations, best first.
+    """
+
+    on_beam = {_laser_next_block_position(x0, y0, x1 - x0, y1 - y0)
+               for x0, y0, x1, y1 in _trace_lasers(blocks, laser_sources)}
+    near_beam = on_beam | {(x + dx, y + dy) for x, y in on_beam for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))}
+    near_target = {b for p in targets for b in _target_neighbor_block_positions(*p)}
+    return sorted(set(available_locations),
+                  key=lambda location: (location in near_target, location not in near_beam, location[1], location[0]))
+
+
+def _prefix_combinations(locations, k):
+    """ Yield the same combinations as itertools.combinations(locations, k), but all combinations of the first m
+    locations before any using the (m + 1)-th one (colexicographic order), so the first locations are tried
+    together first """
+
+    locations = list(locations)
+    if k == 0:
+        yield ()
+        return
+    for m in range(k - 1, len(locations)):
+        last = (locations[m],)
+        for rest in combinations(locations[:m], k - 1):
+            yield rest + last
+
+
+def _block_combinations(available_locations, num_opaque, num_reflect, num_refract, banned_single=None, banned_pair=None,
+                        skip_counts=None, prefix_first=False):
     """ Generate combinations for block locations
 
         **Parameters**
@@ -110,37 +165,48 @@ def _block_combinations(available_locations, num_opaque, num_reflect, num_refrac
                 be placed at the same time.
                 Example: [((1, 3), (2, 3)), ((4, 4), (5, 4)), ...]
 
+            skip_counts: *dict, optional*
+                If given, number of skipped combinations are counted in it, under keys
+                'banned_single', 'banned_pair' (for opaque blocks) and 'banned_pair_reflect'.
+
+            prefix_first: *bool, optional*
+                If True, combinations of the first locations are generated first, see
+                _prefix_combinations(). Used with locations ordered by _order_locations().
+
         **Yields**
-            loc_opaque, loc_reflect, loc_refract, skip_opaque_count, skip_reflect_count
+            loc_opaque, loc_reflect, loc_refract
                 Locations of three different block types, each in a separate list.
-                And two skip counts for debug purpose.
     """
 
-    locations = frozenset(available_locations)
+    locations = list(available_locations)
+    combinations_of = _prefix_combinations if prefix_first else combinations
     loc_opaque_iter = [None]
     loc_reflect_iter = [None]
-    skip_opaque_count, skip_reflect_count = 0, 0
+    if skip_counts is None:
+        skip_counts = {}
+    for key in ('banned_single', 'banned_pair', 'banned_pair_reflect'):
+        skip_counts.setdefault(key, 0)
 
     if num_opaque:
-        loc_opaque_iter = combinations(locations, num_opaque)
+        loc_opaque_iter = combinations_of(locations, num_opaque)
 
     # Loop in OPAQUE blocks
     for loc_opaque in loc_opaque_iter:
         if num_opaque:
             if banned_single:
                 if any(map(lambda b: b in loc_opaque, banned_single)):
-                    skip_opaque_count += 1
+                    skip_counts['banned_single'] += 1
                     continue
             if banned_pair:
                 if any(map(lambda b: b[0] in loc_opaque and b[1] in loc_opaque, banned_pair)):
-                    skip_opaque_count += 1
+                    skip_counts['banned_pair'] += 1
                     continue
-            available_for_reflect = locations - set(loc_opaque)
+            available_for_reflect = [l for l in locations if l not in loc_opaque]
         else:
             available_for_reflect = locations
 
         if num_reflect:
-            loc_reflect_iter = combinations(available_for_reflect, num_reflect)
+            loc_reflect_iter = combinations_of(available_for_reflect, num_reflect)
 
         # Loop in REFLECT blocks
         for loc_reflect in loc_reflect_iter:
@@ -148,35 +214,104 @@ def _block_combinations(available_locations, num_opaque, num_reflect, num_refrac
                 if banned_pair:
                     tmp_locations = loc_reflect + loc_opaque if loc_opaque else loc_reflect
                     if any(map(lambda b: b[0] in tmp_locations and b[1] in tmp_locations, banned_pair)):
-                        skip_reflect_count += 1
+                        skip_counts['banned_pair_reflect'] += 1
                         continue
-                available_for_refract = available_for_reflect - set(loc_reflect)
+                available_for_refract = [l for l in available_for_reflect if l not in loc_reflect]
             else:
                 available_for_refract = available_for_reflect
             if num_refract:
-                loc_refract_iter = combinations(available_for_refract, num_refract)
+                loc_refract_iter = combinations_of(available_for_refract, num_refract)
                 for loc_refract in loc_refract_iter:
-                    yield loc_opaque, loc_reflect, loc_refract, skip_opaque_count, skip_reflect_count
+                    yield loc_opaque, loc_reflect, loc_refract
             else:
-                yield loc_opaque, loc_reflect, None, skip_opaque_count, skip_reflect_count
+                yield loc_opaque, loc_reflect, None
+
+
+def _place_blocks(org_blocks_pickled, loc_opaque, loc_reflect, loc_refract):
+    """ Return a new list of lists of blocks, with movable blocks placed on given locations """
+
+    blocks = pickle.loads(org_blocks_pickled)
+    if loc_opaque:
+        for x, y in loc_opaque:
+            blocks[y][x] = Block.OPAQUE
+    if loc_reflect:
+        for x, y in loc_reflect:
+            blocks[y][x] = Block.REFLECT
+    if loc_refract:
+        for x, y in loc_refract:
+            blocks[y][x] = Block.REFRACT
+    return blocks
+
+
+def _all_targets_hit(laser_segments, targets):
+    """ Return True if all *targets* are on the path of *laser_segments* """
 
+    points_on_path = set()
+    for s in laser_segments:
+        points_on_path.add((s[0], s[1]))
+        points_on_path.add((s[2], s[3]))
+    return all([p in points_on_path for p in targets])
 
-def _solve_large_board(board, print_log=True):
+
+def _banned_locations(num_opaque, num_reflect, laser_sources, targets):
+    """ Return (banned_single, banned_pair) for _block_combinations() """
+
+    # Locations in where OPAQUE block can not be. Because it will block the only laser source directly.
+    banned_single = set()
+    if num_opaque and len(laser_sources) == 1:
+        banned_single.update([_laser_next_block_position(*l) for l in laser_sources])
+
+    # Locations in where two Non-transparent blocks (OPAQUE and REFLECT) can not be at the same time. Because:
+    #   1) they will surround a target point, or
+    #   2) they will surround the only laser source.
+    banned_pair = set()
+    if num_opaque or num_reflect:
+        banned_pair.update([_target_neighbor_block_positions(*p) for p in targets])
+    if (num_opaque or num_reflect) and len(laser_sources) == 1:
+        banned_pair.update(([_target_neighbor_block_positions(*l[:2]) for l in laser_sources]))
+    return banned_single, banned_pair
+
+
+def _with_progress(iterable, progress, interval=1000):
+    """ Yield items of *iterable*, and call progress(n) every *interval* items, n being the number of items so far """
+
+    n = 0
+    for item in iterable:
+        yield item
+        n += 1
+        if n % interval == 0:
+            progress(n)
+
+
+def _solve_large_board(board, print_log=True, stats=None, progress=None, ordering='beams'):
     """ Solve a Lazors Board.
     **Parameters**
 
         board: *pylazors.Board object*
 
+        stats: *pylazors.stats.SolveStats object, optional*
+            If given, solving statistics will be collected into it.
+
+        progress: *callable, optional*
+            If given, it is called with the number of tested boards every 1000 boards.
+
+        ordering: *str, optional*
+            'beams' to try locations near beam paths first and locations next to targets last (see
+            _order_locations()), None for no particular order. Either way all combinations are tested if needed.
+
     **Returns**
 
         solution_board: *pylazors.Board object*
             One possible solution board. if no solution found, will return None.
     """
 
+    if stats is not None:
+        t0 = time.perf_counter()
+        stats.strategy = 'large'
+
     solution_board = board.copy(with_laser_segments=False)
     available_blocks = board.get_available_blocks()
     org_blocks_pickled = pickle.dumps(solution_board.get_blocks())
-    org_lasers_pickled = pickle.dumps(solution_board.get_laser_sources())
 
     # Obtain all unfixed locations
     available_locations = set()
@@ -191,52 +326,176 @@ def _solve_large_board(board, print_log=True):
 
     targets = solution_board.get_targets()
     laser_sources = solution_board.get_laser_sources()
+    banned_single, banned_pair = _banned_locations(num_opaque, num_reflect, laser_sources, targets)
+    if ordering == 'beams':
+        available_locations = _order_locations(available_locations, solution_board.get_blocks(), laser_sources,
+                                               targets)
+    elif ordering is not None:
+        raise ValueError('Unknown location ordering: %s' % ordering)
+
+    skip_counts = {}
+    location_generator = _block_combinations(available_locations, num_opaque, num_reflect, num_refract,
+                                             banned_single, banned_pair, skip_counts, ordering is not None)
+
+    # Counting and timing are only wrapped around the steps when statistics are requested.
+    place_blocks, trace_lasers, all_targets_hit = _place_blocks, _trace_lasers, _all_targets_hit
+    if stats is not None:
+        stats.add_time('setup', time.perf_counter() - t0)
+        location_generator = stats.timed_iter('generation', location_generator)
+        place_blocks = stats.timed('generation', _place_blocks)
+        all_targets_hit = stats.timed('verification', _all_targets_hit)
+
+        def trace_lasers(blocks, laser_sources):
+            t0 = time.perf_counter()
+            laser_history = set()
+            laser_segments = _trace_lasers(blocks, laser_sources, laser_history)
+            stats.add_time('tracing', time.perf_counter() - t0)
+            stats.traces += 1
+            stats.trace_steps += len(laser_history)
+            stats.segments += len(laser_segments)
+            return laser_segments
+    if progress is not None:
+        location_generator = _with_progress(location_generator, progress)
 
-    # Locations in where OPAQUE block can not be. Because it will block the only laser source directly.
-    banned_single = set()
-    if num_opaque and len(laser_sources) == 1:
-        banned_single.update([_laser_next_block_position(*l) for l in laser_sources])
+    i = 0
+    solved = False
+    for loc_opaque, loc_reflect, loc_refract in location_generator:
+        i += 1
+        blocks = place_blocks(org_blocks_pickled, loc_opaque, loc_reflect, loc_refract)
+        laser_segments = trace_lasers(blocks, laser_sources)
 
-    # Locations in where two Non-transparent blocks (OPAQUE and REFLECT) can not be at the same time. Because:
-    #   1) they will surround a target point, or
-    #   2) they will surround the only laser source.
-    banned_pair = set()
-    if num_opaque or num_reflect:
-        banned_pair.update([_target_neighbor_block_positions(*p) for p in targets])
-    if (num_opaque or num_reflect) and len(laser_sources) == 1:
-        banned_pair.update(([_target_neighbor_block_positions(*l[:2]) for l in laser_sources]))
+        if all_targets_hit(laser_segments, targets):
+            solution_board.load_laser_segments(laser_segments)
+            solution_board.load_blocks(blocks)
+            solved = True
+            break
 
+    if print_log and solved:
+        print('[solve_large_board] # of tested boards: %d' % i)
+        print('[solve_large_board] # of skipped combinations: %d (opaque), %d (reflect)' %
+              (skip_counts['banned_single'] + skip_counts['banned_pair'], skip_counts['banned_pair_reflect']))
+    if stats is not None:
+        stats.candidates += i
+        stats.solved += solved
+        stats.add_pruned('banned_single', skip_counts['banned_single'])
+        stats.add_pruned('banned_pair', skip_counts['banned_pair'] + skip_counts['banned_pair_reflect'])
+    return solution_board if solved else None
+
+
+def _solve_compiled_board(board, compiled=None, print_log=True, stats=None, progress=None, trace_cache=True,
+                          ordering='beams', tracer='auto'):
+    """ Solve a Lazors Board, like _solve_large_board(), but trace lasers on the tables of a CompiledBoard.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        compiled: *pylazors._compiled.CompiledBoard object, optional*
+            compiled grid of *board*. Boards with the same size and fixed blocks (e.g. variants of a level
+            with different lasers or targets) can share one. Compiled from *board* if not given.
+
+        stats, progress, ordering:
+            see _solve_large_board().
+
+        trace_cache: *bool, optional*
+            if True, beams of every laser source are reused between candidates through a
+            pylazors._compiled.TraceCache, and only sources whose touched cells changed are traced again.
+
+        tracer: *str, optional*
+            'numba' to trace lasers with the compiled kernel of pylazors._jit, 'python' with
+            CompiledBoard.trace(), 'auto' with the kernel if numba is installed.
+
+    **Returns**
+
+        solution_board: *pylazors.Board object*
+            One possible solution board. if no solution found, will return None.
+    """
+
+    if stats is not None:
+        t0 = time.perf_counter()
+        stats.strategy = 'compiled'
+
+    if compiled is None:
+        from pylazors._compiled import CompiledBoard
+        compiled = CompiledBoard(board)
+    width = compiled.width
+    available_blocks = board.get_available_blocks()
+    num_opaque = available_blocks.count(Block.OPAQUE)
+    num_reflect = available_blocks.count(Block.REFLECT)
+    num_refract = available_blocks.count(Block.REFRACT)
+
+    targets = board.get_targets()
+    laser_sources = board.get_laser_sources()
+    banned_single, banned_pair = _banned_locations(num_opaque, num_reflect, laser_sources, targets)
+    available_locations = [(c % width, c // width) for c in compiled.free_cells]
+    if ordering == 'beams':
+        available_locations = _order_locations(available_locations, board.get_blocks(), laser_sources, targets)
+    elif ordering is not None:
+        raise ValueError('Unknown location ordering: %s' % ordering)
+
+    source_states = [compiled.state(*l) for l in laser_sources]
+    target_points = [compiled.point(*p) for p in targets]
+    org_cells = [v if v >= 0 else int(Block.BLANK) for v in compiled.fixed]
+    opaque, reflect, refract = int(Block.OPAQUE), int(Block.REFLECT), int(Block.REFRACT)
+
+    skip_counts = {}
     location_generator = _block_combinations(available_locations, num_opaque, num_reflect, num_refract,
-                                             banned_single, banned_pair)
+                                             banned_single, banned_pair, skip_counts, ordering is not None)
+    from pylazors._jit import get_tracer
+    trace_func = get_tracer(compiled, tracer)
+    trace, lit_points = trace_func, compiled.lit_points
+    cache = cached_lit_points = None
+    if trace_cache:
+        # Lit points of every beam are cached too, so traced states are only needed for the solution.
+        from pylazors._compiled import TraceCache
+        cache = TraceCache(compiled, source_states, trace=trace_func)
+        cached_lit_points = cache.lit_points
+    if stats is not None:
+        stats.add_time('setup', time.perf_counter() - t0)
+        location_generator = stats.timed_iter('generation', location_generator)
+        trace = stats.timed('tracing', trace_func)
+        lit_points = stats.timed('verification', compiled.lit_points)
+        if cache is not None:
+            cached_lit_points = stats.timed('tracing', cache.lit_points)
+    if progress is not None:
+        location_generator = _with_progress(location_generator, progress)
 
     i = 0
-    for loc_opaque, loc_reflect, loc_refract, skip_opaque_count, skip_reflect_count in location_generator:
+    solution_board = None
+    for loc_opaque, loc_reflect, loc_refract in location_generator:
         i += 1
-        blocks = pickle.loads(org_blocks_pickled)
-        laser_sources = pickle.loads(org_lasers_pickled)
-
+        cells = org_cells[:]
         if loc_opaque:
             for x, y in loc_opaque:
-                blocks[y][x] = Block.OPAQUE
+                cells[x + y * width] = opaque
         if loc_reflect:
             for x, y in loc_reflect:
-                blocks[y][x] = Block.REFLECT
+                cells[x + y * width] = reflect
         if loc_refract:
             for x, y in loc_refract:
-                blocks[y][x] = Block.REFRACT
-
-        laser_segments = _trace_lasers(blocks, laser_sources)
-
-        all_points_on_path = []
-        for s in laser_segments:
-            all_points_on_path.append((s[0], s[1]))
-            all_points_on_path.append((s[2], s[3]))
-        if all([p in all_points_on_path for p in targets]):
-            solution_board.load_laser_segments(laser_segments)
-            solution_board.load_blocks(blocks)
-            if print_log:
-                print('[solve_large_board] # of tested boards: %d' % i)
-                print('[solve_large_board] # of skipped combinations: %d (opaque), %d (reflect)' %
-                      (skip_opaque_count, skip_reflect_count))
-            return solution_board
-    return None
+                cells[x + y * width] = refract
+        if cache is not None:
+            lit = cached_lit_points(cells)
+        else:
+            lit = lit_points(trace(cells, source_states))
+
+        if all([p in lit for p in target_points]):
+            solution_board = board.copy(with_laser_segments=False)
+            solution_board.load_blocks([[Block(v) for v in cells[y * width:(y + 1) * width]]
+                                        for y in range(compiled.height)])
+            solution_board.load_laser_segments(compiled.segments(compiled.trace(cells, source_states)))
+            break
+
+    if print_log and solution_board is not None:
+        print('[solve_compiled_board] # of tested boards: %d' % i)
+    if stats is not None:
+        stats.candidates += i
+        # Beams reused from the cache are not traced
+        stats.traces += cache.misses if cache is not None else i
+        stats.solved += solution_board is not None
+        if cache is not None:
+            stats.trace_cache_hits += cache.hits
+            stats.trace_cache_misses += cache.misses
+        stats.add_pruned('banned_single', skip_counts['banned_single'])
+        stats.add_pruned('banned_pair', skip_counts['banned_pair'] + skip_counts['banned_pair_reflect'])
+    return solution_board
@@ -0,0 +1,288 @@
+"""
+This file contains an asyncio interface of the solver.
+
+Solving runs in a bounded set of worker processes, so awaiting a solution never blocks the event loop, and any
+number of concurrent requests share the workers (requests wait for a free worker in turn):
+
+    solution = await pylazors.solve_board_async(board, timeout=10)
+
+    async for event in pylazors.solve_board_events(board):
+        print(event)        # {'event': 'progress', 'candidates': 5000, 'time': 0.5}, ...,
+                            # then {'event': 'solution', 'solution': <Board or None>, 'stats': <SolveStats>}
+
+    async for board, solution in pylazors.iter_solutions_async(boards):
+        ...                 # in the order boards are solved
+
+Cancelling the awaiting task (including by a timeout), or leaving an `async for` early, stops the solving: the
+worker process solving the board is terminated, and replaced by a new one when needed.
+
+By default, all calls share one AsyncSolverPool with a worker per CPU. Give *pool* to use another one.
+"""
+
+from pylazors.solver import solve_board
+from collections import deque
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+
+
+def _worker_main(conn):
+    """ Main loop of a worker process: receive a board, solve it, send events back """
+
+    while True:
+        try:
+            board, kwargs, progress_interval = conn.recv()
+        except EOFError:
+            return
+
+        if progress_interval is not None:
+            start_time = time.time()
+            last_time = [start_time]
+
+            def progress(candidates):
+                now = time.time()
+                if now - last_time[0] >= progress_interval:
+                    last_time[0] = now
+                    conn.send(('progress', candidates, now - start_time))
+            kwargs['progress'] = progress
+
+        try:
+            solution, stats = solve_board(board, return_stats=True, print_log=False, **kwargs)
+        except Exception as e:
+            conn.send(('error', e))
+        else:
+            conn.send(('done', solution, stats))
+
+
+class _Worker:
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        # Only the worker holds the other end, so a dead worker is seen as EOFError.
+        child_conn.close()
+
+    def terminate(self):
+        self.process.terminate()
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AsyncSolverPool:
+    """
+    A bounded set of solver processes, shared by coroutines.
+
+    Worker processes are started on demand and kept for later requests, at most *processes* of them are alive.
+    Events of a worker are waited for in a thread (one per busy worker), so the event loop is never blocked.
+    Free workers are counted under a lock, not by an asyncio primitive bound to one loop, so a pool can be used
+    from several event loops, one after another (e.g. by several asyncio.run()) or at once in different threads.
+
+    **Parameters**
+
+        processes: *int, optional*
+            maximum number of worker processes, defaults to the number of CPUs.
+
+        context: *multiprocessing context, optional*
+            used to start worker processes, e.g. multiprocessing.get_context('spawn').
+    """
+
+    def __init__(self, processes=None, context=None):
+        self.processes = processes or os.cpu_count() or 1
+        self._context = context or multiprocessing.get_context()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._free = self.processes
+        # (loop, future) of requests waiting for a free worker, in order
+        self._waiters = deque()
+        self._receivers = concurrent.futures.ThreadPoolExecutor(self.processes)
+
+    async def _acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = None
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+            else:
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+        if waiter is not None:
+            try:
+                await waiter
+            except BaseException:
+                with self._lock:
+                    try:
+                        self._waiters.remove((loop, waiter))
+                        handed_over = False
+                    except ValueError:
+                        handed_over = True
+                if handed_over:
+                    # Cancelled after a worker was handed over, pass it on.
+                    self._release_slot()
+                raise
+        try:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            return worker or _Worker(self._context)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def _release_slot(self):
+        """ Hand a free worker over to the first waiting request, in its own loop """
+
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._free += 1
+                    return
+                loop, waiter = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+                return
+            except RuntimeError:
+                # The loop of that request is closed
+                continue
+
+    def _release(self, worker, reusable):
+        if reusable and worker.process.is_alive():
+            with self._lock:
+                self._idle.append(worker)
+        else:
+            worker.terminate()
+        self._release_slot()
+
+    async def events(self, board, progress_interval=0.5, **kwargs):
+        """
+        Solve *board* in a worker process, and yield events as dicts.
+
+            {'event': 'progress', 'candidates': <# of tested candidates>, 'time': <seconds>}
+            {'event': 'solution', 'solution': <pylazors.Board object or None>, 'stats': <SolveStats object>}
+
+        The solution event is always the last one. Progress events are sent at most every
+        *progress_interval* seconds, None for no progress events. Other keyword arguments are passed to
+        pylazors.solve_board(). Errors raised by solve_board() are raised here.
+        """
+
+        loop = asyncio.get_running_loop()
+        worker = await self._acquire()
+        reusable = False
+        try:
+            worker.conn.send((board, kwargs, progress_interval))
+            while True:
+                message = await loop.run_in_executor(self._receivers, worker.conn.recv)
+                if message[0] == 'progress':
+                    yield {'event': 'progress', 'candidates': message[1], 'time': message[2]}
+                    continue
+                reusable = True
+                if message[0] == 'error':
+                    raise message[1]
+                yield {'event': 'solution', 'solution': message[1], 'stats': message[2]}
+                return
+        finally:
+            # Reached with reusable False if the caller is cancelled or stops iterating early.
+            self._release(worker, reusable)
+
+    async def solve(self, board, timeout=None, return_stats=False, **kwargs):
+        """ Solve *board*, see solve_board_async() """
+
+        async def run():
+            events = self.events(board, progress_interval=None, **kwargs)
+            try:
+                async for event in events:
+                    return event
+            finally:
+                await events.aclose()
+
+        event = await asyncio.wait_for(run(), timeout)
+        if return_stats:
+            return event['solution'], event['stats']
+        return event['solution']
+
+    def close(self):
+        """ Terminate all idle workers. Workers still solving are terminated when their requests finish. """
+
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.terminate()
+        self._receivers.shutdown(wait=False)
+
+
+_default_pool = None
+
+
+def default_pool():
+    """ Return the AsyncSolverPool shared by calls without a *pool* """
+
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = AsyncSolverPool()
+    return _default_pool
+
+
+async def solve_board_async(board, timeout=None, pool=None, return_stats=False, **kwargs):
+    """
+    Solve a given Lazors board in a worker process, without blocking the event loop.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        timeout: *float, optional*
+            If given, stop solving and raise asyncio.TimeoutError after *timeout* seconds (including the time
+            waiting for a free worker).
+
+        pool: *AsyncSolverPool object, optional*
+            worker processes to be used, defaults to default_pool().
+
+        return_stats: *bool, optional*
+            If True, also return a pylazors.stats.SolveStats object.
+
+        Other keyword arguments are passed to pylazors.solve_board().
+
+    **Returns**
+
+        solution_board: *pylazors.Board object*
+            None if no solution found.
+    """
+
+    return await (pool or default_pool()).solve(board, timeout, return_stats, **kwargs)
+
+
+def solve_board_events(board, pool=None, progress_interval=0.5, **kwargs):
+    """ Return an async iterator of progress and solution events of solving *board*, see AsyncSolverPool.events() """
+
+    return (pool or default_pool()).events(board, progress_interval, **kwargs)
+
+
+async def iter_solutions_async(boards, pool=None, timeout=None, **kwargs):
+    """
+    Solve many boards concurrently, and yield (board, solution_board) in the order they are solved.
+
+    *timeout* applies to each board, a board timed out is yielded with solution_board None. Leaving the
+    iteration early cancels all boards not yielded yet.
+    """
+
+    pool = pool or default_pool()
+
+    async def solve(board):
+        try:
+            return board, await pool.solve(board, timeout, **kwargs)
+        except asyncio.TimeoutError:
+            return board, None
+
+    tasks = [asyncio.ensure_future(solve(board)) for board in boards]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,239 @@
+"""
+This file contains the batch solving API, solve_many().
+
+Boards are solved with _solve_compiled_board(), which traces lasers on the tables of a CompiledBoard. Boards with
+the same size and fixed blocks, such as variants of a level with different lasers, targets or available blocks,
+share one CompiledBoard (and so its free cells). Compiled boards are kept in an LRU cache limited by a memory
+budget, one cache per process.
+
+When solving in worker processes, each grid is compiled once in the calling process and its tables are shared
+with all workers through shared memory (see pylazors/_shm.py), instead of being compiled again by every worker.
+Shared tables count in the memory budget: if all of them do not fit in it, nothing is shared and every worker
+keeps its own cache, with an equal part of the budget.
+
+With backend='threads', workers are threads of the calling process instead. They share one cache, limited by
+the whole memory budget, and only take its lock to look up the CompiledBoard of a board. CompiledBoard objects
+are never changed once compiled, and every thread has its own search state, so no locks are taken while solving.
+Threads only run in parallel on a free-threaded Python build without the GIL, so elsewhere the process backend is
+used instead.
+"""
+
+from pylazors._compiled import CompiledBoard
+from pylazors._solver import _solve_compiled_board
+from pylazors.stats import SolveStats
+from pylazors.utils import gil_enabled
+from collections import OrderedDict, deque
+import concurrent.futures
+import os
+import threading
+
+
+def _grid_key(board):
+    """ Boards with the same grid key have the same CompiledBoard """
+
+    return board.width, board.height, tuple(int(b) if b.is_fixed() else -1 for row in board.get_blocks() for b in row)
+
+
+class _CompiledCache:
+    """
+    LRU cache of CompiledBoard objects by grid key, holding at most *budget* bytes (None for no limit).
+
+    Compiled boards in *shared* ({grid key: CompiledBoard}, on shared memory) are always used first, and do not
+    count in the budget. With *thread_safe* True, get() can be called from several threads.
+    """
+
+    def __init__(self, budget=None, shared=None, thread_safe=False):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = self.misses = 0
+        self.shared = shared or {}
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock() if thread_safe else None
+
+    def get(self, board):
+        if self._lock is None:
+            return self._get(board)
+        with self._lock:
+            return self._get(board)
+
+    def _get(self, board):
+        key = _grid_key(board)
+        compiled = self.shared.get(key)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self.hits += 1
+            self._compiled.move_to_end(key)
+            return compiled
+
+        self.misses += 1
+        compiled = CompiledBoard(board)
+        if self.budget is None or compiled.nbytes <= self.budget:
+            self._compiled[key] = compiled
+            self.nbytes += compiled.nbytes
+            while self.budget is not None and self.nbytes > self.budget:
+                self.nbytes -= self._compiled.popitem(last=False)[1].nbytes
+        return compiled
+
+
+def _solve_with_cache(cache, board, return_stats, print_log):
+    stats = SolveStats() if return_stats else None
+    solution = _solve_compiled_board(board, cache.get(board), print_log=print_log, stats=stats)
+    return solution, stats
+
+
+_worker_cache = None
+
+
+def _init_worker(budget, shared_descriptors=None):
+    global _worker_cache
+    shared = None
+    if shared_descriptors:
+        from pylazors._shm import attach
+        shared = attach(shared_descriptors)
+    _worker_cache = _CompiledCache(budget, shared)
+
+
+def _solve_chunk(boards, return_stats, print_log):
+    """ Solve boards in a worker process, return [(solution, stats), ...] """
+
+    return [_solve_with_cache(_worker_cache, board, return_stats, print_log) for board in boards]
+
+
+def _grids(boards):
+    """ Return {grid key: a board of that grid} of all grids of *boards* """
+
+    grids = {}
+    for board in boards:
+        grids.setdefault(_grid_key(board), board)
+    return grids
+
+
+def _thread_chunk_solver(cache):
+    """ Return a function like _solve_chunk(), for threads sharing *cache* (thread safe) """
+
+    def solve_chunk(boards, return_stats, print_log):
+        return [_solve_with_cache(cache, board, return_stats, print_log) for board in boards]
+    return solve_chunk
+
+
+def _chunks(boards, order, max_size):
+    """ Split indexes of *boards* in *order* into chunks of boards sharing a grid, each at most *max_size* long """
+
+    groups = OrderedDict()
+    for i in order:
+        groups.setdefault(_grid_key(boards[i]), []).append(i)
+    chunks = []
+    for indexes in groups.values():
+        chunks += [indexes[j:j + max_size] for j in range(0, len(indexes), max_size)]
+    # Groups are ordered by their first (most or least expensive) board, keep this order for chunks.
+    position = {i: n for n, i in enumerate(order)}
+    chunks.sort(key=lambda chunk: position[chunk[0]])
+    return chunks
+
+
+def solve_many(boards, processes=1, memory_budget=None, largest_first=None, return_stats=False, print_log=False,
+               shared_memory=True, backend='processes'):
+    """
+    Solve many boards, and yield results as soon as they are solved.
+
+    **Parameters**
+
+        boards: *list, pylazors.Board*
+            boards to be solved.
+
+        processes: *int, optional*
+            number of workers. 1 solves boards in the calling thread, 0 uses half of available CPUs.
+
+        memory_budget: *int, optional*
+            maximum bytes of compiled boards kept for reuse, in all workers together. None for no limit.
+
+        largest_first: *bool, optional*
+            order boards by expected cost (see pylazors.Board.get_estimate_complexity()): the most expensive
+            first if True, the cheapest first if False. Defaults to True when solving in parallel, which keeps
+            all processes busy until the end, and False otherwise, which gives first results soonest.
+
+        return_stats: *bool, optional*
+            if True, also yield a pylazors.SolveStats object for every board.
+
+        print_log: *bool, optional*
+            if True, print solving logs of every board.
+
+        shared_memory: *bool, optional*
+            if True and solving in worker processes, compile every grid once and share the tables with all
+            workers through shared memory. Falls back to compiling in workers if shared memory is not available,
+            or if the shared tables of all grids would take more than *memory_budget*.
+
+        backend: *str, optional*
+            'processes' for worker processes, or 'threads' for worker threads sharing compiled grids in memory.
+            'threads' falls back to 'processes' when the GIL is enabled, as threads would not run in parallel.
+
+    **Yields**
+
+        board, solution_board: *pylazors.Board objects*
+            a board in *boards*, and its solution (None if no solution found).
+
+        stats: *pylazors.SolveStats object*
+            only if *return_stats* is True.
+    """
+
+    if backend not in ('processes', 'threads'):
+        raise ValueError('Unknown backend: %s' % backend)
+    boards = list(boards)
+    if processes == 0:
+        processes = max(os.cpu_count() // 2, 1)
+    if largest_first is None:
+        largest_first = processes > 1
+    order = sorted(range(len(boards)), key=lambda i: boards[i].get_estimate_complexity(), reverse=largest_first)
+
+    def result(i, solution, stats):
+        return (boards[i], solution, stats) if return_stats else (boards[i], solution)
+
+    if processes <= 1:
+        cache = _CompiledCache(memory_budget)
+        for i in order:
+            yield result(i, *_solve_with_cache(cache, boards[i], return_stats, print_log))
+        return
+
+    # Boards sharing a grid are sent together, so they are compiled once. Chunks are kept small enough that
+    # every worker still gets work.
+    max_chunk = max(1, len(boards) // (processes * 4))
+    chunks = deque(_chunks(boards, order, max_chunk))
+    budget = memory_budget // processes if memory_budget is not None else None
+    if backend == 'threads' and gil_enabled():
+        backend = 'processes'
+    shared = None
+    if backend == 'threads':
+        executor = concurrent.futures.ThreadPoolExecutor(processes)
+        solve_chunk = _thread_chunk_solver(_CompiledCache(memory_budget, thread_safe=True))
+    else:
+        if shared_memory:
+            from pylazors._shm import publish, table_nbytes
+            grids = _grids(boards)
+            shared_nbytes = sum(table_nbytes(board.width, board.height) for board in grids.values())
+            if memory_budget is None or shared_nbytes <= memory_budget:
+                # Compiled one at a time, only the shared copy of every grid is kept.
+                shared = publish((key, CompiledBoard(board)) for key, board in grids.items())
+            if shared is not None and budget is not None:
+                # All grids are shared, worker caches only hold grids whose block could not be attached.
+                budget = (memory_budget - shared.nbytes) // processes
+        initargs = (budget, shared.descriptors if shared is not None else None)
+        executor = concurrent.futures.ProcessPoolExecutor(processes, initializer=_init_worker, initargs=initargs)
+        solve_chunk = _solve_chunk
+    try:
+        with executor:
+            # Only keep a bounded number of chunks in flight, so that boards and results do not pile up in memory.
+            running = {}
+            while chunks or running:
+                while chunks and len(running) < processes * 2:
+                    chunk = chunks.popleft()
+                    running[executor.submit(solve_chunk, [boards[i] for i in chunk], return_stats, print_log)] = chunk
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    for i, (solution, stats) in zip(running.pop(future), future.result()):
+                        yield result(i, solution, stats)
+    finally:
+        if shared is not None:
+            shared.close()
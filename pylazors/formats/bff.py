@@ -1,5 +1,8 @@
 from pylazors.board import Board
 from pylazors.block import *
+from collections import deque
+import concurrent.futures
+import glob
 import os
 
 
@@ -13,6 +16,7 @@ block_bff_map = {v: k for k, v in bff_block_map.items()}
 
 class BFFReaderError(Exception):
     def __init__(self, file_name, line_no=None, message=''):
+        self.file_name, self.line_no, self.message = file_name, line_no, message
         msg = 'Error in %s' % file_name
         if line_no:
             msg += ' at line %d' % line_no
@@ -20,6 +24,10 @@ class BFFReaderError(Exception):
             msg += ': %s' % message
         super().__init__(msg)
 
+    def __reduce__(self):
+        # Keep the structured fields when passed between processes.
+        return BFFReaderError, (self.file_name, self.line_no, self.message)
+
 
 def read_bff(fname):
     """
@@ -38,7 +46,6 @@ def read_bff(fname):
 
     """
 
-    board_grid, available_blocks, laser_sources, target_points = [], [], [], []
     board_name = os.path.splitext(os.path.basename(fname))[0]
 
     try:
@@ -47,6 +54,22 @@ def read_bff(fname):
     except FileNotFoundError:
         raise BFFReaderError(fname, message='File not found.')
 
+    return _parse_bff(bff_file, fname, board_name)
+
+
+def parse_bff(bff_text, name='board'):
+    """
+    Load Lazors board data from the content of a BFF file, e.g. received from a socket.
+
+    *name* is used as the board name, and as the file name in BFFReaderError.
+    """
+
+    return _parse_bff(bff_text, name, name)
+
+
+def _parse_bff(bff_file, fname, board_name):
+    board_grid, available_blocks, laser_sources, target_points, placed_blocks = [], [], [], [], []
+
     grid_switch = False
     grid_width = None
     for line_no, line in enumerate(bff_file.splitlines(), start=1):
@@ -95,6 +118,15 @@ def read_bff(fname):
             except (KeyError, ValueError, IndexError) as e:
                 raise BFFReaderError(fname, line_no, str(e))
             target_points.append(tuple([x, y]))
+        elif line.split(' ')[0] == 'S':
+            try:
+                block_type = unfix_block(bff_block_map[line.split(' ')[1]])
+                x, y = list(map(int, line.split(' ')[2:]))
+            except (KeyError, ValueError, IndexError):
+                raise BFFReaderError(fname, line_no, 'Error syntax for placed block')
+            if any((x, y) == b[1:3] for b in placed_blocks):
+                raise BFFReaderError(fname, line_no, 'Block already placed at (%d, %d)' % (x, y))
+            placed_blocks.append(tuple([block_type, x, y, line_no]))
         else:
             raise BFFReaderError(fname, line_no, 'Unknown syntax: ' + line)
 
@@ -126,18 +158,42 @@ def read_bff(fname):
             board.add_target(x, y)
         except AssertionError as e:
             raise BFFReaderError(fname, message='Error point formats: ' + str(e))
+
+    if placed_blocks:
+        for block_type, x, y, line_no in placed_blocks:
+            if not (0 <= x < width and 0 <= y < height) or board.get_block(x, y).is_fixed():
+                raise BFFReaderError(fname, line_no, 'Block can not be placed at (%d, %d)' % (x, y))
+            board.mod_block(x, y, block_type)
+        if sorted(b[0] for b in placed_blocks) != sorted(board.get_available_blocks()):
+            raise BFFReaderError(fname, message='Placed blocks mismatch available blocks')
+        from pylazors._solver import _trace_lasers
+        board.load_laser_segments(_trace_lasers(board.get_blocks(), board.get_laser_sources()))
     return board
 
 
-def write_bff(board, fname):
-    """ Save *board* (a pylazors.Board object) as a BFF file """
+def write_bff(board, fname, with_solution=False):
+    """
+    Save *board* (a pylazors.Board object) as a BFF file
+
+    If *with_solution* is True, movable blocks placed on *board* (e.g. a solution board returned by
+    pylazors.solve_board()) are also recorded, as lines of "S <block> <x> <y>". pylazors.read_bff()
+    will place them back on the board when reading such a file.
+    """
 
-    board = board.copy(with_laser_segs=False)
+    placed_blocks = []
+    if with_solution:
+        for y in range(board.height):
+            for x in range(board.width):
+                block = board.get_block(x, y)
+                if block != Block.BLANK and not block.is_fixed():
+                    placed_blocks.append((block, x, y))
+
+    board = board.copy(with_laser_segments=False)
     board.clean_board()
     blocks = board.get_blocks()
     available_blocks = board.get_available_blocks()
-    lasers = board.get_lasers()
-    points = board.get_points()
+    lasers = board.get_laser_sources()
+    points = board.get_targets()
 
     if not fname.endswith('.bff'):
         fname += '.bff'
@@ -148,7 +204,7 @@ def write_bff(board, fname):
             f.write(' '.join([block_bff_map[b] for b in blocks[y]]) + '\n')
         f.write('GRID STOP\n\n')
 
-        for block in set(available_blocks):
+        for block in sorted(set(available_blocks), key=available_blocks.index):
             f.write('%s %d\n' % (block_bff_map[fix_block(block)], available_blocks.count(block)))
         f.write('\n')
         for x, y, vx, vy in lasers:
@@ -156,3 +212,88 @@ def write_bff(board, fname):
         f.write('\n')
         for x, y in points:
             f.write('P %d %d\n' % (x, y))
+        if placed_blocks:
+            f.write('\n# Solution: placed movable blocks\n')
+            for block, x, y in placed_blocks:
+                f.write('S %s %d %d\n' % (block_bff_map[fix_block(block)], x, y))
+
+
+def _expand_bff_paths(paths_or_globs):
+    """ Expand a path, directory or glob pattern (or a list of them) into a list of BFF file names """
+
+    if isinstance(paths_or_globs, str):
+        paths_or_globs = [paths_or_globs]
+    fnames = []
+    for path in paths_or_globs:
+        if os.path.isdir(path):
+            fnames += sorted(glob.glob(os.path.join(path, '*.bff')))
+        elif glob.has_magic(path):
+            fnames += sorted(glob.glob(path))
+        else:
+            fnames.append(path)
+    return fnames
+
+
+def _read_bff_or_error(fname):
+    """ Return (board, None) if *fname* can be read, otherwise (None, error). """
+
+    try:
+        return read_bff(fname), None
+    except BFFReaderError as e:
+        return None, e
+
+
+def iter_bff(paths_or_globs, workers=4, use_processes=False, errors=None):
+    """
+    Read many BFF files in parallel, and yield boards as soon as they are parsed.
+
+    **Parameters**
+
+        paths_or_globs: *str or list, str*
+            BFF file names, directories (all .bff files inside will be read) or glob patterns.
+
+        workers: *int, optional*
+            number of parallel readers. if 0 or 1, files are read one by one in the calling thread.
+
+        use_processes: *bool, optional*
+            use a process pool instead of a thread pool.
+
+        errors: *list, optional*
+            if given, a pylazors.BFFReaderError for every file that fails to parse is appended to it,
+            with *file_name*, *line_no* and *message* attributes. Otherwise, the first error is raised.
+
+    **Yields**
+
+        board: *pylazors.Board object*
+            boards in the order they are parsed, which may differ from the order of the input files.
+    """
+
+    fnames = _expand_bff_paths(paths_or_globs)
+
+    def handle(result):
+        board, error = result
+        if error is not None:
+            if errors is None:
+                raise error
+            errors.append(error)
+        return board
+
+    if workers <= 1:
+        for fname in fnames:
+            board = handle(_read_bff_or_error(fname))
+            if board is not None:
+                yield board
+        return
+
+    executor_class = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+    with executor_class(workers) as executor:
+        # Only keep a bounded number of files in flight, so that a huge corpus is not read up front.
+        pending_fnames, running = deque(fnames), set()
+        while pending_fnames or running:
+            while pending_fnames and len(running) < workers * 4:
+                running.add(executor.submit(_read_bff_or_error, pending_fnames.popleft()))
+            done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                board = handle(future.result())
+                if board is not None:
+                    yield board
@@ -0,0 +1,270 @@
+"""
+Packed binary format for storing a large number of boards in one file (".lzc").
+
+Layout of a corpus file (all integers are little-endian):
+
+    header      magic b'LZBC', version (u16), reserved (u16), number of boards N (u32),
+                offset of the index (u64)
+    records     one record per board, see below
+    index       N entries of: record offset (u64), record length (u32), name offset (u32), name length (u16)
+    name order  N x u32, positions in the index sorted by board name (for lookup by name)
+    names       UTF-8 encoded board names, concatenated
+
+A board record is:
+
+    width, height, # of lasers, # of targets, # of OPAQUE, REFLECT and REFRACT available blocks (7 x u8)
+    width * height bytes of blocks, row by row, each is the value of a <Block>
+    lasers as (x, y, vx, vy) in (u16, u16, i8, i8)
+    targets as (x, y) in (u16, u16)
+
+Reading one board only touches its index entry and record, so loading a board from a corpus is O(1) by
+index (O(log N) by name) no matter how large the corpus is.
+"""
+
+from pylazors.board import Board
+from pylazors.block import Block
+from bisect import bisect_left
+import glob
+import mmap
+import os
+import struct
+
+
+_MAGIC = b'LZBC'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHIQ')
+_INDEX_ENTRY = struct.Struct('<QIIH')
+_NAME_ORDER = struct.Struct('<I')
+_RECORD_HEAD = struct.Struct('<7B')
+_LASER = struct.Struct('<HHbb')
+_TARGET = struct.Struct('<HH')
+
+_blocks_by_value = {int(b): b for b in Block}
+
+
+class CorpusError(Exception):
+    def __init__(self, file_name, message=''):
+        msg = 'Error in %s' % file_name
+        if message:
+            msg += ': %s' % message
+        super().__init__(msg)
+
+
+def _encode_board(board):
+    """ Return the binary record of *board* """
+
+    blocks = board.get_blocks()
+    available_blocks = board.get_available_blocks()
+    lasers = board.get_laser_sources()
+    targets = board.get_targets()
+    counts = [available_blocks.count(b) for b in (Block.OPAQUE, Block.REFLECT, Block.REFRACT)]
+    if max([board.width, board.height, len(lasers), len(targets)] + counts) > 255:
+        raise ValueError('%s is too large to be stored in a corpus' % str(board))
+
+    record = [_RECORD_HEAD.pack(board.width, board.height, len(lasers), len(targets), *counts),
+              bytes([int(b) for row in blocks for b in row])]
+    record += [_LASER.pack(*l) for l in lasers]
+    record += [_TARGET.pack(*p) for p in targets]
+    return b''.join(record)
+
+
+def write_corpus(boards, fname):
+    """
+    Write boards into a corpus file.
+
+    **Parameters**
+
+        boards: *iterable, pylazors.Board*
+            Boards to be written. Board names should be unique inside one corpus.
+
+        fname: *str*
+            file name of the destined corpus file.
+
+    **Returns**
+
+        count: *int*
+            number of boards written.
+    """
+
+    if not fname.endswith('.lzc'):
+        fname += '.lzc'
+
+    index, names = [], []
+    name_pool_size = 0
+    with open(fname, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, 0, 0))
+        offset = _HEADER.size
+        for board in boards:
+            record = _encode_board(board)
+            name = board.name.encode('utf-8')
+            f.write(record)
+            index.append((offset, len(record), name_pool_size, len(name)))
+            names.append(name)
+            offset += len(record)
+            name_pool_size += len(name)
+
+        name_order = sorted(range(len(names)), key=lambda i: names[i])
+        f.write(b''.join([_INDEX_ENTRY.pack(*entry) for entry in index]))
+        f.write(b''.join([_NAME_ORDER.pack(i) for i in name_order]))
+        f.write(b''.join(names))
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(index), offset))
+
+    return len(index)
+
+
+def bff_dir_to_corpus(dir_name, fname):
+    """
+    Convert all BFF files inside *dir_name* into one corpus file.
+
+    Files that can not be parsed are skipped.
+
+    **Returns**
+
+        count, skipped: *int, list*
+            number of boards written and a list of pylazors.BFFReaderError for skipped files.
+    """
+
+    from pylazors.formats.bff import read_bff, BFFReaderError
+
+    skipped = []
+
+    def iter_boards():
+        for bff_file in sorted(glob.glob(os.path.join(dir_name, '*.bff'))):
+            try:
+                yield read_bff(bff_file)
+            except BFFReaderError as e:
+                skipped.append(e)
+
+    return write_corpus(iter_boards(), fname), skipped
+
+
+class _SortedNames:
+    """ Sequence view of board names in sorted order, used for bisecting without decoding all names. """
+
+    def __init__(self, corpus):
+        self._corpus = corpus
+
+    def __len__(self):
+        return len(self._corpus)
+
+    def __getitem__(self, i):
+        return self._corpus._name_bytes(self._corpus._sorted_position(i))
+
+
+class Corpus:
+    """
+    Reader of a corpus file.
+
+    The file is memory-mapped, and boards are only decoded when requested, either by index
+    (`corpus[0]`) or by name (`corpus['mad_1']`).
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        try:
+            with open(fname, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise CorpusError(fname, 'File not found.')
+        except ValueError:
+            raise CorpusError(fname, 'Empty file.')
+
+        if len(self._mm) < _HEADER.size:
+            raise CorpusError(fname, 'File too short.')
+        magic, version, _, self._count, self._index_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise CorpusError(fname, 'Not a corpus file.')
+        if version != _VERSION:
+            raise CorpusError(fname, 'Unsupported version %d' % version)
+        self._order_offset = self._index_offset + self._count * _INDEX_ENTRY.size
+        self._names_offset = self._order_offset + self._count * _NAME_ORDER.size
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, key):
+        """ Return the board at index *key*, or the board named *key* """
+
+        if isinstance(key, str):
+            return self._decode(self.index_of(key))
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError('corpus index out of range')
+        return self._decode(key)
+
+    def __contains__(self, name):
+        try:
+            self.index_of(name)
+        except KeyError:
+            return False
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+
+    def _sorted_position(self, i):
+        return _NAME_ORDER.unpack_from(self._mm, self._order_offset + i * _NAME_ORDER.size)[0]
+
+    def _name_bytes(self, i):
+        _, _, name_offset, name_length = _INDEX_ENTRY.unpack_from(self._mm, self._index_offset + i * _INDEX_ENTRY.size)
+        start = self._names_offset + name_offset
+        return self._mm[start:start + name_length]
+
+    def name(self, i):
+        """ Return the name of the board at index *i* """
+
+        return self._name_bytes(i).decode('utf-8')
+
+    def names(self):
+        """ Return names of all boards, in storing order """
+
+        return [self.name(i) for i in range(self._count)]
+
+    def index_of(self, name):
+        """ Return the index of board named *name* """
+
+        name_bytes = name.encode('utf-8')
+        sorted_names = _SortedNames(self)
+        i = bisect_left(sorted_names, name_bytes)
+        if i == self._count or sorted_names[i] != name_bytes:
+            raise KeyError(name)
+        return self._sorted_position(i)
+
+    def _decode(self, i):
+        mm = self._mm
+        offset, _, _, _ = _INDEX_ENTRY.unpack_from(mm, self._index_offset + i * _INDEX_ENTRY.size)
+        width, height, n_lasers, n_targets, n_opaque, n_reflect, n_refract = _RECORD_HEAD.unpack_from(mm, offset)
+        offset += _RECORD_HEAD.size
+        cells = mm[offset:offset + width * height]
+        offset += width * height
+
+        board = Board(self.name(i), width, height)
+        board.load_blocks([[_blocks_by_value[v] for v in cells[y * width:(y + 1) * width]] for y in range(height)])
+        for block, count in ((Block.OPAQUE, n_opaque), (Block.REFLECT, n_reflect), (Block.REFRACT, n_refract)):
+            if count:
+                board.add_available_blocks(block, count)
+        for _ in range(n_lasers):
+            board.add_laser_source(*_LASER.unpack_from(mm, offset))
+            offset += _LASER.size
+        for _ in range(n_targets):
+            board.add_target(*_TARGET.unpack_from(mm, offset))
+            offset += _TARGET.size
+        return board
+
+
+def read_corpus(fname):
+    """ Open a corpus file, return a pylazors.formats.corpus.Corpus object """
+
+    return Corpus(fname)
@@ -0,0 +1,155 @@
+"""
+JSON-lines export of (solved) boards.
+
+Each line of a .jsonl file is one JSON object describing one board:
+
+    {"name": "mad_1", "width": 4, "height": 4,
+     "grid": ["o o o o", ...],                  # rows of the unsolved board, in BFF symbols
+     "available_blocks": {"A": 2, "C": 1},
+     "lasers": [[2, 7, 1, -1]], "targets": [[3, 0], ...],
+     "placements": [["A", 0, 1], ...],          # movable blocks placed on the board, (block, x, y)
+     "laser_segments": [[2, 7, 3, 6], ...],
+     "solved": true,                            # if all targets are on the laser path
+     "stats": {...}}                            # optional solver statistics, and any extra fields
+"""
+
+from pylazors.board import Board
+from pylazors.block import *
+from pylazors.formats.bff import bff_block_map, block_bff_map
+import json
+
+
+def board_to_dict(board, stats=None, **extra):
+    """
+    Return a JSON-serializable dict describing *board*.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        stats: *dict, optional*
+            solver statistics to be included. An object with an as_dict() method is also accepted.
+
+        extra:
+            any other JSON-serializable fields to be included.
+    """
+
+    grid, placements = [], []
+    for y, row in enumerate(board.get_blocks()):
+        for x, block in enumerate(row):
+            if block != Block.BLANK and not block.is_fixed():
+                placements.append([block_bff_map[fix_block(block)], x, y])
+        grid.append(' '.join([block_bff_map[b if b.is_fixed() else Block.BLANK] for b in row]))
+
+    available_blocks = board.get_available_blocks()
+    laser_segments = board.get_laser_segments()
+    points_on_path = set()
+    for s in laser_segments:
+        points_on_path.add((s[0], s[1]))
+        points_on_path.add((s[2], s[3]))
+    targets = board.get_targets()
+
+    record = {
+        'name': board.name,
+        'width': board.width,
+        'height': board.height,
+        'grid': grid,
+        'available_blocks': {block_bff_map[fix_block(b)]: available_blocks.count(b)
+                             for b in sorted(set(available_blocks), key=available_blocks.index)},
+        'lasers': [list(l) for l in board.get_laser_sources()],
+        'targets': [list(p) for p in targets],
+        'placements': placements,
+        'laser_segments': [list(s) for s in laser_segments],
+        'solved': bool(laser_segments) and all(p in points_on_path for p in targets),
+    }
+    if stats is not None:
+        record['stats'] = stats.as_dict() if hasattr(stats, 'as_dict') else stats
+    record.update(extra)
+    return record
+
+
+def board_from_dict(record):
+    """ Build a pylazors.Board object from a dict returned by board_to_dict() """
+
+    board = Board(record['name'], record['width'], record['height'])
+    board.load_blocks([[bff_block_map[b] for b in row.split()] for row in record['grid']])
+    for symbol, count in record['available_blocks'].items():
+        board.add_available_blocks(unfix_block(bff_block_map[symbol]), count)
+    for symbol, x, y in record.get('placements', []):
+        board.mod_block(x, y, unfix_block(bff_block_map[symbol]))
+    for x, y, vx, vy in record['lasers']:
+        board.add_laser_source(x, y, vx, vy)
+    for x, y in record['targets']:
+        board.add_target(x, y)
+    board.load_laser_segments([tuple(s) for s in record.get('laser_segments', [])])
+    return board
+
+
+class JSONLWriter:
+    """
+    Streaming writer of JSON-lines board records.
+
+    Records are serialized when written, but only flushed to the file in batches of *batch_size*
+    lines with a single write call. Use it as a context manager, or call close() when finished.
+
+        with JSONLWriter('solutions.jsonl') as writer:
+            for board in boards:
+                writer.write(pylazors.solve_board(board))
+    """
+
+    def __init__(self, fname, batch_size=256, append=False):
+        self.fname = fname
+        self.batch_size = batch_size
+        self.count = 0
+        self._lines = []
+        self._file = open(fname, 'a' if append else 'w', buffering=1 << 20)
+
+    def write(self, board, stats=None, **extra):
+        """ Write one board, see board_to_dict() for parameters """
+
+        self._lines.append(json.dumps(board_to_dict(board, stats, **extra), separators=(',', ':')))
+        self.count += 1
+        if len(self._lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self._file.write('\n'.join(self._lines) + '\n')
+            self._lines = []
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_jsonl(boards, fname):
+    """
+    Write boards (e.g. solution boards returned by pylazors.solve_board()) into a JSON-lines file.
+
+    **Returns**
+
+        count: *int*
+            number of boards written.
+    """
+
+    with JSONLWriter(fname) as writer:
+        for board in boards:
+            writer.write(board)
+    return writer.count
+
+
+def read_jsonl(fname):
+    """ Yield every record in a JSON-lines file as a dict, use board_from_dict() to get boards """
+
+    with open(fname) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -1,6 +1,7 @@
 from pylazors.block import *
 from PIL import Image, ImageDraw, ImageFont
 import os
+import threading
 import pylazors.formats as pylazors_formats
 
 
@@ -14,25 +15,51 @@ def _load_texture(fname, size=_BLOCK_SIZE):
     return img.convert('RGBA').resize((size, size))
 
 
-_block_textures = {
-    Block.BLANK: _load_texture('blank.png'),
-    Block.OPAQUE: _load_texture('opaque.png'),
-    Block.FIXED_OPAQUE: _load_texture('opaque_fixed.png'),
-    Block.REFLECT: _load_texture('reflect.png'),
-    Block.FIXED_REFLECT: _load_texture('reflect_fixed.png'),
-    Block.REFRACT: _load_texture('refract.png'),
-    Block.FIXED_REFRACT: _load_texture('refract_fixed.png'),
-}
+# Textures are decoded and resized on the first call of write_png(), not at import time.
+_textures = None
+_textures_lock = threading.Lock()
+
+
+def _load_textures():
+    """ Return (block textures, other textures), loaded on the first call. Both are published at once, so a
+    thread never sees one of them loaded and not the other. """
+
+    global _textures
+    textures = _textures
+    if textures is None:
+        with _textures_lock:
+            if _textures is None:
+                block_textures = {
+                    Block.BLANK: _load_texture('blank.png'),
+                    Block.OPAQUE: _load_texture('opaque.png'),
+                    Block.FIXED_OPAQUE: _load_texture('opaque_fixed.png'),
+                    Block.REFLECT: _load_texture('reflect.png'),
+                    Block.FIXED_REFLECT: _load_texture('reflect_fixed.png'),
+                    Block.REFRACT: _load_texture('refract.png'),
+                    Block.FIXED_REFRACT: _load_texture('refract_fixed.png'),
+                }
+                other_textures = {
+                    'laser': _load_texture('laser.png', size=_BLOCK_SIZE // 5 * 3),
+                    'target': _load_texture('target.png', size=_BLOCK_SIZE // 5 * 4),
+                    'target_hit': _load_texture('target_hit.png', size=_BLOCK_SIZE // 5 * 4),
+                }
+                _textures = block_textures, other_textures
+            textures = _textures
+    return textures
 
-_other_textures = {
-    'laser': _load_texture('laser.png', size=_BLOCK_SIZE // 5 * 3),
-    'target': _load_texture('target.png', size=_BLOCK_SIZE // 5 * 4),
-    'target_hit': _load_texture('target_hit.png', size=_BLOCK_SIZE // 5 * 4),
-}
 
 _font_file = os.path.join(_FONT_DIR, 'SourceCodeVariable-Roman.ttf')
 
 
+def _text_size(draw, text, font):
+    """ Return (width, height) of *text*. ImageDraw.textsize() was removed in Pillow 10. """
+
+    if hasattr(draw, 'textbbox'):
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        return right - left, bottom - top
+    return draw.textsize(text, font=font)
+
+
 def write_png(board, fname, note=None):
     """
     Write a solution *board* as a PNG image.
@@ -58,6 +85,8 @@ def write_png(board, fname, note=None):
     if not fname.endswith('.png'):
         fname += '.png'
 
+    block_textures, other_textures = _load_textures()
+
     margin = _BLOCK_SIZE
     width, height = board.width, board.height
     img_size = margin * 2 + width * _BLOCK_SIZE, margin * 2 + height * _BLOCK_SIZE
@@ -65,13 +94,13 @@ def write_png(board, fname, note=None):
     draw = ImageDraw.Draw(img)
     font = ImageFont.truetype(_font_file, _BLOCK_SIZE // 3)
 
-    text_size = draw.textsize(board.name, font=font)
+    text_size = _text_size(draw, board.name, font)
     test_pos = (img_size[0] - text_size[0]) / 2, (margin - text_size[1]) / 2
     draw.text(test_pos, board.name, fill=(0, 0, 0), font=font)
 
     if note:
         note_font = ImageFont.truetype(_font_file, _BLOCK_SIZE // 4)
-        note_size = draw.textsize(note, font=note_font)
+        note_size = _text_size(draw, note, note_font)
         note_pos = (img_size[0] - note_size[0]) / 2, margin + _BLOCK_SIZE * height + (margin - note_size[1]) / 2
         draw.text(note_pos, note, fill=(0, 0, 0), font=note_font)
 
@@ -81,8 +110,8 @@ def write_png(board, fname, note=None):
     for y in range(height):
         for x in range(width):
             block = board.get_block(x, y)
-            if block in _block_textures and block.is_transparent():
-                texture = _block_textures[block]
+            if block in block_textures and block.is_transparent():
+                texture = block_textures[block]
                 img.paste(texture, (x * _BLOCK_SIZE + margin, y * _BLOCK_SIZE + margin,
                             x * _BLOCK_SIZE + margin + _BLOCK_SIZE, y * _BLOCK_SIZE + margin + _BLOCK_SIZE),
                           mask=texture)
@@ -92,7 +121,7 @@ def write_png(board, fname, note=None):
                    x1 * _BLOCK_SIZE // 2 + margin, y1 * _BLOCK_SIZE // 2 + margin],
                   fill=(255, 0, 0, 128), width=max(_BLOCK_SIZE//32, 1))
 
-    texture = _other_textures['laser']
+    texture = other_textures['laser']
     texture_size = _BLOCK_SIZE // 5 * 3
     d_size = texture_size // 2, texture_size - texture_size // 2
     for x, y, _, _ in board.get_laser_sources():
@@ -109,9 +138,9 @@ def write_png(board, fname, note=None):
     d_size = texture_size // 2, texture_size - texture_size // 2
     for x, y, in board.get_targets():
         if (x, y) in all_points_on_path:
-            texture = _other_textures['target_hit']
+            texture = other_textures['target_hit']
         else:
-            texture = _other_textures['target']
+            texture = other_textures['target']
         img.paste(texture, [int(x / 2 * _BLOCK_SIZE) - d_size[0] + margin,
                             int(y / 2 * _BLOCK_SIZE) - d_size[0] + margin,
                             int(x / 2 * _BLOCK_SIZE) + d_size[1] + margin,
@@ -120,8 +149,8 @@ def write_png(board, fname, note=None):
     for y in range(height):
         for x in range(width):
             block = board.get_block(x, y)
-            if block in _block_textures and not block.is_transparent():
-                texture = _block_textures[block]
+            if block in block_textures and not block.is_transparent():
+                texture = block_textures[block]
                 img.paste(texture, (x * _BLOCK_SIZE + margin, y * _BLOCK_SIZE + margin,
                             x * _BLOCK_SIZE + margin + _BLOCK_SIZE, y * _BLOCK_SIZE + margin + _BLOCK_SIZE),
                           mask=texture)
@@ -0,0 +1,133 @@
+from pylazors.block import *
+from xml.sax.saxutils import escape
+import base64
+import os
+import pylazors.formats as pylazors_formats
+
+
+# Same layout constants as png.py, so that both writers produce identical drawings.
+_BLOCK_SIZE = 256
+_TEXTURE_DIR = os.path.join(os.path.dirname(pylazors_formats.__file__), 'textures')
+
+_block_texture_files = {
+    Block.BLANK: 'blank.png',
+    Block.OPAQUE: 'opaque.png',
+    Block.FIXED_OPAQUE: 'opaque_fixed.png',
+    Block.REFLECT: 'reflect.png',
+    Block.FIXED_REFLECT: 'reflect_fixed.png',
+    Block.REFRACT: 'refract.png',
+    Block.FIXED_REFRACT: 'refract_fixed.png',
+}
+
+# Base64 encoded texture files, read on first use.
+_texture_data = {}
+
+
+def _texture_id(fname):
+    return 'tex_' + os.path.splitext(fname)[0]
+
+
+def _texture_symbol(fname):
+    """ Return a <symbol> element embedding texture *fname* as a 1x1 image. """
+
+    if fname not in _texture_data:
+        with open(os.path.join(_TEXTURE_DIR, fname), 'rb') as f:
+            _texture_data[fname] = base64.b64encode(f.read()).decode('ascii')
+    return ('<symbol id="%s" viewBox="0 0 1 1" preserveAspectRatio="none">'
+            '<image width="1" height="1" preserveAspectRatio="none" href="data:image/png;base64,%s"/>'
+            '</symbol>' % (_texture_id(fname), _texture_data[fname]))
+
+
+def _use(fname, x, y, size):
+    return '<use href="#%s" x="%d" y="%d" width="%d" height="%d"/>' % (_texture_id(fname), x, y, size, size)
+
+
+def write_svg(board, fname, note=None):
+    """
+    Write a solution *board* as a SVG image.
+
+    The drawing has the same layout as the one from pylazors.write_png(), but is built as plain text
+    without PIL, and every texture is embedded only once.
+
+    **Parameters**
+
+        board: *pylazors.board.Board*
+            The board to be exported.
+            Note: this should be a solution board returned by pylazors.solve_board()
+
+        fname: *str*
+            file name of the destined SVG file.
+
+        note: *str, optional*
+            If given, will be added at the bottom of the image.
+
+    **Returns**
+
+        None
+
+    """
+
+    if not fname.endswith('.svg'):
+        fname += '.svg'
+
+    margin = _BLOCK_SIZE
+    width, height = board.width, board.height
+    img_size = margin * 2 + width * _BLOCK_SIZE, margin * 2 + height * _BLOCK_SIZE
+    blocks = board.get_blocks()
+    laser_segments = board.get_laser_segments()
+
+    used_textures = set()
+    body = ['<rect width="%d" height="%d" fill="rgb(255,255,255)"/>' % img_size,
+            '<text x="%d" y="%d" font-size="%d" text-anchor="middle" dominant-baseline="central">%s</text>' % (
+                img_size[0] // 2, margin // 2, _BLOCK_SIZE // 3, escape(board.name))]
+    if note:
+        body.append('<text x="%d" y="%d" font-size="%d" text-anchor="middle" dominant-baseline="central">%s</text>' % (
+            img_size[0] // 2, margin + _BLOCK_SIZE * height + margin // 2, _BLOCK_SIZE // 4, escape(note)))
+    body.append('<rect x="%d" y="%d" width="%d" height="%d" fill="rgb(200,200,200)"/>' % (
+        margin, margin, width * _BLOCK_SIZE, height * _BLOCK_SIZE))
+
+    def draw_blocks(transparent):
+        for y in range(height):
+            for x in range(width):
+                block = blocks[y][x]
+                if block in _block_texture_files and block.is_transparent() == transparent:
+                    texture = _block_texture_files[block]
+                    used_textures.add(texture)
+                    body.append(_use(texture, x * _BLOCK_SIZE + margin, y * _BLOCK_SIZE + margin, _BLOCK_SIZE))
+
+    draw_blocks(transparent=True)
+
+    if laser_segments:
+        body.append('<g stroke="rgb(255,0,0)" stroke-width="%d">' % max(_BLOCK_SIZE // 32, 1))
+        for x0, y0, x1, y1 in laser_segments:
+            body.append('<line x1="%d" y1="%d" x2="%d" y2="%d"/>' % (
+                x0 * _BLOCK_SIZE // 2 + margin, y0 * _BLOCK_SIZE // 2 + margin,
+                x1 * _BLOCK_SIZE // 2 + margin, y1 * _BLOCK_SIZE // 2 + margin))
+        body.append('</g>')
+
+    texture_size = _BLOCK_SIZE // 5 * 3
+    for x, y, _, _ in board.get_laser_sources():
+        used_textures.add('laser.png')
+        body.append(_use('laser.png', int(x / 2 * _BLOCK_SIZE) - texture_size // 2 + margin,
+                         int(y / 2 * _BLOCK_SIZE) - texture_size // 2 + margin, texture_size))
+
+    all_points_on_path = set()
+    for s in laser_segments:
+        all_points_on_path.add((s[0], s[1]))
+        all_points_on_path.add((s[2], s[3]))
+    texture_size = _BLOCK_SIZE // 5 * 4
+    for x, y in board.get_targets():
+        texture = 'target_hit.png' if (x, y) in all_points_on_path else 'target.png'
+        used_textures.add(texture)
+        body.append(_use(texture, int(x / 2 * _BLOCK_SIZE) - texture_size // 2 + margin,
+                         int(y / 2 * _BLOCK_SIZE) - texture_size // 2 + margin, texture_size))
+
+    draw_blocks(transparent=False)
+
+    # Output is half of the drawing size, same as the down-scaling in write_png().
+    svg = ['<svg xmlns="http://www.w3.org/2000/svg" width="%d" height="%d" viewBox="0 0 %d %d" '
+           'font-family="Source Code Pro, monospace">' % (img_size[0] // 2, img_size[1] // 2, img_size[0], img_size[1]),
+           '<defs>'] + [_texture_symbol(t) for t in sorted(used_textures)] + ['</defs>'] + body + ['</svg>\n']
+
+    with open(fname, 'w') as f:
+        f.write('\n'.join(svg))
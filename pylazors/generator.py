@@ -0,0 +1,165 @@
+"""
+This file contains a generator of random, solvable Lazors boards, used to build benchmark corpora of any size.
+
+Every board is built backwards from a hidden solution: fixed and movable blocks and laser sources are placed
+at random, the lasers are traced with _trace_lasers(), and targets are picked on the resulting laser path.
+The movable blocks are then removed from the grid and listed as available blocks, so every generated board
+is solvable by construction. The same seed and parameters always give the same boards.
+"""
+
+from pylazors.board import Board
+from pylazors.block import Block
+from pylazors._solver import _trace_lasers
+import os
+import random
+
+
+_fixed_block_types = (Block.FIXED_OPAQUE, Block.FIXED_REFLECT, Block.FIXED_REFRACT)
+
+
+def _random_laser_source(rng, width, height):
+    """ Return a random laser source (x, y, vx, vy) on the border of the board, pointing inward """
+
+    side = rng.randrange(4)
+    if side < 2:
+        x, y = (0, 2 * rng.randrange(height) + 1) if side == 0 else (2 * width, 2 * rng.randrange(height) + 1)
+        vx, vy = (1 if side == 0 else -1), rng.choice((-1, 1))
+    else:
+        x, y = (2 * rng.randrange(width) + 1, 0) if side == 2 else (2 * rng.randrange(width) + 1, 2 * height)
+        vx, vy = rng.choice((-1, 1)), (1 if side == 2 else -1)
+    return x, y, vx, vy
+
+
+def _points_on_path(laser_segments):
+    points = set()
+    for x0, y0, x1, y1 in laser_segments:
+        points.add((x0, y0))
+        points.add((x1, y1))
+    return points
+
+
+def generate_board(width, height, seed=None, num_opaque=1, num_reflect=3, num_refract=1, num_fixed=2,
+                   num_fixed_blank=0, num_lasers=1, num_targets=3, name=None, return_solution=False, max_tries=1000):
+    """
+    Generate a random solvable board.
+
+    **Parameters**
+
+        width, height: *int*
+            size of the board, in blocks.
+
+        seed: *int or random.Random object, optional*
+            random seed, the same seed and parameters always give the same board.
+
+        num_opaque, num_reflect, num_refract: *int, optional*
+            number of available (movable) blocks of each type.
+
+        num_fixed: *int, optional*
+            number of fixed opaque/reflect/refract blocks.
+
+        num_fixed_blank: *int, optional*
+            number of locations where no block is allowed ("x" in BFF files).
+
+        num_lasers, num_targets: *int, optional*
+            number of laser sources and target points.
+
+        name: *str, optional*
+            board name, defaults to "gen_<width>x<height>_<seed>".
+
+        return_solution: *bool, optional*
+            if True, also return the hidden solution board.
+
+        max_tries: *int, optional*
+            number of random layouts to try before giving up.
+
+    **Returns**
+
+        board: *pylazors.Board object*
+            an unsolved board.
+
+        solution_board: *pylazors.Board object*
+            only if *return_solution* is True.
+    """
+
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    num_movable = num_opaque + num_reflect + num_refract
+    if num_fixed + num_fixed_blank + num_movable > width * height:
+        raise ValueError('Too many blocks for a %dx%d board' % (width, height))
+    if name is None:
+        name = 'gen_%dx%d_%s' % (width, height, seed if isinstance(seed, int) else rng.randrange(1 << 30))
+
+    for _ in range(max_tries):
+        cells = [(x, y) for y in range(height) for x in range(width)]
+        rng.shuffle(cells)
+        blocks = [[Block.BLANK] * width for _ in range(height)]
+        movable = [Block.OPAQUE] * num_opaque + [Block.REFLECT] * num_reflect + [Block.REFRACT] * num_refract
+        for x, y in cells[:num_fixed]:
+            blocks[y][x] = rng.choice(_fixed_block_types)
+        for x, y in cells[num_fixed:num_fixed + num_fixed_blank]:
+            blocks[y][x] = Block.FIXED_BLANK
+        unsolved_blocks = [list(row) for row in blocks]
+        for (x, y), block in zip(cells[num_fixed + num_fixed_blank:], movable):
+            blocks[y][x] = block
+
+        laser_sources = list(dict.fromkeys(_random_laser_source(rng, width, height) for _ in range(num_lasers)))
+        laser_segments = _trace_lasers(blocks, laser_sources)
+        source_points = {l[:2] for l in laser_sources}
+        candidates = sorted(_points_on_path(laser_segments) - source_points)
+        if len(laser_sources) < num_lasers or len(candidates) < num_targets:
+            continue
+        targets = rng.sample(candidates, num_targets)
+
+        # Skip trivial boards, which are solved without placing any movable block.
+        if num_movable and set(targets) <= _points_on_path(_trace_lasers(unsolved_blocks, laser_sources)):
+            continue
+
+        board = Board(name, width, height)
+        board.load_blocks(unsolved_blocks)
+        for block in (Block.OPAQUE, Block.REFLECT, Block.REFRACT):
+            if movable.count(block):
+                board.add_available_blocks(block, movable.count(block))
+        for x, y, vx, vy in laser_sources:
+            board.add_laser_source(x, y, vx, vy)
+        for x, y in targets:
+            board.add_target(x, y)
+
+        if return_solution:
+            solution_board = board.copy()
+            solution_board.load_blocks(blocks)
+            solution_board.load_laser_segments(laser_segments)
+            return board, solution_board
+        return board
+
+    raise ValueError('Can not generate a board with given parameters after %d tries' % max_tries)
+
+
+def generate_boards(count, width, height, seed=0, **kwargs):
+    """ Generate *count* boards, see generate_board() for parameters. Board i uses seed *seed* + i. """
+
+    for i in range(count):
+        yield generate_board(width, height, seed=seed + i, **kwargs)
+
+
+def generate_corpus(out, count, width, height, seed=0, **kwargs):
+    """
+    Generate *count* boards and write them as BFF files into directory *out*, or into a corpus file if *out*
+    ends with ".lzc". See generate_board() for other parameters.
+
+    **Returns**
+
+        count: *int*
+            number of boards written.
+    """
+
+    boards = generate_boards(count, width, height, seed, **kwargs)
+    if out.endswith('.lzc'):
+        from pylazors.formats.corpus import write_corpus
+        return write_corpus(boards, out)
+
+    from pylazors.formats.bff import write_bff
+    os.makedirs(out, exist_ok=True)
+    written = 0
+    for board in boards:
+        write_bff(board, os.path.join(out, board.name + '.bff'))
+        written += 1
+    return written
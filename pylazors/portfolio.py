@@ -0,0 +1,271 @@
+"""
+This file contains the portfolio solver, used by pylazors.solve_board(board, strategy='portfolio').
+
+No single solving strategy wins on every board. The portfolio races several *members* (strategies, some with
+different random seeds) in separate processes, returns the first solution found, and terminates the others.
+
+Members are named "<strategy>" or "<strategy>:<seed>", for example:
+
+    large           _solve_large_board(), exhaustive
+    compiled        _solve_compiled_board(), exhaustive on compiled tables
+    anytime:0       _solve_anytime() with seed 0, best-first
+    sat             _solve_sat(), SAT encoding and CDCL search
+    small:0         _solve_board() (small boards only), random order with seed 0
+
+A member of an exhaustive strategy finishing without a solution proves that the board has none, and ends the race.
+At least one such *complete* member always races: 'compiled' is added if no given member is complete.
+
+The winner of every board is counted in *wins*, and appended to a JSON-lines file if the environment variable
+PYLAZORS_PORTFOLIO_LOG is set to its path. Wins in that file are loaded when the portfolio is first used, so the
+history is kept between runs. When there are more members than processes, members with more wins go first, and
+the last process takes turns among the others, or goes to a complete member if none is among the first ones.
+
+With backend='threads', members race in threads of the calling process instead, which saves starting processes
+and sending boards and results between them. Each member has its own search state. Once the race is over, the
+progress callback of every losing member raises (within a thousand candidates, or a thousand conflicts for 'sat'),
+and losers are not waited for. The random order of 'small' members uses the global random generator, so they are
+left out. Threads only run in parallel on a free-threaded Python build without the GIL, so elsewhere the process
+backend is used instead.
+"""
+
+from pylazors.stats import SolveStats
+from pylazors.utils import gil_enabled
+from collections import Counter
+import json
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+
+
+PORTFOLIO_LOG_ENV = 'PYLAZORS_PORTFOLIO_LOG'
+
+# Members of the exhaustive strategies, which return None only if the board has no solution.
+_complete_strategies = ('large', 'compiled', 'anytime', 'sat')
+
+wins = Counter()
+_wins_loaded = False
+
+
+def default_members(board):
+    """ Return names of portfolio members for *board*, in the default order """
+
+    members = ['sat', 'anytime:0', 'compiled', 'anytime:1', 'large']
+    if board.width * board.height < 15:
+        members.append('small:0')
+    return members
+
+
+def load_wins(fname):
+    """ Return a Counter of winners in a portfolio log file """
+
+    counter = Counter()
+    with open(fname) as f:
+        for line in f:
+            if line.strip():
+                counter[json.loads(line)['winner']] += 1
+    return counter
+
+
+def _load_wins_once():
+    global _wins_loaded
+    if not _wins_loaded:
+        _wins_loaded = True
+        fname = os.environ.get(PORTFOLIO_LOG_ENV)
+        if fname and os.path.exists(fname):
+            wins.update(load_wins(fname))
+
+
+def _proves_no_solution(member):
+    """ Return True if *member* finishing without a solution proves that the board has none """
+
+    return member.partition(':')[0] in _complete_strategies
+
+
+def _record_win(board, member, time_used):
+    wins[member] += 1
+    fname = os.environ.get(PORTFOLIO_LOG_ENV)
+    if fname:
+        with open(fname, 'a') as f:
+            f.write(json.dumps({'board': board.name, 'width': board.width, 'height': board.height,
+                                'winner': member, 'time': time_used}) + '\n')
+
+
+def _solve_member(member, board, stats=None, progress=None):
+    """ Solve *board* with portfolio member *member*, return the solution board or None """
+
+    from pylazors.solver import _solve_board
+    from pylazors._solver import _solve_large_board, _solve_compiled_board
+    from pylazors._anytime import _solve_anytime
+
+    strategy, _, seed = member.partition(':')
+    seed = int(seed) if seed else None
+    if strategy == 'large':
+        return _solve_large_board(board, print_log=False, stats=stats, progress=progress)
+    if strategy == 'compiled':
+        return _solve_compiled_board(board, print_log=False, stats=stats, progress=progress)
+    if strategy == 'anytime':
+        best_board, targets_hit = _solve_anytime(board, seed=seed, print_log=False, stats=stats, progress=progress)
+        return best_board if targets_hit == len(board.get_targets()) else None
+    if strategy == 'sat':
+        from pylazors.sat import _solve_sat
+        return _solve_sat(board, print_log=False, stats=stats, progress=progress)
+    if strategy == 'small':
+        random.seed(seed)
+        return _solve_board(board, print_log=False, stats=stats, progress=progress)
+    raise ValueError('Unknown portfolio member: %s' % member)
+
+
+def _run_member(member, board, with_stats, results):
+    # Main function of a member process
+    stats = SolveStats() if with_stats else None
+    try:
+        results.put((member, _solve_member(member, board, stats), stats, None))
+    except Exception as e:
+        results.put((member, None, stats, '%s: %s' % (type(e).__name__, e)))
+
+
+def _race_processes(board, members, with_stats):
+    """ Run every member in a process, yield (member, solution, stats, error) as members finish """
+
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    running = {}
+    for member in members:
+        process = context.Process(target=_run_member, args=(member, board, with_stats, results), daemon=True)
+        process.start()
+        running[member] = process
+
+    try:
+        while running:
+            try:
+                member, member_solution, member_stats, error = results.get(timeout=0.1)
+            except queue.Empty:
+                # A member killed from outside never reports, do not wait for it.
+                for member, process in list(running.items()):
+                    if not process.is_alive() and process.exitcode != 0:
+                        del running[member]
+                continue
+            running.pop(member).join()
+            yield member, member_solution, member_stats, error
+    finally:
+        for process in running.values():
+            process.terminate()
+        for process in running.values():
+            process.join()
+        results.close()
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _race_threads(board, members, with_stats):
+    """ Run every member in a thread, yield (member, solution, stats, error) as members finish """
+
+    # Set once the race is over: the progress callback of every member checks it, and stops the member.
+    stop = threading.Event()
+    results = queue.Queue()
+
+    def progress(candidates):
+        if stop.is_set():
+            raise _Stopped
+
+    def run(member):
+        stats = SolveStats() if with_stats else None
+        try:
+            results.put((member, _solve_member(member, board, stats, progress), stats, None))
+        except _Stopped:
+            pass
+        except Exception as e:
+            results.put((member, None, stats, '%s: %s' % (type(e).__name__, e)))
+
+    # Daemon threads, not a ThreadPoolExecutor (whose threads are joined at exit): a loser between two progress
+    # callbacks must not keep the interpreter from exiting.
+    for member in members:
+        threading.Thread(target=run, args=(member,), daemon=True).start()
+    try:
+        for _ in members:
+            yield results.get()
+    finally:
+        # Losing members stop at their next progress callback, they are not waited for.
+        stop.set()
+
+
+def _solve_portfolio(board, print_log=True, stats=None, processes=None, members=None, backend='processes'):
+    """ Solve a Lazors board by racing several strategies in parallel processes.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        stats: *pylazors.stats.SolveStats object, optional*
+            If given, statistics of the winner are collected into it, with strategy "portfolio/<winner>".
+
+        processes: *int, optional*
+            number of members raced at once, defaults to the number of members (at least 2 with 1 CPU).
+
+        members: *list, str*
+            portfolio members, see the top of this file. Defaults to default_members(board).
+
+        backend: *str, optional*
+            'processes' or 'threads', see the top of this file.
+
+    **Returns**
+
+        solution_board: *pylazors.Board object*
+            One possible solution board. if no solution found, will return None.
+    """
+
+    if backend not in ('processes', 'threads'):
+        raise ValueError('Unknown backend: %s' % backend)
+    if backend == 'threads' and gil_enabled():
+        backend = 'processes'
+    _load_wins_once()
+    members = list(members or default_members(board))
+    if backend == 'threads':
+        members = [m for m in members if m.partition(':')[0] != 'small']
+    if not any(_proves_no_solution(m) for m in members):
+        # Only a complete member can tell that a board has no solution from a search giving up, so one always races.
+        members.append('compiled')
+    processes = processes or min(len(members), max(os.cpu_count() or 1, 2))
+    # Members with more wins go first, ties keep the given order. If not all members can be raced, the last
+    # process is given to the others in turn, so that a member losing so far still gets a chance to win.
+    members.sort(key=lambda m: -wins[m])
+    if processes < len(members):
+        rest = members[processes - 1:]
+        members = members[:processes - 1] + [rest[sum(wins.values()) % len(rest)]]
+        if not any(_proves_no_solution(m) for m in members):
+            members[-1] = next(m for m in rest if _proves_no_solution(m))
+
+    start_time = time.perf_counter()
+    race = _race_threads if backend == 'threads' else _race_processes
+    results = race(board, members, stats is not None)
+    solution, winner = None, None
+    try:
+        for member, member_solution, member_stats, error in results:
+            if error is not None:
+                if print_log:
+                    print('[solve_portfolio] %s failed: %s' % (member, error))
+                continue
+            if member_solution is not None or _proves_no_solution(member):
+                # A solution, or an exhaustive search proving there is none.
+                solution, winner = member_solution, member
+                if stats is not None:
+                    stats.merge(member_stats)
+                    # Both count the same board
+                    stats.boards -= member_stats.boards
+                break
+    finally:
+        results.close()
+
+    time_used = time.perf_counter() - start_time
+    if winner is not None:
+        _record_win(board, winner, time_used)
+    if stats is not None:
+        stats.strategy = 'portfolio/%s' % winner
+    if print_log:
+        print('[solve_portfolio] %s won in %.3f s, out of %s' % (winner, time_used, ', '.join(members)))
+    return solution
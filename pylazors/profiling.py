@@ -0,0 +1,146 @@
+"""
+This file contains opt-in profiling hooks for solving boards.
+
+Profiling is enabled by giving a directory to pylazors.solve_board(board, profile='some_dir'), or by setting
+the environment variable PYLAZORS_PROFILE to a directory (which also reaches multiprocessing workers). For
+every solved board, two files are written into that directory:
+
+    <board name>.prof       cProfile output, can be loaded by pstats, snakeviz, etc.
+    <board name>.collapsed  sampled call stacks in "frame;frame;frame count" lines, can be fed
+                            directly to flamegraph.pl or speedscope.
+
+summarize() merges all .prof files of a directory into a top-N table of hottest functions.
+"""
+
+from collections import Counter
+import cProfile
+import glob
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+
+PROFILE_ENV = 'PYLAZORS_PROFILE'
+
+
+def profile_dir(profile=None):
+    """ Return the directory for profiling outputs, from *profile* or the PYLAZORS_PROFILE environment variable """
+
+    return profile or os.environ.get(PROFILE_ENV) or None
+
+
+class _StackSampler(threading.Thread):
+    """ Background thread sampling the call stack of another thread, counted as collapsed stacks. """
+
+    def __init__(self, thread_id, root_frame, interval=0.001):
+        super().__init__(daemon=True)
+        self.thread_id, self.root_frame, self.interval = thread_id, root_frame, interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root_frame:
+                stack.append('%s (%s:%d)' % (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename),
+                                             frame.f_code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop_sampling(self):
+        self._stop_event.set()
+
+    def stop(self):
+        self.stop_sampling()
+        self.join()
+
+
+class profiled:
+    """
+    Context manager profiling the code inside it with cProfile and a stack sampler.
+
+        with profiled('mad_7', 'profiles'):
+            solution = _solve_large_board(board)
+
+    writes profiles/mad_7.prof and profiles/mad_7.collapsed when exiting.
+    """
+
+    def __init__(self, name, out_dir, sample_interval=0.001):
+        self.name, self.out_dir, self.sample_interval = name, out_dir, sample_interval
+        self.prof_file = os.path.join(out_dir, name + '.prof')
+        self.collapsed_file = os.path.join(out_dir, name + '.collapsed')
+
+    def __enter__(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        # Sampled stacks are cut at the frame entering this context.
+        self._sampler = _StackSampler(threading.get_ident(), sys._getframe(1), self.sample_interval)
+        self._profile = cProfile.Profile()
+        self._sampler.start()
+        self._start_time = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._sampler.stop_sampling()
+        self._profile.disable()
+        self.wall_time = time.perf_counter() - self._start_time
+        self._sampler.stop()
+        self._profile.dump_stats(self.prof_file)
+        with open(self.collapsed_file, 'w') as f:
+            for stack, count in sorted(self._sampler.stacks.items()):
+                f.write('%s %d\n' % (stack, count))
+
+    def top(self, n=10):
+        """ Return hottest functions of this run, see top_functions() """
+
+        return top_functions(pstats.Stats(self._profile), n)
+
+
+def top_functions(stats, n=10):
+    """
+    Return the *n* functions with most internal time.
+
+    **Parameters**
+
+        stats: *pstats.Stats object, or str or list, str*
+            profiling statistics, or .prof file name(s) to be loaded.
+
+    **Returns**
+
+        top: *list, tuple*
+            [(function, # of calls, internal time, cumulative time), ...]
+    """
+
+    if not isinstance(stats, pstats.Stats):
+        fnames = [stats] if isinstance(stats, str) else list(stats)
+        stats = pstats.Stats(fnames[0], stream=io.StringIO())
+        for fname in fnames[1:]:
+            stats.add(fname)
+
+    rows = []
+    for (filename, line_no, func_name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if filename == '~':
+            label = func_name
+        else:
+            label = '%s (%s:%d)' % (func_name, os.path.basename(filename), line_no)
+        rows.append((label, ncalls, tottime, cumtime))
+    rows.sort(key=lambda r: r[2], reverse=True)
+    return rows[:n]
+
+
+def summarize(out_dir, n=10):
+    """ Return a printable top-*n* table of hottest functions over all .prof files in *out_dir* """
+
+    prof_files = sorted(glob.glob(os.path.join(out_dir, '*.prof')))
+    if not prof_files:
+        return 'No profile found in %s' % out_dir
+    lines = ['%d profile(s) in %s, top %d functions by internal time:' % (len(prof_files), out_dir, n),
+             '%12s %10s %10s  %s' % ('ncalls', 'tottime', 'cumtime', 'function')]
+    for label, ncalls, tottime, cumtime in top_functions(prof_files, n):
+        lines.append('%12d %10.3f %10.3f  %s' % (ncalls, tottime, cumtime, label))
+    return '\n'.join(lines)
@@ -0,0 +1,323 @@
+"""
+This file contains a SAT (CNF) encoding of boards, and a solver using it.
+
+Variables of the encoding (see BoardCNF):
+
+    cell variables      tr[c], rf[c] for every free cell c: if the block placed on c is transparent / reflective,
+                        so BLANK = (1, 0), OPAQUE = (0, 0), REFLECT = (0, 1), REFRACT = (1, 1).
+    block variables     is_opaque[c], is_reflect[c], is_refract[c], defined from tr[c] and rf[c].
+    beam variables      on[s] for every laser state s (a point and a direction, see pylazors/_compiled.py) which
+                        can be reached at all, if the laser is on it. pass[s] and bounce[s] if the laser goes
+                        through / is reflected by the next block of state s.
+
+and clauses:
+
+    - for every available block type, exactly the available number of cells holds it (sequential counters),
+    - on[s] and transparent next block -> pass[s] -> on[next state], same for reflective blocks and bounce[s],
+    - on[s] -> some pass/bounce leading to s, unless s is a laser source (a laser needs a reason to be on),
+    - every target point is an end of some passing segment.
+
+The support clauses can not rule out a beam cycle supporting itself without a laser source. So a model is checked
+by tracing lasers on its placement, and if any target is not lit, a blocking clause rules out the placement of all
+cells that the real lasers touched, and the search goes on (a lazy, counterexample guided refinement). This keeps
+the encoding small and the answers exact.
+
+The formula can be solved by the pure-Python CDCL solver in pylazors/_cdcl.py, or by python-sat (`pip install
+python-sat`) if installed, or exported as DIMACS for any external SAT solver.
+"""
+
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard, _transparent, _reflective
+from collections import deque
+
+
+def _neg(lit):
+    return (not lit) if isinstance(lit, bool) else -lit
+
+
+class BoardCNF:
+    """
+    CNF encoding of a board, see the top of this file.
+
+    **Attributes**
+
+        num_vars: *int*
+            number of variables.
+        clauses: *list, list, int*
+            clauses, in DIMACS literals.
+        cell_vars: *dict*
+            {cell index: (tr, rf)} variables of free cells.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.compiled = compiled = CompiledBoard(board)
+        self.num_vars = 0
+        self.clauses = []
+        self.cell_vars = {}
+
+        cell_lits = []
+        for c, fixed in enumerate(compiled.fixed):
+            if fixed >= 0:
+                cell_lits.append((_transparent[fixed], _reflective[fixed]))
+            else:
+                self.cell_vars[c] = (self.new_var(), self.new_var())
+                cell_lits.append(self.cell_vars[c])
+
+        # Number of each block type
+        available_blocks = board.get_available_blocks()
+        for block, (tr_value, rf_value) in ((Block.OPAQUE, (False, False)), (Block.REFLECT, (False, True)),
+                                            (Block.REFRACT, (True, True))):
+            is_block = [self._and(tr if tr_value else -tr, rf if rf_value else -rf)
+                        for tr, rf in self.cell_vars.values()]
+            self._exactly(is_block, available_blocks.count(block))
+
+        # Laser states which can be reached if every free cell could be both transparent and reflective
+        next_cell, transmit, reflect = compiled.next_cell, compiled.transmit, compiled.reflect
+        sources = {compiled.state(*l) for l in board.get_laser_sources()}
+        reachable = set(sources)
+        queue = deque(sources)
+        while queue:
+            s = queue.popleft()
+            c = next_cell[s]
+            if c < 0:
+                continue
+            tr, rf = cell_lits[c]
+            for lit, t in ((tr, transmit[s]), (rf, reflect[s])):
+                if lit is not False and t not in reachable:
+                    reachable.add(t)
+                    queue.append(t)
+
+        on = {s: (True if s in sources else self.new_var()) for s in sorted(reachable)}
+        supports = {s: [] for s in on}
+        passing = {}
+        for s in sorted(reachable):
+            c = next_cell[s]
+            if c < 0:
+                continue
+            tr, rf = cell_lits[c]
+            passing[s] = self._and(on[s], tr)
+            bounce = self._and(on[s], rf)
+            for lit, t in ((passing[s], transmit[s]), (bounce, reflect[s])):
+                if lit is not False:
+                    self.add([_neg(lit), on[t]])
+                    supports[t].append(lit)
+        for s, lits in supports.items():
+            if s not in sources:
+                self.add([_neg(on[s])] + lits)
+
+        # Targets
+        ends = {}
+        for s, lit in passing.items():
+            ends.setdefault(s >> 2, []).append(lit)
+            ends.setdefault(transmit[s] >> 2, []).append(lit)
+        for x, y in board.get_targets():
+            self.add(ends.get(compiled.point(x, y), []))
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def add(self, clause):
+        """ Add a clause, literals may also be True or False constants """
+
+        lits = []
+        for lit in clause:
+            if lit is True:
+                return
+            if lit is not False:
+                lits.append(lit)
+        self.clauses.append(lits)
+
+    def _and(self, a, b):
+        """ Return a literal equivalent to a AND b """
+
+        if a is False or b is False:
+            return False
+        if a is True:
+            return b
+        if b is True:
+            return a
+        v = self.new_var()
+        self.clauses += [[-v, a], [-v, b], [v, -a, -b]]
+        return v
+
+    def _or(self, a, b):
+        return _neg(self._and(_neg(a), _neg(b)))
+
+    def _exactly(self, lits, k):
+        """ Add clauses for exactly *k* of *lits* being true, with a sequential counter """
+
+        # count[j] is a literal of "at least j of the literals so far are true", for j up to k + 1
+        count = [True] + [False] * (k + 1)
+        for lit in lits:
+            count = [True] + [self._or(count[j], self._and(lit, count[j - 1])) for j in range(1, k + 2)]
+        self.add([count[k]])
+        self.add([_neg(count[k + 1])])
+
+    def decode(self, model):
+        """ Return the flat list of block values (see CompiledBoard.cells()) of a model, {variable: bool} """
+
+        cells = list(self.compiled.fixed)
+        for c, (tr, rf) in self.cell_vars.items():
+            cells[c] = int(_cell_blocks[model.get(tr, False), model.get(rf, False)])
+        return cells
+
+    def blocking_clause(self, cells, touched):
+        """ Return a clause ruling out the blocks of *cells* on all free cells in *touched* """
+
+        clause = []
+        for c in sorted(touched):
+            if c in self.cell_vars:
+                tr, rf = self.cell_vars[c]
+                clause += [-tr if _transparent[cells[c]] else tr, -rf if _reflective[cells[c]] else rf]
+        return clause
+
+    def to_dimacs(self):
+        """ Return the formula in DIMACS CNF format, with cell variables listed in comments """
+
+        lines = ['c pylazors board %s (%d x %d)' % (self.board.name, self.board.width, self.board.height)]
+        width = self.compiled.width
+        for c, (tr, rf) in sorted(self.cell_vars.items()):
+            lines.append('c cell %d %d transparent %d reflective %d' % (c % width, c // width, tr, rf))
+        lines.append('p cnf %d %d' % (self.num_vars, len(self.clauses)))
+        lines += [' '.join(map(str, clause)) + ' 0' for clause in self.clauses]
+        return '\n'.join(lines) + '\n'
+
+
+_cell_blocks = {(True, False): Block.BLANK, (False, False): Block.OPAQUE, (False, True): Block.REFLECT,
+                (True, True): Block.REFRACT}
+
+
+def encode_board(board):
+    """ Return a BoardCNF object of *board* """
+
+    return BoardCNF(board)
+
+
+def write_dimacs(board, fname):
+    """ Save the CNF encoding of *board* as a DIMACS file """
+
+    with open(fname, 'w') as f:
+        f.write(encode_board(board).to_dimacs())
+
+
+class _PySATBackend:
+    """ Same interface as CDCLSolver, on a solver of the python-sat package """
+
+    def __init__(self, clauses):
+        from pysat.solvers import Solver
+        self._solver = Solver(bootstrap_with=clauses)
+
+    def add_clause(self, clause):
+        # python-sat returns nothing, an unsatisfiable formula only shows in the next solve().
+        self._solver.add_clause(clause)
+        return True
+
+    def solve(self, max_conflicts=None):
+        if max_conflicts is not None:
+            self._solver.conf_budget(max_conflicts)
+            return self._solver.solve_limited()
+        return self._solver.solve()
+
+    def model(self):
+        return {abs(lit): lit > 0 for lit in self._solver.get_model()}
+
+
+def _sat_backend(clauses, backend='auto'):
+    if backend in ('auto', 'pysat'):
+        try:
+            return _PySATBackend(clauses)
+        except ImportError:
+            if backend == 'pysat':
+                raise
+    elif backend != 'python':
+        raise ValueError('Unknown SAT backend: %s' % backend)
+    from pylazors._cdcl import CDCLSolver
+    return CDCLSolver(clauses)
+
+
+# With a progress callback, SAT calls are split into rounds of this many conflicts, and progress() is called
+# between them, so that it can stop a long call.
+_progress_conflicts = 1000
+
+
+def _solve_limited(solver, max_conflicts, progress, models):
+    """ Return solver.solve(max_conflicts), calling progress(models) every _progress_conflicts conflicts """
+
+    if progress is None:
+        return solver.solve(max_conflicts)
+    while True:
+        conflicts = _progress_conflicts if max_conflicts is None else min(max_conflicts, _progress_conflicts)
+        result = solver.solve(conflicts)
+        if result is not None:
+            return result
+        if max_conflicts is not None:
+            max_conflicts -= conflicts
+            if max_conflicts <= 0:
+                return None
+        progress(models)
+
+
+def _solve_sat(board, backend='auto', max_conflicts=None, print_log=True, stats=None, progress=None):
+    """ Solve a Lazors board with a SAT solver.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        backend: *str, optional*
+            'python' for the built-in CDCL solver, 'pysat' for python-sat, 'auto' for python-sat if installed.
+
+        max_conflicts: *int, optional*
+            give up (return None) after this many conflicts in one SAT call. No limit if None.
+
+        stats, progress:
+            see _solve_large_board(), every checked model counts as a candidate. progress() is called for
+            every model, and every 1000 conflicts of a SAT call.
+
+    **Returns**
+
+        solution_board: *pylazors.Board object*
+            One possible solution board. if no solution found, will return None.
+    """
+
+    if stats is not None:
+        stats.strategy = 'sat'
+    encoding = encode_board(board)
+    compiled = encoding.compiled
+    solver = _sat_backend(encoding.clauses, backend)
+    source_states = [compiled.state(*l) for l in board.get_laser_sources()]
+    target_points = [compiled.point(*p) for p in board.get_targets()]
+
+    models = 0
+    solution_board = None
+    while _solve_limited(solver, max_conflicts, progress, models):
+        models += 1
+        if progress is not None:
+            progress(models)
+        cells = encoding.decode(solver.model())
+        laser_history = set()
+        passed = compiled.trace(cells, source_states, laser_history)
+        lit = compiled.lit_points(passed)
+        if all([p in lit for p in target_points]):
+            solution_board = board.copy(with_laser_segments=False)
+            solution_board.load_blocks([[Block(v) for v in cells[y * compiled.width:(y + 1) * compiled.width]]
+                                        for y in range(compiled.height)])
+            solution_board.load_laser_segments(compiled.segments(passed))
+            break
+        # A spurious model (lit by a beam cycle): rule out this placement of all cells the real lasers touch.
+        touched = {compiled.next_cell[s] for s in laser_history} - {-1}
+        clause = encoding.blocking_clause(cells, touched)
+        if not clause or not solver.add_clause(clause):
+            break
+
+    if print_log:
+        print('[solve_sat] %s, %d variables, %d clauses, %d model(s) checked' % (
+            'solved' if solution_board is not None else 'no solution', encoding.num_vars, len(encoding.clauses),
+            models))
+    if stats is not None:
+        stats.candidates += models
+        stats.traces += models
+        stats.solved += solution_board is not None
+    return solution_board
@@ -0,0 +1,502 @@
+"""
+This file contains a long-running solver service, and a client for it.
+
+Solving one board with lazors.py pays for interpreter startup, imports and spawning worker processes every time.
+A SolverService pays for them once: it keeps worker processes warm (with the solver modules imported), and
+answers boards from an in-memory LRU cache of recent solutions when the same level is asked again.
+
+    $ python3 -m pylazors.service --tcp 127.0.0.1:8765 --workers 4
+    $ python3 -m pylazors.service --unix /tmp/pylazors.sock
+
+The protocol is JSON lines: a client sends one JSON object per line, and gets one JSON object per line back.
+
+    {"bff": "GRID START\\n..."}                 solve a board given as the content of a BFF file
+    {"board": {...}}                            solve a board given as a dict, see pylazors.formats.jsonl
+    {"op": "ping"}, {"op": "stats"}             liveness check, service counters
+
+A request may also have "name" (board name for BFF text) and "timeout" (seconds, capped by the service
+timeout). Replies are {"ok": true, "solution": {...} or null, "cached": bool, "time": seconds} or
+{"ok": false, "error": "..."}, where "solution" is a board_to_dict() record with the placements of the solution.
+
+A board is solved until every request waiting for it has timed out. Then its worker process is terminated and
+replaced by a new one, so that hard boards sent with short timeouts do not keep the workers busy.
+"""
+
+from pylazors.formats.bff import parse_bff, BFFReaderError
+from pylazors.formats.jsonl import board_to_dict, board_from_dict
+from collections import OrderedDict
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+
+
+class ServiceError(Exception):
+    """ An error reply from a SolverService """
+
+
+def _warm_up():
+    # Run in every worker process when it starts, so that the first request does not pay for imports.
+    import pylazors.solver
+    import numpy
+
+
+def _solve_record(record, progress=None):
+    """ Solve a board given as a board_to_dict() record, return the record of the solution or None """
+
+    from pylazors.solver import solve_board
+    solution = solve_board(board_from_dict(record), print_log=False, progress=progress)
+    return board_to_dict(solution) if solution is not None else None
+
+
+def _worker_main(conn):
+    """ Main loop of a worker process: receive a board record, send back the record of its solution """
+
+    _warm_up()
+    while True:
+        try:
+            record = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(('done', _solve_record(record)))
+        except Exception as e:
+            conn.send(('error', '%s: %s' % (type(e).__name__, e)))
+
+
+class _Worker:
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        # Only the worker holds the other end, so a terminated worker is seen as EOFError.
+        child_conn.close()
+
+    def terminate(self):
+        self.process.terminate()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _Job:
+    """ A board being solved, shared by the requests of its level """
+
+    def __init__(self):
+        self.future = concurrent.futures.Future()
+        # Number of requests waiting for the solution
+        self.waiting = 1
+        self.cancelled = False
+        # Worker process solving the board, if any
+        self.worker = None
+
+
+def _level_key(record):
+    """ Cache key of a board record: everything that defines the level, but not its name or placements """
+
+    return json.dumps([record['grid'], sorted(record['available_blocks'].items()), record['lasers'],
+                       sorted(map(tuple, record['targets']))])
+
+
+class SolverService:
+    """
+    A solver service listening on a TCP or Unix socket.
+
+        with SolverService(('127.0.0.1', 0)) as service:
+            service.start()
+            client = SolverClient(service.address)
+            solution = client.solve(board)
+
+    **Parameters**
+
+        address: *tuple or str*
+            (host, port) to listen on TCP, port 0 picks a free port. A str is the path of a Unix socket.
+
+        workers: *int, optional*
+            number of warm worker processes. If 0, boards are solved by threads of this process, and a board
+            whose requests have all timed out stops at its next progress callback (every 1000 candidates).
+
+        cache_size: *int, optional*
+            number of recent solutions kept in memory.
+
+        timeout: *float, optional*
+            maximum seconds a request waits for its solution. Solving a board stops once all requests
+            waiting for it have timed out, see the top of this file.
+
+        max_concurrent: *int, optional*
+            maximum number of requests being solved at once, defaults to *workers* (at least 1). Other
+            requests wait for a free slot, within their timeout.
+    """
+
+    def __init__(self, address, workers=2, cache_size=256, timeout=60, max_concurrent=None):
+        self.workers, self.cache_size, self.timeout = workers, cache_size, timeout
+        self.max_concurrent = max_concurrent or max(workers, 1)
+        self.counters = {'requests': 0, 'solved': 0, 'cache_hits': 0, 'timeouts': 0, 'busy': 0, 'errors': 0}
+
+        self._cache = OrderedDict()
+        # Jobs being solved by level key
+        self._running = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._closed = False
+
+        self._context = multiprocessing.get_context()
+        # Start all workers now, rather than on the first request.
+        self._idle = [_Worker(self._context) for _ in range(workers)]
+        self._worker_slots = threading.BoundedSemaphore(max(workers, 1))
+
+        if isinstance(address, str):
+            server_class = _ThreadingUnixServer
+        else:
+            server_class = _ThreadingTCPServer
+        self._server = server_class(address, _RequestHandler)
+        self._server.service = self
+        self.address = self._server.server_address
+        self._thread = None
+
+    def start(self):
+        """ Serve requests in a background thread """
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """ Serve requests in the calling thread, until shutdown() is called from another thread """
+
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            self._closed = True
+            # Boards still being solved are not waited for.
+            workers = self._idle + [job.worker for job in self._running.values() if job.worker is not None]
+            self._idle = []
+            for job in self._running.values():
+                job.cancelled = True
+        for worker in workers:
+            worker.terminate()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _run(self, key, record, job):
+        # Main function of the thread solving a job, which holds a slot until the job is done or cancelled.
+        try:
+            if self.workers > 0:
+                solution = self._solve_in_worker(record, job)
+            else:
+                solution = self._solve_in_thread(record, job)
+        except BaseException as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(solution)
+        finally:
+            with self._lock:
+                if self._running.get(key) is job:
+                    del self._running[key]
+                if job.future.exception() is None:
+                    self._cache[key] = job.future.result()
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            self._slots.release()
+
+    def _solve_in_thread(self, record, job):
+        def progress(candidates):
+            if job.cancelled:
+                raise _Cancelled
+
+        return _solve_record(record, progress)
+
+    def _solve_in_worker(self, record, job):
+        # With more slots than workers, jobs wait for a worker here.
+        while not self._worker_slots.acquire(timeout=0.1):
+            if job.cancelled:
+                raise _Cancelled
+        try:
+            with self._lock:
+                worker = self._idle.pop() if self._idle else None
+            if worker is None:
+                worker = _Worker(self._context)
+            with self._lock:
+                if job.cancelled:
+                    self._idle.append(worker)
+                    raise _Cancelled
+                job.worker = worker
+            try:
+                worker.conn.send(record)
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                message = None
+            with self._lock:
+                job.worker = None
+                if message is not None:
+                    self._idle.append(worker)
+            if message is None:
+                # Terminated after all its requests timed out (or died), replace it to keep the workers warm.
+                worker.process.join()
+                worker.conn.close()
+                replacement = _Worker(self._context)
+                with self._lock:
+                    closed = self._closed
+                    if not closed:
+                        self._idle.append(replacement)
+                if closed:
+                    replacement.terminate()
+                raise _Cancelled if job.cancelled else ServiceError('Worker process died')
+        finally:
+            self._worker_slots.release()
+        if message[0] == 'error':
+            raise ServiceError(message[1])
+        return message[1]
+
+    def _cancel(self, key, job):
+        # A request of *job* timed out: stop solving if no other request waits for it.
+        with self._lock:
+            job.waiting -= 1
+            if job.waiting > 0 or job.future.done():
+                return
+            job.cancelled = True
+            if self._running.get(key) is job:
+                del self._running[key]
+            if job.worker is not None:
+                job.worker.terminate()
+
+    def solve(self, record, timeout=None):
+        """
+        Solve a board given as a board_to_dict() record.
+
+        **Returns**
+
+            solution: *dict or None*
+                board_to_dict() record of the solution, None if the board has no solution.
+
+            cached: *bool*
+                if the solution is from the cache.
+        """
+
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        key = _level_key(record)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.counters['cache_hits'] += 1
+                solution = self._cache[key]
+                return (dict(solution, name=record['name']) if solution is not None else None), True
+            # Requests of a level already being solved share its job.
+            job = self._running.get(key)
+            if job is not None:
+                job.waiting += 1
+
+        start_time = time.time()
+        if job is None:
+            if not self._slots.acquire(timeout=timeout):
+                self._count('busy')
+                raise ServiceError('Too many concurrent requests')
+            with self._lock:
+                job = self._running.get(key)
+                submitted = job is None
+                if submitted:
+                    job = self._running[key] = _Job()
+                else:
+                    job.waiting += 1
+            if submitted:
+                threading.Thread(target=self._run, args=(key, record, job), daemon=True).start()
+            else:
+                self._slots.release()
+
+        try:
+            solution = job.future.result(max(timeout - (time.time() - start_time), 0))
+        except concurrent.futures.TimeoutError:
+            self._cancel(key, job)
+            self._count('timeouts')
+            raise ServiceError('Timed out after %g seconds' % timeout)
+        self._count('solved')
+        return (dict(solution, name=record['name']) if solution is not None else None), False
+
+    def handle(self, request):
+        """ Return the reply (a dict) of a request (a dict) """
+
+        self._count('requests')
+        op = request.get('op', 'solve')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'stats':
+            with self._lock:
+                return dict(self.counters, ok=True, cached=len(self._cache), running=len(self._running))
+        if op != 'solve':
+            raise ServiceError('Unknown op: %s' % op)
+
+        start_time = time.time()
+        if 'bff' in request:
+            record = board_to_dict(parse_bff(request['bff'], request.get('name', 'board')))
+        elif 'board' in request:
+            # Normalize the record (e.g. a hand-written one), so that equal levels have equal cache keys.
+            record = board_to_dict(board_from_dict(request['board']))
+        else:
+            raise ServiceError('A request needs "bff" or "board"')
+        solution, cached = self.solve(record, request.get('timeout'))
+        return {'ok': True, 'solution': solution, 'cached': cached, 'time': time.time() - start_time}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = service.handle(json.loads(line))
+            except (ServiceError, BFFReaderError) as e:
+                reply = {'ok': False, 'error': str(e)}
+            except Exception as e:
+                service._count('errors')
+                reply = {'ok': False, 'error': '%s: %s' % (type(e).__name__, e)}
+            self.wfile.write((json.dumps(reply, separators=(',', ':')) + '\n').encode())
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _ThreadingUnixServer = None
+
+
+class SolverClient:
+    """
+    Client of a SolverService. One client holds one connection, and is not shared between threads.
+
+        with SolverClient(('127.0.0.1', 8765)) as client:
+            solution = client.solve(pylazors.read_bff('boards/all/mad_7.bff'))
+
+    **Parameters**
+
+        address: *tuple or str*
+            (host, port) of a TCP service, or the path of a Unix socket.
+
+        timeout: *float, optional*
+            socket timeout in seconds, None to wait forever.
+    """
+
+    def __init__(self, address, timeout=None):
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET6 if ':' in address[0] else socket.AF_INET,
+                                         socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address)
+        self._file = self._socket.makefile('rwb')
+
+    def request(self, request):
+        """ Send a request (a dict), and return the reply (a dict). Raise ServiceError for error replies. """
+
+        self._file.write((json.dumps(request, separators=(',', ':')) + '\n').encode())
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ServiceError('Connection closed by the service')
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise ServiceError(reply.get('error', 'Unknown error'))
+        return reply
+
+    def solve(self, board, timeout=None, return_reply=False):
+        """
+        Solve a board.
+
+        **Parameters**
+
+            board: *pylazors.Board object or str*
+                board to be solved, or the content of a BFF file.
+
+            timeout: *float, optional*
+                seconds the service waits for the solution.
+
+            return_reply: *bool, optional*
+                if True, also return the reply dict (with "cached" and "time").
+
+        **Returns**
+
+            solution_board: *pylazors.Board object*
+                None if the board has no solution.
+        """
+
+        request = {'bff': board} if isinstance(board, str) else {'board': board_to_dict(board)}
+        if timeout is not None:
+            request['timeout'] = timeout
+        reply = self.request(request)
+        solution = board_from_dict(reply['solution']) if reply['solution'] is not None else None
+        return (solution, reply) if return_reply else solution
+
+    def ping(self):
+        return self.request({'op': 'ping'})['ok']
+
+    def stats(self):
+        return self.request({'op': 'stats'})
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a pylazors solver service.')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--tcp', metavar='HOST:PORT', help='listen on a TCP address')
+    group.add_argument('--unix', metavar='PATH', help='listen on a Unix socket')
+    parser.add_argument('--workers', type=int, default=2, help='number of warm worker processes')
+    parser.add_argument('--cache-size', type=int, default=256, help='number of recent solutions kept')
+    parser.add_argument('--timeout', type=float, default=60, help='maximum seconds per request')
+    parser.add_argument('--max-concurrent', type=int, default=None, help='maximum requests solved at once')
+    args = parser.parse_args(argv)
+
+    if args.tcp:
+        host, port = args.tcp.rsplit(':', 1)
+        address = (host, int(port))
+    else:
+        address = args.unix
+    with SolverService(address, args.workers, args.cache_size, args.timeout, args.max_concurrent) as service:
+        print('[pylazors.service] listening on %s with %d worker(s)' % (service.address, args.workers))
+        try:
+            service.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -45,15 +45,18 @@ solving algorithm and use it to solve given board.
 
 from itertools import combinations, product
 from math import factorial
-import numpy as np
+import inspect
 import random
 import time
 from pylazors.block import *
 from pylazors.formats.bff import bff_block_map, block_bff_map
-from pylazors._solver import _solve_large_board, _trace_lasers
+from pylazors._solver import _solve_large_board, _solve_compiled_board, _trace_lasers, _with_progress
+from pylazors._anytime import _solve_anytime
+from pylazors.stats import SolveStats
+from pylazors.profiling import profile_dir, profiled
 
 
-def _solve_board(board, solve_limit=1E5, print_log=True):
+def _solve_board(board, solve_limit=1E5, print_log=True, stats=None, progress=None):
     """
     lazor (game) solver
 
@@ -65,12 +68,26 @@ def _solve_board(board, solve_limit=1E5, print_log=True):
             the maximum number of combinations allowed. if exceeded, the function
             returns None. if 0 -> no limit.
 
+        stats: *pylazors.stats.SolveStats object, optional*
+            If given, solving statistics will be collected into it.
+
+        progress: *callable, optional*
+            If given, it is called with the number of tested combinations every 1000 combinations.
+
     **Returns**
 
         solution_board: *pylazors.Board object*
             board for the solved maze
     """
 
+    # numpy is imported here rather than at module level, so that solving large boards (which never
+    # reach this function) does not pay for importing it.
+    import numpy as np
+
+    if stats is not None:
+        t_setup = time.perf_counter()
+        stats.strategy = 'small'
+
     # Translate pylazors.Board to data
     letter_grid = np.array([[block_bff_map[block] for block in row] for row in board.get_blocks()])
     blocks = [block_bff_map[fix_block(block)] for block in board.get_available_blocks()]
@@ -91,6 +108,8 @@ def _solve_board(board, solve_limit=1E5, print_log=True):
 
     if unique_combinations > solve_limit != 0:
         print("[solve_board] skipped: too many combinations! (%i)" % unique_combinations)
+        if stats is not None:
+            stats.add_time('setup', time.perf_counter() - t_setup)
         return None
 
     unique_blocks = 0
@@ -99,8 +118,12 @@ def _solve_board(board, solve_limit=1E5, print_log=True):
         if bc > 0:
             unique_blocks += 1
 
-    # if the number of block types is 1, use combinations, otherwise use the modified functions
-    if unique_blocks == 1:
+    if stats is not None:
+        stats.add_time('setup', time.perf_counter() - t_setup)
+
+    # if the number of block types is 1 (or none is left, e.g. all pinned), use combinations, otherwise use the
+    # modified functions
+    if unique_blocks <= 1:
         t0 = time.time()
         possible_combs = [zip(blocks, x) for x in combinations(available_positions, len(blocks))]
         if print_log:
@@ -110,10 +133,20 @@ def _solve_board(board, solve_limit=1E5, print_log=True):
         possible_combs = get_possible_combs_perm(blocks, available_positions)
         if print_log:
             print("[solve_board] %i permutations generated in %.3f s" % (len(possible_combs), time.time() - t0))
+    if stats is not None:
+        stats.add_time('generation', time.time() - t0)
+        trace = stats.timed('tracing', lambda grid: lazor_on(get_data_grid(grid, points), lazers))
+        no_target_left = stats.timed('verification', _no_target_left)
+    else:
+        trace = lambda grid: lazor_on(get_data_grid(grid, points), lazers)
+        no_target_left = _no_target_left
 
     iter_num = 1
+    comb_numbers = range(len(possible_combs))
+    if progress is not None:
+        comb_numbers = _with_progress(comb_numbers, progress)
     # Iterate a random combination each time and turn lazor on
-    for comb_number in range(len(possible_combs)):
+    for comb_number in comb_numbers:
         comb_ind = random.randint(0, len(possible_combs) - 1)
         comb = possible_combs.pop(comb_ind)
 
@@ -123,11 +156,14 @@ def _solve_board(board, solve_limit=1E5, print_log=True):
         for blk in comb:
             i_grid[blk[1][1]][blk[1][0]] = blk[0]
 
-        data_grid = get_data_grid(i_grid, points)
-        data_grid_w_lazer_on = lazor_on(data_grid, lazers)
+        data_grid_w_lazer_on = trace(i_grid)
 
         # stop if solution is found [if no 9 is in data_grid]
-        if not any([point == 9 for row in data_grid_w_lazer_on for point in row]):
+        if no_target_left(data_grid_w_lazer_on):
+            if stats is not None:
+                stats.candidates += iter_num
+                stats.traces += iter_num
+                stats.solved += 1
             if print_log:
                 print("[solve_board] Solution found in %i iterations" % (iter_num))
             solution_board = board.copy()
@@ -141,9 +177,18 @@ def _solve_board(board, solve_limit=1E5, print_log=True):
 
         iter_num += 1
 
+    if stats is not None:
+        stats.candidates += iter_num - 1
+        stats.traces += iter_num - 1
     print("[solve_board] No solution found!")
 
 
+def _no_target_left(data_grid_w_lazer_on):
+    """ Return True if no target (9) is left in a data grid returned by lazor_on() """
+
+    return not any([point == 9 for row in data_grid_w_lazer_on for point in row])
+
+
 def get_possible_combs_perm(blocks, available_positions):
     """
     unique combinations generator. This function still generates similar
@@ -257,6 +302,8 @@ def get_data_grid(letter_grid, points):
 
     """
 
+    import numpy as np
+
     x_dim, y_dim = 2 * len(letter_grid) + 1, 2 * len(letter_grid[0]) + 1
     data_grid = np.zeros(shape=(x_dim, y_dim))
     directions = [
@@ -431,7 +478,123 @@ def pos_chk(x, y, data_grid):
     return 0 <= x < x_dim and 0 <= y < y_dim
 
 
-def solve_board(board, **kwargs):
+def _options_of(func, kwargs):
+    """ Return the items of *kwargs* which *func* takes as arguments """
+
+    parameters = inspect.signature(func).parameters
+    return {k: v for k, v in kwargs.items() if k in parameters}
+
+
+def _check_options(kwargs):
+    """ Raise TypeError for an option in *kwargs* which no solving algorithm takes """
+
+    import pylazors.sat
+    import pylazors.portfolio
+
+    known = set()
+    for func in (_solve_board, _solve_large_board, _solve_compiled_board, _solve_anytime, pylazors.sat._solve_sat,
+                 pylazors.portfolio._solve_portfolio):
+        known.update(inspect.signature(func).parameters)
+    for name in kwargs:
+        if name not in known:
+            raise TypeError("solve_board() got an unexpected keyword argument '%s'" % name)
+
+
+def _solve_auto(board, **kwargs):
+    """ Choose a solving algorithm by the size of *board*, and solve it. Options of other algorithms which the
+    chosen one does not take (e.g. ordering, tracer) are ignored, unknown options raise TypeError. """
+
+    _check_options(kwargs)
+    large_kwargs = _options_of(_solve_large_board, kwargs)
+    if board.width * board.height < 15:
+        solution = _solve_board(board, **_options_of(_solve_board, kwargs))
+        if solution is None:
+            # fallback to _solve_large_board() when _solve_board() skips
+            # solving due to too many combinations.
+            solution = _solve_large_board(board, **large_kwargs)
+        return solution
+    else:
+        return _solve_large_board(board, **large_kwargs)
+
+
+def _solve_anytime_board(board, **kwargs):
+    """ _solve_anytime() as a solving algorithm: return the solution board, or None """
+
+    best_board, targets_hit = _solve_anytime(board, **kwargs)
+    return best_board if targets_hit == len(board.get_targets()) else None
+
+
+def _solve_sat(board, **kwargs):
+    from pylazors.sat import _solve_sat
+    return _solve_sat(board, **kwargs)
+
+
+def _solve_portfolio(board, **kwargs):
+    from pylazors.portfolio import _solve_portfolio
+    return _solve_portfolio(board, **kwargs)
+
+
+def _pinned_blocks(board, pinned):
+    """ Return {(x, y): block} of *pinned*, a dict, an iterable of (x, y, block) or a board with placed blocks """
+
+    if hasattr(pinned, 'get_blocks'):
+        pinned = {(x, y): b for y, row in enumerate(pinned.get_blocks()) for x, b in enumerate(row)
+                  if not b.is_fixed() and b != Block.BLANK}
+    elif not isinstance(pinned, dict):
+        pinned = {(x, y): b for x, y, b in pinned}
+
+    available_blocks = board.get_available_blocks()
+    for (x, y), block in pinned.items():
+        block = Block(block)
+        if not (0 <= x < board.width and 0 <= y < board.height) or board.get_block(x, y).is_fixed():
+            raise ValueError('Can not pin a block on (%d, %d): not a free cell' % (x, y))
+        if block not in available_blocks:
+            raise ValueError('Can not pin %s on (%d, %d): no such block left' % (block, x, y))
+        available_blocks.remove(block)
+    return {xy: Block(b) for xy, b in pinned.items()}
+
+
+def _pin_blocks(board, pinned):
+    """ Return a copy of *board* with *pinned* blocks ({(x, y): block}) fixed, and removed from available blocks """
+
+    pinned_board = board.copy(with_available_blocks=False, with_laser_segments=False)
+    pinned_board.clean_board()
+    available_blocks = board.get_available_blocks()
+    for (x, y), block in pinned.items():
+        pinned_board.mod_block(x, y, fix_block(block))
+        available_blocks.remove(block)
+    for block in set(available_blocks):
+        pinned_board.add_available_blocks(block, available_blocks.count(block))
+    return pinned_board
+
+
+def _unpin_blocks(solution, board, pinned):
+    """ Return *solution* of a pinned board as a solution of *board*, with pinned blocks movable again """
+
+    if solution is None:
+        return None
+    unpinned = board.copy(with_laser_segments=False)
+    blocks = solution.get_blocks()
+    for x, y in pinned:
+        blocks[y][x] = unfix_block(blocks[y][x])
+    unpinned.load_blocks(blocks)
+    unpinned.load_laser_segments(solution.get_laser_segments())
+    return unpinned
+
+
+# Solving algorithms by name, see solve_board()
+strategies = {
+    'auto': _solve_auto,
+    'small': _solve_board,
+    'large': _solve_large_board,
+    'compiled': _solve_compiled_board,
+    'anytime': _solve_anytime_board,
+    'sat': _solve_sat,
+    'portfolio': _solve_portfolio,
+}
+
+
+def solve_board(board, return_stats=False, profile=None, strategy='auto', pinned=None, **kwargs):
     """
     Solve a given Lazors board.
 
@@ -442,19 +605,199 @@ def solve_board(board, **kwargs):
 
         board: *pylazors.Board object*
 
+        return_stats: *bool, optional*
+            If True, also return a pylazors.stats.SolveStats object with counters
+            and phase timings of the solving.
+
+        profile: *str, optional*
+            If given, profile the solving and write <board name>.prof and
+            <board name>.collapsed into this directory. Defaults to the
+            PYLAZORS_PROFILE environment variable. See pylazors/profiling.py.
+
+        progress: *callable, optional*
+            If given, it is called with the number of tested candidates every
+            1000 candidates, e.g. to report progress or to cancel solving by
+            raising an exception.
+
+        strategy: *str, optional*
+            Solving algorithm, one of:
+                'auto'      choose by the size of the board (default)
+                'small'     random order, for small boards only
+                'large'     exhaustive with pruning
+                'compiled'  same as 'large', on compiled tracing tables
+                'anytime'   best-first, see solve_anytime()
+                'sat'       SAT encoding and CDCL search, see pylazors/sat.py
+                'portfolio' race several algorithms in parallel processes (or threads),
+                            see pylazors/portfolio.py
+
+        pinned: *dict, list or pylazors.Board object, optional*
+            blocks already placed, kept where they are: {(x, y): block}, [(x, y, block), ...], or a board on
+            which they are placed (e.g. a half-finished board of a player). Only the remaining available blocks
+            are placed on the remaining free cells. If None, all available blocks are placed.
+
     **Returns**
 
         solution_board: *pylazors.Board object*
             board for the solved maze
+
+        stats: *pylazors.stats.SolveStats object*
+            only if *return_stats* is True.
     """
 
-    if board.width * board.height < 15:
-        solution = _solve_board(board, **kwargs)
-        if solution is None:
-            # fallback to _solve_large_board() when _solve_board() skips
-            # solving due to too many combinations.
-            return _solve_large_board(board, **kwargs)
-        else:
-            return solution
+    if strategy not in strategies:
+        raise ValueError('Unknown strategy: %s (choose from %s)' % (strategy, ', '.join(strategies)))
+    solve = strategies[strategy]
+    if return_stats:
+        kwargs['stats'] = SolveStats()
+    org_board = board
+    if pinned is not None:
+        pinned = _pinned_blocks(board, pinned)
+        board = _pin_blocks(board, pinned)
+
+    out_dir = profile_dir(profile)
+    if out_dir:
+        with profiled(board.name, out_dir):
+            solution = solve(board, **kwargs)
     else:
-        return _solve_large_board(board, **kwargs)
+        solution = solve(board, **kwargs)
+    if pinned is not None:
+        solution = _unpin_blocks(solution, org_board, pinned)
+
+    if return_stats:
+        return solution, kwargs['stats']
+    return solution
+
+
+def solve_anytime(board, time_limit=None, max_candidates=None, seed=None, return_stats=False, **kwargs):
+    """
+    Solve a given Lazors board within a budget, or return the best partial solution found.
+
+    Candidates are searched from the ones closest to a solution (most targets lit), see pylazors/_anytime.py.
+    Without any budget, this is as complete as solve_board().
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        time_limit: *float, optional*
+            maximum seconds to search.
+
+        max_candidates: *int, optional*
+            maximum number of candidates to test.
+
+        seed: *int, optional*
+            random seed, the same seed and candidate budget always give the same result.
+
+        return_stats: *bool, optional*
+            If True, also return a pylazors.stats.SolveStats object.
+
+    **Returns**
+
+        best_board: *pylazors.Board object*
+            the solution board if solved, otherwise the board with most targets lit.
+
+        targets_hit: *int*
+            number of targets lit on *best_board*, the board is solved if this equals len(board.get_targets()).
+
+        stats: *pylazors.stats.SolveStats object*
+            only if *return_stats* is True.
+    """
+
+    stats = SolveStats() if return_stats else None
+    best_board, targets_hit = _solve_anytime(board, time_limit, max_candidates, seed, stats=stats, **kwargs)
+    if return_stats:
+        return best_board, targets_hit, stats
+    return best_board, targets_hit
+
+
+def resolve(board, previous_solution, max_moves=2, fallback='compiled', return_stats=False, **kwargs):
+    """
+    Solve a given Lazors board again after a small edit, starting from a solution of the board before the edit.
+
+    The previous placement is tested first, then placements outward from it, one block move at a time up to
+    *max_moves* moves (see pylazors/_resolve.py). If none of them is a solution, the board is solved from
+    scratch with *fallback*. When the edit keeps the previous solution valid, or a nearby placement works,
+    this takes milliseconds instead of a full search.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+            the edited board.
+
+        previous_solution: *pylazors.Board object*
+            a solution board of the board before the edit, e.g. returned by solve_board().
+
+        max_moves: *int, optional*
+            maximum number of block moves away from the previous placement, before falling back to a full
+            search. Adding a block (when the edit allows more blocks) counts as one move.
+
+        fallback: *str, optional*
+            solving strategy of the full search, see solve_board(). None to not search further, and return
+            None when no nearby placement is a solution.
+
+        return_stats: *bool, optional*
+            If True, also return a pylazors.stats.SolveStats object of both searches.
+
+        Other keyword arguments are passed to the fallback strategy, print_log and progress also to the search
+        of nearby placements.
+
+    **Returns**
+
+        solution_board: *pylazors.Board object*
+            One possible solution board. if no solution found, will return None.
+
+        stats: *pylazors.stats.SolveStats object*
+            only if *return_stats* is True.
+    """
+
+    from pylazors._resolve import _solve_nearby
+
+    if fallback is not None and fallback not in strategies:
+        raise ValueError('Unknown strategy: %s (choose from %s)' % (fallback, ', '.join(strategies)))
+    stats = SolveStats() if return_stats else None
+    # Strategy options (e.g. ordering) are only for the fallback search.
+    nearby_kwargs = {k: v for k, v in kwargs.items() if k in ('print_log', 'progress')}
+    solution = _solve_nearby(board, previous_solution, max_moves, stats=stats, **nearby_kwargs)
+    if solution is None and fallback is not None:
+        fallback_stats = SolveStats() if return_stats else None
+        solution = strategies[fallback](board, stats=fallback_stats, **kwargs)
+        if return_stats:
+            stats.merge(fallback_stats)
+            stats.boards -= fallback_stats.boards
+            stats.strategy = 'resolve/%s' % fallback_stats.strategy
+    if return_stats:
+        return solution, stats
+    return solution
+
+
+def hint(board, pinned=None, **kwargs):
+    """
+    Return one next correct move on a partly solved board: a block to place, which leads to a solution together
+    with the blocks already placed.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+
+        pinned: *dict, list or pylazors.Board object, optional*
+            blocks already placed, see solve_board(). Defaults to the blocks placed on *board*.
+
+        kwargs:
+            passed to solve_board(), e.g. strategy.
+
+    **Returns**
+
+        move: *tuple*
+            (x, y, block), the first block of a solution (in row order) which is not placed yet. None if no
+            solution keeps the placed blocks, or if all blocks are placed already.
+    """
+
+    pinned = _pinned_blocks(board, board if pinned is None else pinned)
+    solution = solve_board(board.copy(with_laser_segments=False), pinned=pinned, **kwargs)
+    if solution is None:
+        return None
+    for y, row in enumerate(solution.get_blocks()):
+        for x, block in enumerate(row):
+            if not block.is_fixed() and block != Block.BLANK and (x, y) not in pinned:
+                return x, y, block
+    return None
@@ -0,0 +1,152 @@
+"""
+This file contains the class used for collecting statistics of solving boards.
+
+A *SolveStats* object is only created when asked for (e.g. pylazors.solve_board(board, return_stats=True)),
+solvers skip all counting and timing when they are given None instead.
+"""
+
+import time
+
+
+class SolveStats:
+    """
+    Counters and phase timings of solving one board, or a sum of many (see merge()).
+
+    **Attributes**
+
+        candidates: *int*
+            number of block placements generated and tested.
+        pruned: *dict*
+            number of partial placements skipped by each pruning rule, e.g. {'banned_single': 10, ...}.
+            Note one skipped partial placement can stand for many full candidates.
+        traces: *int*
+            number of laser tracing runs. With a trace cache, number of beams traced (trace_cache_misses).
+        trace_steps: *int*
+            total number of laser steps processed in all tracing runs.
+        segments: *int*
+            total number of laser segments produced in all tracing runs.
+        trace_cache_hits, trace_cache_misses: *int*
+            number of laser source beams reused from a trace cache, and traced (see pylazors._compiled.TraceCache).
+        phase_time: *dict*
+            seconds spent in each phase: setup, generation, tracing, verification.
+        boards, solved: *int*
+            number of boards these statistics are collected from, and how many of them are solved.
+        strategy: *str*
+            name of the solving algorithm used.
+    """
+
+    phases = ('setup', 'generation', 'tracing', 'verification')
+
+    def __init__(self, strategy=None):
+        self.strategy = strategy
+        self.boards = 1
+        self.solved = 0
+        self.candidates = 0
+        self.pruned = {}
+        self.traces = 0
+        self.trace_steps = 0
+        self.segments = 0
+        self.trace_cache_hits = 0
+        self.trace_cache_misses = 0
+        self.phase_time = {phase: 0.0 for phase in self.phases}
+
+    def add_time(self, phase, seconds):
+        self.phase_time[phase] = self.phase_time.get(phase, 0.0) + seconds
+
+    def add_pruned(self, rule, count):
+        if count:
+            self.pruned[rule] = self.pruned.get(rule, 0) + count
+
+    def timed(self, phase, func):
+        """ Return a wrapper of *func* which adds its running time into *phase* """
+
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_time(phase, time.perf_counter() - t0)
+        return wrapper
+
+    def timed_iter(self, phase, iterable):
+        """ Yield from *iterable*, adding the time spent for generating every item into *phase* """
+
+        iterator = iter(iterable)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(phase, time.perf_counter() - t0)
+                return
+            self.add_time(phase, time.perf_counter() - t0)
+            yield item
+
+    def merge(self, other):
+        """ Add all counters and timings of *other* into this object, and return self. """
+
+        self.boards += other.boards
+        self.solved += other.solved
+        self.candidates += other.candidates
+        for rule, count in other.pruned.items():
+            self.add_pruned(rule, count)
+        self.traces += other.traces
+        self.trace_steps += other.trace_steps
+        self.segments += other.segments
+        self.trace_cache_hits += other.trace_cache_hits
+        self.trace_cache_misses += other.trace_cache_misses
+        for phase, seconds in other.phase_time.items():
+            self.add_time(phase, seconds)
+        if self.strategy != other.strategy:
+            self.strategy = 'mixed'
+        return self
+
+    @classmethod
+    def sum(cls, stats_list):
+        """ Return a new SolveStats object of the sum of all objects in *stats_list* """
+
+        stats_list = [s for s in stats_list if s is not None]
+        total = cls(stats_list[0].strategy if stats_list else None)
+        total.boards = 0
+        for stats in stats_list:
+            total.merge(stats)
+        return total
+
+    @property
+    def trace_cache_hit_rate(self):
+        """ Share of laser source beams reused from a trace cache, 0.0 if no cache was used """
+
+        total = self.trace_cache_hits + self.trace_cache_misses
+        return self.trace_cache_hits / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            'strategy': self.strategy,
+            'boards': self.boards,
+            'solved': self.solved,
+            'candidates': self.candidates,
+            'pruned': dict(self.pruned),
+            'traces': self.traces,
+            'trace_steps': self.trace_steps,
+            'segments': self.segments,
+            'trace_cache_hits': self.trace_cache_hits,
+            'trace_cache_misses': self.trace_cache_misses,
+            'phase_time': dict(self.phase_time),
+        }
+
+    def report(self):
+        """ Return a human readable multi-line summary """
+
+        total_time = sum(self.phase_time.values()) or 1.0
+        lines = ['%d board(s), %d solved, strategy: %s' % (self.boards, self.solved, self.strategy),
+                 'candidates: %d, traces: %d, trace steps: %d, segments: %d' % (
+                     self.candidates, self.traces, self.trace_steps, self.segments),
+                 'trace cache: %d hits, %d misses (%.0f%% hit rate)' % (
+                     self.trace_cache_hits, self.trace_cache_misses, self.trace_cache_hit_rate * 100),
+                 'pruned: ' + (', '.join('%s %d' % r for r in sorted(self.pruned.items())) or 'none'),
+                 'time: ' + ', '.join('%s %.3fs (%.0f%%)' % (phase, seconds, seconds / total_time * 100)
+                                      for phase, seconds in self.phase_time.items())]
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return '<SolveStats: %d candidates, %d traces>' % (self.candidates, self.traces)
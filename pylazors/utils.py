@@ -1,4 +1,5 @@
 import pickle
+import sys
 
 
 def deepcopy(sth):
@@ -6,3 +7,9 @@ def deepcopy(sth):
 
     return pickle.loads(pickle.dumps(sth))
 
+
+def gil_enabled():
+    """ Return False only on a free-threaded Python build running without the GIL (3.13t and later) """
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
@@ -0,0 +1,222 @@
+"""
+This file contains functions for checking solutions, e.g. placements submitted by players.
+
+A solution board is valid for a level if:
+    1) it has the same size and the same fixed blocks as the level,
+    2) movable blocks placed on it are exactly the available blocks of the level, and
+    3) all targets of the level are on the laser path.
+
+Checking many solutions of the same level only compiles the level once (see compile_level()).
+"""
+
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard, _transparent, _reflective
+from collections import Counter
+
+
+_movable_values = (int(Block.OPAQUE), int(Block.REFLECT), int(Block.REFRACT))
+
+
+class CompiledLevel:
+    """ Everything needed to check solutions of one level, precomputed from the (unsolved) level board. """
+
+    def __init__(self, level):
+        self.compiled = CompiledBoard(level)
+        self.source_states = [self.compiled.state(*l) for l in level.get_laser_sources()]
+        self.target_points = [self.compiled.point(*p) for p in level.get_targets()]
+        available = Counter(int(b) for b in level.get_available_blocks())
+        self.available = [available[v] for v in _movable_values]
+
+    def check(self, board):
+        """ Return None if *board* is a valid solution of this level, otherwise a string of the reason """
+
+        compiled = self.compiled
+        if board.width != compiled.width or board.height != compiled.height:
+            return 'Board size mismatches'
+        cells = compiled.cells(board.get_blocks())
+        reason = self.check_blocks(cells)
+        if reason:
+            return reason
+        lit_points = compiled.lit_points(compiled.trace(cells, self.source_states))
+        if not all([p in lit_points for p in self.target_points]):
+            return 'Not all targets are on the laser path'
+        return None
+
+    def check_blocks(self, cells):
+        """ Check fixed and movable blocks of flat block values *cells*, return None or reason """
+
+        placed = [0, 0, 0]
+        for value, fixed in zip(cells, self.compiled.fixed):
+            if fixed >= 0:
+                if value != fixed:
+                    return 'Fixed blocks are changed'
+            elif value in _movable_values:
+                placed[_movable_values.index(value)] += 1
+            elif value != Block.BLANK:
+                return 'A fixed block is added'
+        if placed != self.available:
+            return 'Placed blocks mismatch available blocks'
+        return None
+
+
+def compile_level(level):
+    """ Return a CompiledLevel object of *level*, which can be reused as *level* in verify functions """
+
+    return level if isinstance(level, CompiledLevel) else CompiledLevel(level)
+
+
+def _level_key(board):
+    """ Key of the level a solution board belongs to: size, fixed blocks, available blocks, lasers, targets """
+
+    fixed = tuple(b if b.is_fixed() else None for row in board.get_blocks() for b in row)
+    return (board.width, board.height, fixed, tuple(sorted(board.get_available_blocks())),
+            tuple(board.get_laser_sources()), tuple(board.get_targets()))
+
+
+def verify_solution(board, level=None, return_reason=False):
+    """
+    Check if *board* is a valid solution.
+
+    **Parameters**
+
+        board: *pylazors.Board object*
+            the solution board to be checked.
+
+        level: *pylazors.Board or CompiledLevel object, optional*
+            the unsolved level *board* should solve. If not given, *board* is checked against its own
+            fixed blocks, available blocks, lasers and targets.
+
+        return_reason: *bool, optional*
+            if True, return a string of the reason why *board* is invalid (None if valid) instead.
+
+    **Returns**
+
+        valid: *bool*
+    """
+
+    reason = compile_level(level if level is not None else board).check(board)
+    return reason if return_reason else reason is None
+
+
+def verify_many(boards, level=None, vectorized=False):
+    """
+    Check many solution boards.
+
+    **Parameters**
+
+        boards: *list, pylazors.Board*
+            solution boards to be checked.
+
+        level: *pylazors.Board or CompiledLevel object, optional*
+            the level all *boards* should solve. If not given, boards are grouped by their own level
+            (see verify_solution()) and every level is compiled only once.
+
+        vectorized: *bool, optional*
+            if True, trace lasers of all boards of a level together, bit-parallel (see _trace_many()).
+            This pays off for large batches of the same level.
+
+    **Returns**
+
+        valid: *list, bool*
+            one for each board in *boards*.
+    """
+
+    boards = list(boards)
+    results = [False] * len(boards)
+    if level is not None:
+        groups = {None: (compile_level(level), list(range(len(boards))))}
+    else:
+        groups = {}
+        for i, board in enumerate(boards):
+            key = _level_key(board)
+            if key not in groups:
+                groups[key] = (CompiledLevel(board), [])
+            groups[key][1].append(i)
+
+    for compiled_level, indexes in groups.values():
+        if not vectorized:
+            for i in indexes:
+                results[i] = compiled_level.check(boards[i]) is None
+            continue
+
+        compiled = compiled_level.compiled
+        to_trace, all_cells = [], []
+        for i in indexes:
+            board = boards[i]
+            if board.width != compiled.width or board.height != compiled.height:
+                continue
+            cells = compiled.cells(board.get_blocks())
+            if compiled_level.check_blocks(cells) is None:
+                to_trace.append(i)
+                all_cells.append(cells)
+        if to_trace:
+            for i, valid in zip(to_trace, _trace_many(compiled_level, all_cells)):
+                results[i] = valid
+    return results
+
+
+# Translation tables from block values to '1' / '0' characters, for building bit masks from a column of values.
+_transparent_chars = bytes([ord('1') if t else ord('0') for t in _transparent] + [ord('0')] * 240)
+_reflective_chars = bytes([ord('1') if r else ord('0') for r in _reflective] + [ord('0')] * 240)
+
+
+def _column_mask(column, chars):
+    """ Return an int whose bit i is set if chars[column[i]] is '1' """
+
+    return int(bytes(column).translate(chars)[::-1], 2)
+
+
+def _trace_many(compiled_level, all_cells):
+    """
+    Trace lasers on many block layouts of the same level at once, return if all targets are lit for each.
+
+    This is bit-parallel: layout i is bit i of Python integers. For every cell, two masks tell in which
+    layouts the cell is transparent or reflective, and every laser state carries the mask of layouts it
+    reaches. So a laser step is done for all layouts with one bitwise operation.
+    """
+
+    compiled = compiled_level.compiled
+    next_cell, transmit, reflect = compiled.next_cell, compiled.transmit, compiled.reflect
+    n = len(all_cells)
+    full = (1 << n) - 1
+
+    columns = list(zip(*all_cells))
+    transparent = [_column_mask(column, _transparent_chars) for column in columns]
+    reflective = [_column_mask(column, _reflective_chars) for column in columns]
+
+    reached = {s: full for s in compiled_level.source_states}
+    pending = dict(reached)
+    lasers = list(pending)
+    lit = {}
+
+    def spread(s, mask):
+        new = mask & ~reached.get(s, 0)
+        if new:
+            reached[s] = reached.get(s, 0) | new
+            if s in pending:
+                pending[s] |= new
+            else:
+                pending[s] = new
+                lasers.append(s)
+
+    while lasers:
+        s = lasers.pop()
+        mask = pending.pop(s)
+        c = next_cell[s]
+        if c < 0:
+            continue
+        passed = mask & transparent[c]
+        if passed:
+            # A segment from point of s to point of transmit[s], in all layouts of *passed*
+            t = transmit[s]
+            lit[s >> 2] = lit.get(s >> 2, 0) | passed
+            lit[t >> 2] = lit.get(t >> 2, 0) | passed
+            spread(t, passed)
+        reflected = mask & reflective[c]
+        if reflected:
+            spread(reflect[s], reflected)
+
+    all_lit = full
+    for p in compiled_level.target_points:
+        all_lit &= lit.get(p, 0)
+    return [b == '1' for b in bin(all_lit)[2:].zfill(n)[::-1]]
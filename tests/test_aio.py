@@ -0,0 +1,68 @@
+import unittest
+import asyncio
+import os
+from pylazors.aio import *
+from pylazors.formats.bff import read_bff
+from test_solevr import sample_board, reference_blocks
+
+
+board_dir = os.path.join(os.path.dirname(__file__), '..', 'boards', 'all')
+
+
+class TestAsyncSolve(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = AsyncSolverPool(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_solve_board_async(self):
+        async def run():
+            solution, stats = await solve_board_async(sample_board(), pool=self.pool, return_stats=True)
+            self.assertEqual(solution.get_blocks(), reference_blocks)
+            self.assertEqual(stats.solved, 1)
+
+            # A timed out board is stopped, and its worker is given back to the pool
+            with self.assertRaises(asyncio.TimeoutError):
+                await solve_board_async(read_bff(os.path.join(board_dir, 'yarn_5.bff')), timeout=0.2, pool=self.pool)
+            solutions = await asyncio.gather(*[solve_board_async(sample_board(), pool=self.pool) for _ in range(5)])
+            self.assertEqual([s.get_blocks() for s in solutions], [reference_blocks] * 5)
+
+        asyncio.run(run())
+
+    def test_solve_board_events(self):
+        async def run():
+            events = []
+            async for event in solve_board_events(read_bff(os.path.join(board_dir, 'numbered_6.bff')),
+                                                  pool=self.pool, progress_interval=0):
+                events.append(event)
+            self.assertEqual(events[-1]['event'], 'solution')
+            self.assertIsNotNone(events[-1]['solution'])
+            progress = [e['candidates'] for e in events[:-1]]
+            self.assertGreater(len(progress), 0)
+            self.assertEqual(progress, sorted(progress))
+
+            names = []
+            boards = [sample_board(), read_bff(os.path.join(board_dir, 'mad_1.bff'))]
+            async for board, solution in iter_solutions_async(boards, pool=self.pool):
+                self.assertIsNotNone(solution)
+                names.append(board.name)
+            self.assertEqual(sorted(names), sorted(b.name for b in boards))
+
+        asyncio.run(run())
+
+    def test_several_event_loops(self):
+        # Requests wait for a free worker in every loop, the pool must not be bound to the first one.
+        async def run():
+            solutions = await asyncio.gather(*[solve_board_async(sample_board(), pool=self.pool) for _ in range(5)])
+            self.assertEqual([s.get_blocks() for s in solutions], [reference_blocks] * 5)
+
+        for _ in range(2):
+            asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
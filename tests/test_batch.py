@@ -0,0 +1,112 @@
+import unittest
+from pylazors.batch import *
+from pylazors.batch import _CompiledCache, _grid_key
+from pylazors._shm import publish, attach
+from unittest import mock
+from pylazors.verify import verify_solution
+from pylazors.generator import generate_board
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard
+from test_solevr import sample_board, reference_blocks
+
+
+def sample_variants():
+    """ Variants of sample_board() with the same grid, but different targets """
+
+    variants = [sample_board()]
+    for i, targets in enumerate([[(4, 1)], [(0, 3)], [(4, 1), (0, 3), (2, 3)]]):
+        board = sample_board().copy(with_targets=False)
+        board.name = 'variant_%d' % i
+        for x, y in targets:
+            board.add_target(x, y)
+        variants.append(board)
+    return variants
+
+
+class TestSolveMany(unittest.TestCase):
+
+    def test_solve_many(self):
+        boards = sample_variants() + [generate_board(4, 4, seed=i) for i in range(3)]
+        for processes, shared_memory in ((1, False), (2, False), (2, True)):
+            results = list(solve_many(boards, processes=processes, return_stats=True, shared_memory=shared_memory))
+            self.assertEqual(sorted(r[0].name for r in results), sorted(b.name for b in boards))
+            for board, solution, stats in results:
+                self.assertTrue(verify_solution(solution, board))
+                self.assertEqual(stats.solved, 1)
+                if board.name == 'test_1':
+                    self.assertEqual(solution.get_blocks(), reference_blocks)
+
+        # Threads also work with the GIL, only not in parallel, so force them to be used here.
+        with mock.patch('pylazors.batch.gil_enabled', return_value=False):
+            results = list(solve_many(boards, processes=2, backend='threads'))
+        self.assertEqual(sorted(r[0].name for r in results), sorted(b.name for b in boards))
+        self.assertTrue(all(verify_solution(solution, board) for board, solution in results))
+
+        # Worker threads share one cache, within the budget
+        caches = []
+
+        def new_cache(*args, **kwargs):
+            caches.append(_CompiledCache(*args, **kwargs))
+            return caches[-1]
+        budget = CompiledBoard(boards[0]).nbytes
+        with mock.patch('pylazors.batch.gil_enabled', return_value=False), \
+                mock.patch('pylazors.batch._CompiledCache', side_effect=new_cache):
+            results = list(solve_many(boards, processes=2, backend='threads', memory_budget=budget))
+        self.assertTrue(all(verify_solution(solution, board) for board, solution in results))
+        self.assertEqual(len(caches), 1)
+        self.assertLessEqual(caches[0].nbytes, budget)
+        self.assertEqual(caches[0].hits + caches[0].misses, len(boards))
+
+        # Cheapest first when solving serially
+        costs = [b.get_estimate_complexity() for b, _ in solve_many(boards)]
+        self.assertEqual(costs, sorted(costs))
+
+    def test_shared_memory_budget(self):
+        import pylazors._shm
+        boards = sample_variants() + [generate_board(4, 4, seed=i) for i in range(3)]
+        for memory_budget, publishes in ((None, True), (10 ** 9, True), (1000, False)):
+            with mock.patch('pylazors._shm.publish', side_effect=pylazors._shm.publish) as publish:
+                results = list(solve_many(boards, processes=2, memory_budget=memory_budget))
+            self.assertEqual(publish.called, publishes, memory_budget)
+            self.assertTrue(all(verify_solution(solution, board) for board, solution in results))
+
+    def test_compiled_cache(self):
+        cache = _CompiledCache()
+        compiled = [cache.get(b) for b in sample_variants()]
+        self.assertTrue(all(c is compiled[0] for c in compiled))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+        other = sample_board()
+        other.mod_block(0, 2, Block.BLANK)
+        budget = max(compiled[0].nbytes, CompiledBoard(other).nbytes)
+        cache = _CompiledCache(budget)
+        cache.get(sample_board())
+        cache.get(other)
+        self.assertLessEqual(cache.nbytes, budget)
+        cache.get(sample_board())
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+
+    def test_shared_tables(self):
+        board = sample_board()
+        compiled = CompiledBoard(board)
+        shared = publish({_grid_key(board): compiled})
+        if shared is None:
+            self.skipTest('shared memory not available')
+        try:
+            attached = attach(shared.descriptors)[_grid_key(board)]
+            self.assertEqual((attached.fixed, attached.free_cells), (compiled.fixed, compiled.free_cells))
+            self.assertEqual(list(attached.next_cell), list(compiled.next_cell))
+            with self.assertRaises(TypeError):
+                attached.transmit[0] = 0
+
+            cache = _CompiledCache(shared={_grid_key(board): attached})
+            self.assertIs(cache.get(sample_variants()[1]), attached)
+            self.assertEqual(cache.nbytes, 0)
+        finally:
+            shared.close()
+        # Unlinked, workers attaching now compile grids themselves
+        self.assertEqual(attach(shared.descriptors), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,6 +36,54 @@ class TestBFFFormat(unittest.TestCase):
         self.assertEqual(board.get_laser_sources(), [(5, 0, -1, 1), (5, 6, -1, -1)])
         self.assertEqual(board.get_targets(), [(4, 1), (0, 3)])
 
+    def test_bff_writer_with_solution(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_bff = os.path.join(tmp_dir, 'a.bff')
+            with open(tmp_bff, 'w') as f:
+                f.write(bff_content)
+            board = read_bff(tmp_bff)
+
+            solution = board.copy()
+            for x, y in ((0, 0), (1, 0), (2, 1)):
+                solution.mod_block(x, y, Block.REFLECT)
+
+            write_bff(solution, os.path.join(tmp_dir, 'b.bff'))
+            unsolved = read_bff(os.path.join(tmp_dir, 'b.bff'))
+            write_bff(solution, os.path.join(tmp_dir, 'c.bff'), with_solution=True)
+            solved = read_bff(os.path.join(tmp_dir, 'c.bff'))
+
+        self.assertEqual(unsolved.get_blocks(), board.get_blocks())
+        self.assertEqual(unsolved.get_available_blocks(), board.get_available_blocks())
+        self.assertEqual(unsolved.get_laser_sources(), board.get_laser_sources())
+        self.assertEqual(unsolved.get_targets(), board.get_targets())
+        self.assertEqual(solved.get_blocks(), solution.get_blocks())
+        self.assertEqual(len(solved.get_laser_segments()), 8)
+
+        # Two blocks on one cell, even if the counts match
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_bff = os.path.join(tmp_dir, 'd.bff')
+            with open(tmp_bff, 'w') as f:
+                f.write(bff_content.replace('A 3', 'A 3\nS A 0 0\nS A 1 0\nS A 1 0'))
+            with self.assertRaises(BFFReaderError) as error:
+                read_bff(tmp_bff)
+        self.assertEqual(error.exception.line_no, 10)
+
+    def test_iter_bff(self):
+        board_dir = os.path.join(os.path.dirname(__file__), '..', 'boards')
+        handout = sorted(os.listdir(os.path.join(board_dir, 'handout')))
+        misconstruction = sorted(os.listdir(os.path.join(board_dir, 'misconstruction')))
+
+        for use_processes in (False, True):
+            errors = []
+            boards = list(iter_bff([os.path.join(board_dir, 'handout'), os.path.join(board_dir, 'misconstruction')],
+                                   workers=2, use_processes=use_processes, errors=errors))
+            self.assertEqual(sorted([b.name + '.bff' for b in boards]), handout)
+            self.assertEqual(sorted([os.path.basename(e.file_name) for e in errors]), misconstruction)
+            self.assertTrue(all(isinstance(e, BFFReaderError) and e.message for e in errors))
+
+        with self.assertRaises(BFFReaderError):
+            list(iter_bff(os.path.join(board_dir, 'misconstruction', '*.bff'), workers=0))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import unittest
+from pylazors.formats.corpus import *
+from pylazors.formats.bff import read_bff
+import glob
+import tempfile
+import os
+
+
+class TestCorpusFormat(unittest.TestCase):
+
+    def test_corpus_round_trip(self):
+        bff_files = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'boards', 'handout', '*.bff')))
+        boards = [read_bff(f) for f in bff_files]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_corpus = os.path.join(tmp_dir, 'a.lzc')
+            self.assertEqual(write_corpus(boards, tmp_corpus), len(boards))
+
+            with read_corpus(tmp_corpus) as corpus:
+                self.assertEqual(len(corpus), len(boards))
+                self.assertEqual(corpus.names(), [b.name for b in boards])
+                for i, board in enumerate(boards):
+                    for loaded in (corpus[i], corpus[board.name]):
+                        self.assertEqual(loaded.name, board.name)
+                        self.assertEqual(loaded.get_blocks(), board.get_blocks())
+                        self.assertEqual(sorted(loaded.get_available_blocks()), sorted(board.get_available_blocks()))
+                        self.assertEqual(loaded.get_laser_sources(), board.get_laser_sources())
+                        self.assertEqual(loaded.get_targets(), board.get_targets())
+                self.assertNotIn('no_such_board', corpus)
+                with self.assertRaises(KeyError):
+                    corpus['no_such_board']
+                with self.assertRaises(IndexError):
+                    corpus[len(boards)]
+
+    def test_bff_dir_to_corpus(self):
+        bff_dir = os.path.join(os.path.dirname(__file__), '..', 'boards', 'misconstruction')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_corpus = os.path.join(tmp_dir, 'a.lzc')
+            count, skipped = bff_dir_to_corpus(bff_dir, tmp_corpus)
+            self.assertEqual(count + len(skipped), len(glob.glob(os.path.join(bff_dir, '*.bff'))))
+
+            with open(os.path.join(tmp_dir, 'b.lzc'), 'wb') as f:
+                f.write(b'not a corpus file at all')
+            with self.assertRaises(CorpusError):
+                read_corpus(os.path.join(tmp_dir, 'b.lzc'))
+
+
+if __name__ == '__main__':
+    unittest.main()
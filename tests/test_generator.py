@@ -0,0 +1,39 @@
+import unittest
+from pylazors.generator import *
+from pylazors._solver import _solve_large_board, _trace_lasers
+from pylazors.block import Block
+import tempfile
+import os
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_generate_board(self):
+        for seed in range(20):
+            board, solution = generate_board(8, 8, seed=seed, num_lasers=2, num_targets=4, return_solution=True)
+            self.assertEqual(board.get_targets(), generate_board(8, 8, seed=seed, num_lasers=2, num_targets=4)
+                             .get_targets())
+            self.assertEqual(len(board.get_targets()), 4)
+            self.assertEqual(sorted(board.get_available_blocks()), [Block.OPAQUE, Block.REFLECT, Block.REFLECT,
+                                                                    Block.REFLECT, Block.REFRACT])
+            self.assertFalse(any(b in (Block.OPAQUE, Block.REFLECT, Block.REFRACT)
+                                 for row in board.get_blocks() for b in row))
+
+            points = set()
+            for s in _trace_lasers(solution.get_blocks(), solution.get_laser_sources()):
+                points.update([s[:2], s[2:]])
+            self.assertTrue(set(board.get_targets()) <= points)
+
+    def test_generated_board_solvable(self):
+        board = generate_board(4, 4, seed=1, num_opaque=0, num_reflect=2, num_refract=0)
+        self.assertIsNotNone(_solve_large_board(board, print_log=False))
+
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertEqual(generate_corpus(tmp_dir, 3, 5, 5), 3)
+            self.assertEqual(len(os.listdir(tmp_dir)), 3)
+            self.assertEqual(generate_corpus(os.path.join(tmp_dir, 'a.lzc'), 3, 5, 5), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
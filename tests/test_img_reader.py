@@ -0,0 +1,35 @@
+import unittest
+from pylazors.formats.bff import read_bff
+import os
+import sys
+
+utilites_dir = os.path.join(os.path.dirname(__file__), '..', 'utilites')
+sys.path.insert(0, utilites_dir)
+
+import img_reader
+
+
+board_dir = os.path.join(os.path.dirname(__file__), '..', 'boards')
+screenshots = {'Mad_7.jpg': os.path.join(board_dir, 'handout', 'mad_7.bff'),
+               'Diagonal_3.jpg': os.path.join(board_dir, 'all', 'diagonal_3.bff')}
+
+
+class TestImageReader(unittest.TestCase):
+
+    def test_read_board_image(self):
+        for screenshot, bff_file in screenshots.items():
+            board = img_reader.read_board_image(os.path.join(utilites_dir, 'img_reader', screenshot))
+            expected = read_bff(bff_file)
+            self.assertEqual(board.name, expected.name)
+            self.assertEqual(board.get_blocks(), expected.get_blocks(), screenshot)
+            self.assertEqual(sorted(board.get_available_blocks()), sorted(expected.get_available_blocks()), screenshot)
+            self.assertEqual(sorted(board.get_laser_sources()), sorted(expected.get_laser_sources()), screenshot)
+            self.assertEqual(sorted(board.get_targets()), sorted(expected.get_targets()), screenshot)
+
+    def test_no_board(self):
+        with self.assertRaises(ValueError):
+            img_reader.read_board_image(img_reader.BG_img_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from pylazors.formats.bff import read_bff
+from pylazors.block import Block
+from pylazors._compiled import CompiledBoard
+from pylazors._jit import KernelTracer, get_tracer, numba
+from pylazors._solver import _trace_lasers
+import glob
+import os
+import random
+
+
+def random_placements(board, compiled, count, seed):
+    """ Yield *count* lists of lists of blocks, with the available blocks of *board* placed at random """
+
+    rng = random.Random(seed)
+    blocks = board.get_available_blocks()
+    for _ in range(count):
+        cells = [Block(v) if v >= 0 else Block.BLANK for v in compiled.fixed]
+        for c, block in zip(rng.sample(compiled.free_cells, len(blocks)), blocks):
+            cells[c] = block
+        yield [cells[y * compiled.width:(y + 1) * compiled.width] for y in range(compiled.height)]
+
+
+def laser(compiled, state):
+    """ Return (x, y, vx, vy) of a state index """
+
+    return compiled.point_xy(state >> 2) + (-1 if state & 1 else 1, -1 if state & 2 else 1)
+
+
+class TestTracingKernel(unittest.TestCase):
+
+    def test_kernel_parity(self):
+        bff_files = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'boards', 'all', '*.bff')))
+        self.assertGreater(len(bff_files), 0)
+        for fname in bff_files:
+            board = read_bff(fname)
+            compiled = CompiledBoard(board)
+            tracers = [KernelTracer(compiled, compiled_kernel=False)]
+            if numba is not None:
+                tracers.append(KernelTracer(compiled))
+            laser_sources = board.get_laser_sources()
+            source_states = [compiled.state(*l) for l in laser_sources]
+            for blocks in random_placements(board, compiled, 5, board.name):
+                cells = compiled.cells(blocks)
+                expected_history = set()
+                expected = _trace_lasers(blocks, laser_sources, expected_history)
+                for tracer in tracers:
+                    history = set()
+                    self.assertEqual(compiled.segments(tracer.trace(cells, source_states, history)), expected,
+                                     board.name)
+                    self.assertEqual({laser(compiled, s) for s in history}, expected_history, board.name)
+
+    def test_get_tracer(self):
+        compiled = CompiledBoard(read_bff(os.path.join(os.path.dirname(__file__), '..', 'boards', 'handout',
+                                                       'mad_1.bff')))
+        self.assertEqual(get_tracer(compiled, 'python'), compiled.trace)
+        if numba is not None:
+            self.assertIsInstance(get_tracer(compiled, 'numba').__self__, KernelTracer)
+        else:
+            self.assertEqual(get_tracer(compiled), compiled.trace)
+            with self.assertRaises(ImportError):
+                get_tracer(compiled, 'numba')
+        with self.assertRaises(ValueError):
+            get_tracer(compiled, 'unknown')
@@ -0,0 +1,36 @@
+import unittest
+from pylazors.formats.jsonl import *
+from test_png import sample_solution
+import tempfile
+import os
+
+
+class TestJSONLFormat(unittest.TestCase):
+
+    def test_jsonl_round_trip(self):
+        solution = sample_solution()
+        unsolved = solution.copy(with_laser_segments=False)
+        unsolved.clean_board()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_jsonl = os.path.join(tmp_dir, 'a.jsonl')
+            with JSONLWriter(tmp_jsonl, batch_size=2) as writer:
+                for i in range(5):
+                    writer.write(solution if i % 2 else unsolved, stats={'tested': i})
+            records = list(read_jsonl(tmp_jsonl))
+
+        self.assertEqual(len(records), 5)
+        self.assertEqual([r['stats']['tested'] for r in records], list(range(5)))
+        self.assertEqual([r['solved'] for r in records], [False, True, False, True, False])
+        self.assertEqual(records[1]['placements'], [['A', 0, 0], ['A', 1, 0], ['A', 2, 1]])
+        self.assertEqual(records[0]['placements'], [])
+
+        board = board_from_dict(records[1])
+        self.assertEqual(board.get_blocks(), solution.get_blocks())
+        self.assertEqual(board.get_laser_segments(), solution.get_laser_segments())
+        self.assertEqual(board.get_available_blocks(), solution.get_available_blocks())
+        self.assertEqual(board_from_dict(records[0]).get_blocks(), unsolved.get_blocks())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,9 @@ from pylazors.board import *
 from pylazors.block import *
 from pylazors.formats.png import write_png
 from PIL import Image
+from unittest import mock
+import concurrent.futures
+import pylazors.formats.png
 import tempfile
 import os
 
@@ -40,6 +43,18 @@ class TestPNGFormat(unittest.TestCase):
 
             self.assertEqual('PNG', img.format)
 
+    def test_texture_loading_threads(self):
+        # Threads writing the first images at once all see every texture, loaded only once.
+        load_texture = pylazors.formats.png._load_texture
+        with mock.patch('pylazors.formats.png._textures', None), \
+                mock.patch('pylazors.formats.png._load_texture', side_effect=load_texture) as loader, \
+                tempfile.TemporaryDirectory() as tmp_dir, concurrent.futures.ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(write_png, sample_solution(), os.path.join(tmp_dir, '%d.png' % i))
+                       for i in range(4)]
+            for future in futures:
+                future.result()
+            self.assertEqual(loader.call_count, 10)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
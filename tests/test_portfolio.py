@@ -0,0 +1,155 @@
+import unittest
+from pylazors.portfolio import *
+from pylazors.solver import solve_board
+from pylazors.formats.bff import read_bff
+from pylazors.verify import verify_solution
+from test_solevr import sample_board, reference_blocks
+from test_sat import pysat_stub
+from unittest import mock
+from collections import Counter
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def test_solve_portfolio(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, 'portfolio.jsonl')
+            os.environ[PORTFOLIO_LOG_ENV] = log_file
+            try:
+                wins_before = sum(wins.values())
+                solution, stats = solve_board(sample_board(), strategy='portfolio', return_stats=True,
+                                              print_log=False)
+                self.assertEqual(solution.get_blocks(), reference_blocks)
+                self.assertTrue(stats.strategy.startswith('portfolio/'))
+                self.assertEqual((stats.boards, stats.solved), (1, 1))
+
+                solution = solve_board(sample_board(), strategy='portfolio', members=['large', 'anytime:3'],
+                                       processes=1, print_log=False)
+                self.assertEqual(solution.get_blocks(), reference_blocks)
+                self.assertEqual(sum(wins.values()), wins_before + 2)
+                self.assertEqual(sum(load_wins(log_file).values()), 2)
+            finally:
+                del os.environ[PORTFOLIO_LOG_ENV]
+
+        # Proven unsolvable by an exhaustive member
+        board = sample_board()
+        board.add_target(3, 2)
+        self.assertIsNone(solve_board(board, strategy='portfolio', members=['compiled', 'small:0'], print_log=False))
+
+    def test_thread_backend(self):
+        # Threads also work with the GIL, only not in parallel, so force them to be used here.
+        with mock.patch('pylazors.portfolio.gil_enabled', return_value=False):
+            solution, stats = solve_board(sample_board(), strategy='portfolio', backend='threads', return_stats=True,
+                                          print_log=False)
+            self.assertEqual(solution.get_blocks(), reference_blocks)
+            self.assertEqual((stats.boards, stats.solved), (1, 1))
+
+            board = sample_board()
+            board.add_target(3, 2)
+            self.assertIsNone(solve_board(board, strategy='portfolio', backend='threads',
+                                          members=['anytime:0', 'compiled'], print_log=False))
+        with self.assertRaises(ValueError):
+            solve_board(sample_board(), strategy='portfolio', backend='fibers', print_log=False)
+
+    def test_thread_backend_slow_loser(self):
+        # A losing member far from its next progress callback must not hold the winner back.
+        from pylazors.portfolio import _solve_member
+        release = threading.Event()
+
+        def solve_member(member, board, stats=None, progress=None):
+            if member == 'large':
+                release.wait(5)
+                return None
+            return _solve_member(member, board, stats, progress)
+
+        try:
+            with mock.patch('pylazors.portfolio.gil_enabled', return_value=False), \
+                    mock.patch('pylazors.portfolio._solve_member', side_effect=solve_member):
+                start_time = time.perf_counter()
+                solution = solve_board(sample_board(), strategy='portfolio', backend='threads',
+                                       members=['large', 'compiled'], print_log=False)
+                self.assertLess(time.perf_counter() - start_time, 2)
+            self.assertEqual(solution.get_blocks(), reference_blocks)
+        finally:
+            release.set()
+
+    def test_thread_backend_stops_losers(self):
+        # Once the race is over, the progress callback of a losing member raises.
+        from pylazors.portfolio import _solve_member
+        stopped = threading.Event()
+
+        def solve_member(member, board, stats=None, progress=None):
+            if member == 'large':
+                try:
+                    for candidates in range(500):
+                        time.sleep(0.01)
+                        progress(candidates)
+                except Exception:
+                    stopped.set()
+                    raise
+                return None
+            return _solve_member(member, board, stats, progress)
+
+        with mock.patch('pylazors.portfolio.gil_enabled', return_value=False), \
+                mock.patch('pylazors.portfolio._solve_member', side_effect=solve_member):
+            solution = solve_board(sample_board(), strategy='portfolio', backend='threads',
+                                   members=['large', 'compiled'], print_log=False)
+        self.assertEqual(solution.get_blocks(), reference_blocks)
+        self.assertTrue(stopped.wait(2))
+
+    def test_thread_backend_exit(self):
+        # A loser far from its next progress callback does not keep the interpreter from exiting.
+        script = textwrap.dedent("""
+            import sys, time
+            from unittest import mock
+            sys.path.insert(0, %r)
+            import pylazors.portfolio
+            from pylazors.solver import solve_board
+            from test_solevr import sample_board
+
+            solve_member = pylazors.portfolio._solve_member
+            def slow_member(member, board, stats=None, progress=None):
+                if member == 'large':
+                    time.sleep(60)
+                return solve_member(member, board, stats, progress)
+
+            with mock.patch('pylazors.portfolio.gil_enabled', return_value=False), \\
+                    mock.patch('pylazors.portfolio._solve_member', side_effect=slow_member):
+                solution = solve_board(sample_board(), strategy='portfolio', backend='threads',
+                                       members=['large', 'compiled'], print_log=False)
+            assert solution is not None
+        """ % os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', script], check=True, timeout=20,
+                       cwd=os.path.join(os.path.dirname(__file__), '..'))
+
+    def test_sat_member_proves_no_solution(self):
+        # A 'sat' member finishing without a solution ends the race, with python-sat as with the built-in solver.
+        board = sample_board()
+        board.add_target(3, 2)
+        with pysat_stub():
+            for backend in ('processes', 'threads'):
+                with mock.patch('pylazors.portfolio.gil_enabled', return_value=False):
+                    solution, stats = solve_board(board, strategy='portfolio', backend=backend,
+                                                  members=['sat', 'small:0'], return_stats=True, print_log=False)
+                self.assertIsNone(solution)
+                self.assertEqual(stats.strategy, 'portfolio/sat', backend)
+
+
+    def test_complete_member_races(self):
+        # 'small' gives up on yarn_5 (too many combinations), so it must not be the only member racing.
+        board = read_bff(os.path.join(os.path.dirname(__file__), '..', 'boards', 'handout', 'yarn_5.bff'))
+        with mock.patch('pylazors.portfolio.wins', Counter({'small:0': 2})):
+            for members in (['small:0', 'large'], ['small:0']):
+                solution = solve_board(board, strategy='portfolio', members=members, processes=1, print_log=False)
+                self.assertTrue(verify_solution(solution, board), members)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from pylazors.profiling import *
+from pylazors._solver import _solve_large_board
+from test_solevr import sample_board
+import tempfile
+import os
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profiled(self):
+        board = sample_board()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with profiled(board.name, tmp_dir) as p:
+                solution = _solve_large_board(board, print_log=False)
+
+            self.assertIsNotNone(solution)
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, board.name + '.prof')))
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, board.name + '.collapsed')))
+            self.assertIn('_trace_lasers', ' '.join(r[0] for r in p.top(5)))
+            self.assertIn('_trace_lasers', summarize(tmp_dir, 5))
+
+    def test_profile_dir(self):
+        os.environ.pop(PROFILE_ENV, None)
+        self.assertIsNone(profile_dir())
+        self.assertEqual(profile_dir('a'), 'a')
+        os.environ[PROFILE_ENV] = 'b'
+        try:
+            self.assertEqual(profile_dir(), 'b')
+        finally:
+            del os.environ[PROFILE_ENV]
+
+
+if __name__ == '__main__':
+    unittest.main()
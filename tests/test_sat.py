@@ -0,0 +1,118 @@
+import unittest
+from pylazors.sat import *
+from pylazors.sat import _solve_sat
+from pylazors._cdcl import CDCLSolver
+from pylazors.stats import SolveStats
+from pylazors.formats.bff import read_bff
+from test_solevr import sample_board, reference_blocks
+from unittest import mock
+import itertools
+import os
+import random
+import types
+
+
+class StubSolver:
+    """ Same interface as pysat.solvers.Solver, forwarding to CDCLSolver """
+
+    def __init__(self, bootstrap_with=()):
+        self._solver = CDCLSolver(bootstrap_with)
+        self._budget = None
+
+    def add_clause(self, clause):
+        # Like python-sat, return nothing
+        self._solver.add_clause(clause)
+
+    def conf_budget(self, budget):
+        self._budget = budget
+
+    def solve(self):
+        return self._solver.solve()
+
+    def solve_limited(self):
+        return self._solver.solve(self._budget)
+
+    def get_model(self):
+        return [v if value else -v for v, value in sorted(self._solver.model().items())]
+
+
+def pysat_stub(solver_class=StubSolver):
+    """ Return a mock.patch.dict() context installing *solver_class* as pysat.solvers.Solver """
+
+    solvers = types.ModuleType('pysat.solvers')
+    solvers.Solver = solver_class
+    return mock.patch.dict('sys.modules', {'pysat': types.ModuleType('pysat'), 'pysat.solvers': solvers})
+
+
+class TestCDCLSolver(unittest.TestCase):
+
+    def test_random_formulas(self):
+        rng = random.Random(0)
+        for _ in range(100):
+            n = rng.randint(3, 10)
+            clauses = [[rng.choice((1, -1)) * rng.randint(1, n) for _ in range(3)] for _ in range(rng.randint(1, 5 * n))]
+            expected = any(all(any(bits[abs(l) - 1] == (l > 0) for l in c) for c in clauses)
+                           for bits in itertools.product((False, True), repeat=n))
+            solver = CDCLSolver(clauses)
+            self.assertEqual(solver.solve(), expected)
+            if expected:
+                model = solver.model()
+                self.assertTrue(all(any(model.get(abs(l), False) == (l > 0) for l in c) for c in clauses))
+
+    def test_incremental(self):
+        # 4 pigeons in 3 holes, with "each pigeon in a hole" added after solving the rest
+        var = lambda i, j: i * 3 + j + 1
+        solver = CDCLSolver([[-var(a, j), -var(b, j)] for j in range(3) for a in range(4) for b in range(a + 1, 4)])
+        self.assertTrue(solver.solve())
+        for i in range(3):
+            solver.add_clause([var(i, j) for j in range(3)])
+        self.assertTrue(solver.solve())
+        solver.add_clause([var(3, j) for j in range(3)])
+        self.assertFalse(solver.solve())
+
+
+class TestSAT(unittest.TestCase):
+
+    def test_solve_sat(self):
+        stats = SolveStats()
+        solution = _solve_sat(sample_board(), backend='python', print_log=False, stats=stats)
+        self.assertEqual(solution.get_blocks(), reference_blocks)
+        self.assertEqual((stats.strategy, stats.solved), ('sat', 1))
+
+        board = sample_board()
+        board.add_target(3, 2)
+        self.assertIsNone(_solve_sat(board, backend='python', print_log=False))
+
+        # With progress, SAT calls are split into rounds of conflicts with a progress call between them
+        calls = []
+        with mock.patch('pylazors.sat._progress_conflicts', 1):
+            solution = _solve_sat(sample_board(), backend='python', print_log=False, progress=calls.append)
+        self.assertEqual(solution.get_blocks(), reference_blocks)
+        self.assertEqual(calls[0], 0)
+
+    def test_solve_sat_pysat(self):
+        # Boards with spurious models, so blocking clauses are added on the way
+        with pysat_stub():
+            for name in ('diagonal_2', 'dejavu_1', 'crossed_8'):
+                board = read_bff(os.path.join(os.path.dirname(__file__), '..', 'boards', 'all', name + '.bff'))
+                solution = _solve_sat(board, backend='pysat', print_log=False)
+                self.assertIsNotNone(solution, name)
+                self.assertIsNotNone(_solve_sat(board, backend='auto', print_log=False), name)
+
+    def test_encode_board(self):
+        encoding = encode_board(sample_board())
+        self.assertEqual(len(encoding.cell_vars), 8)
+        dimacs = encoding.to_dimacs()
+        self.assertIn('p cnf %d %d' % (encoding.num_vars, len(encoding.clauses)), dimacs)
+        self.assertEqual(dimacs.count(' 0\n'), len(encoding.clauses))
+
+        # Models of the encoding decode into placements of the available blocks
+        solver = CDCLSolver(encoding.clauses)
+        self.assertTrue(solver.solve())
+        cells = encoding.decode(solver.model())
+        self.assertEqual(sorted(cells), sorted([int(Block.FIXED_OPAQUE)] + [int(Block.REFLECT)] * 3 +
+                                               [int(Block.BLANK)] * 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
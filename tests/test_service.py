@@ -0,0 +1,75 @@
+import unittest
+from pylazors.service import *
+from pylazors.formats.bff import read_bff
+from pylazors.generator import generate_board
+from test_solevr import sample_board, reference_blocks
+import os
+import tempfile
+
+
+board_dir = os.path.join(os.path.dirname(__file__), '..', 'boards', 'all')
+
+
+class TestSolverService(unittest.TestCase):
+
+    def test_service_tcp(self):
+        with SolverService(('127.0.0.1', 0), workers=1, timeout=30) as service:
+            service.start()
+            with SolverClient(service.address, timeout=30) as client:
+                self.assertTrue(client.ping())
+
+                solution, reply = client.solve(sample_board(), return_reply=True)
+                self.assertEqual(solution.get_blocks(), reference_blocks)
+                self.assertFalse(reply['cached'])
+
+                board = sample_board()
+                board.name = 'renamed'
+                solution, reply = client.solve(board, return_reply=True)
+                self.assertEqual(solution.get_blocks(), reference_blocks)
+                self.assertEqual(solution.name, 'renamed')
+                self.assertTrue(reply['cached'])
+
+                with open(os.path.join(board_dir, 'numbered_6.bff')) as f:
+                    solution = client.solve(f.read())
+                self.assertIsNotNone(solution)
+                self.assertGreater(len(solution.get_laser_segments()), 0)
+
+                with self.assertRaises(ServiceError):
+                    client.solve('GRID START\nGRID STOP\n')
+                # The connection is still usable after an error reply
+                with self.assertRaises(ServiceError):
+                    client.solve(read_bff(os.path.join(board_dir, 'yarn_5.bff')), timeout=0.05)
+
+                stats = client.stats()
+                self.assertEqual(stats['cache_hits'], 1)
+                self.assertEqual(stats['timeouts'], 1)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets not available')
+    def test_service_unix(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            address = os.path.join(tmp_dir, 'pylazors.sock')
+            with SolverService(address, workers=0) as service:
+                service.start()
+                with SolverClient(address) as client:
+                    self.assertEqual(client.solve(sample_board()).get_blocks(), reference_blocks)
+            self.assertFalse(os.path.exists(address))
+
+
+    def test_timeout_frees_worker(self):
+        # An unsolvable board searched for far longer than its timeout
+        board = generate_board(10, 10, seed=1, num_opaque=4, num_reflect=8, num_refract=2)
+        board.add_target(1, 2)
+        for workers in (1, 0):
+            with SolverService(('127.0.0.1', 0), workers=workers, max_concurrent=1, timeout=30) as service:
+                service.start()
+                with SolverClient(service.address, timeout=30) as client:
+                    with self.assertRaises(ServiceError):
+                        client.solve(board, timeout=0.2)
+                    # The timed out board gave its slot and worker back
+                    self.assertEqual(client.solve(sample_board(), timeout=5).get_blocks(), reference_blocks)
+                    stats = client.stats()
+                    self.assertEqual((stats['timeouts'], stats['busy'], stats['running']), (1, 0, 0), workers)
+
+
+if __name__ == '__main__':
+    unittest.main()
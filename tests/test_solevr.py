@@ -1,7 +1,13 @@
 import unittest
 from pylazors.board import *
-from pylazors.solver import _solve_large_board, _solve_board, solve_board
+from pylazors.solver import _solve_large_board, _solve_board, solve_board, solve_anytime, resolve, hint
 from pylazors.block import *
+from pylazors.stats import SolveStats
+from pylazors._compiled import CompiledBoard, TraceCache
+from pylazors._solver import _solve_compiled_board, _order_locations, _prefix_combinations
+from pylazors.verify import verify_solution
+from itertools import combinations
+import random
 
 
 def sample_board():
@@ -30,6 +36,27 @@ class TestSolver(unittest.TestCase):
 
         self.assertEqual(reference_blocks, solution.get_blocks())
 
+    def test_solve_board_stats(self):
+        board = sample_board()
+        solution, stats = solve_board(board, return_stats=True, print_log=False)
+        self.assertEqual(reference_blocks, solution.get_blocks())
+        self.assertEqual(stats.solved, 1)
+        self.assertGreater(stats.candidates, 0)
+        self.assertEqual(stats.candidates, stats.traces)
+
+        stats = SolveStats()
+        solution = _solve_large_board(board, print_log=False, stats=stats)
+        self.assertEqual(reference_blocks, solution.get_blocks())
+        self.assertEqual(stats.strategy, 'large')
+        self.assertEqual(stats.candidates, stats.traces)
+        self.assertGreaterEqual(stats.trace_steps, stats.segments)
+        self.assertGreater(stats.segments, 0)
+        self.assertEqual(set(stats.phase_time), set(SolveStats.phases))
+
+        total = SolveStats.sum([stats, stats])
+        self.assertEqual(total.boards, 2)
+        self.assertEqual(total.candidates, 2 * stats.candidates)
+
     def test_solve_board(self):
         board = sample_board()
         solution = _solve_board(board, print_log=False)
@@ -42,6 +69,143 @@ class TestSolver(unittest.TestCase):
 
         self.assertEqual(reference_blocks, solution.get_blocks())
 
+    def test_location_ordering(self):
+        board = sample_board()
+        locations = [(x, y) for y in range(3) for x in range(3) if (x, y) != (0, 2)]
+        ordered = _order_locations(locations, board.get_blocks(), board.get_laser_sources(), board.get_targets())
+        self.assertEqual(sorted(ordered), sorted(locations))
+        # Cells next to targets (4, 1) and (0, 3) go last
+        self.assertEqual(set(ordered[-3:]), {(1, 0), (2, 0), (0, 1)})
+
+        for k in range(4):
+            prefix = list(_prefix_combinations(locations, k))
+            self.assertEqual(sorted(prefix), sorted(combinations(locations, k)))
+            # Combinations of the first 4 locations come first
+            first = sorted(combinations(locations[:4], k))
+            self.assertEqual(sorted(prefix[:len(first)]), first)
+
+        for ordering in ('beams', None):
+            solution = _solve_large_board(board, print_log=False, ordering=ordering)
+            self.assertEqual(reference_blocks, solution.get_blocks())
+            solution = _solve_compiled_board(board, print_log=False, ordering=ordering)
+            self.assertEqual(reference_blocks, solution.get_blocks())
+        with self.assertRaises(ValueError):
+            _solve_large_board(board, print_log=False, ordering='unknown')
+
+    def test_solve_board_strategies(self):
+        for strategy in ('auto', 'small', 'large', 'compiled', 'anytime', 'sat'):
+            solution, stats = solve_board(sample_board(), strategy=strategy, return_stats=True, print_log=False)
+            self.assertEqual(reference_blocks, solution.get_blocks())
+            self.assertEqual(stats.solved, 1)
+        with self.assertRaises(ValueError):
+            solve_board(sample_board(), strategy='unknown')
+
+        # Options of some strategies only, ignored by 'auto'
+        for kwargs in ({'ordering': None}, {'tracer': 'python'}, {'ordering': None, 'tracer': 'python'}):
+            solution = solve_board(sample_board(), print_log=False, **kwargs)
+            self.assertEqual(reference_blocks, solution.get_blocks())
+            solution = solve_board(sample_board(), strategy='compiled', print_log=False, **kwargs)
+            self.assertEqual(reference_blocks, solution.get_blocks())
+        # A misspelled option is not ignored
+        for kwargs in ({'odering': None}, {'max_cnadidates': 1}):
+            with self.assertRaises(TypeError):
+                solve_board(sample_board(), print_log=False, **kwargs)
+
+    def test_solve_anytime(self):
+        board = sample_board()
+        solution, targets_hit, stats = solve_anytime(board, seed=0, return_stats=True, print_log=False)
+        self.assertEqual(reference_blocks, solution.get_blocks())
+        self.assertEqual(targets_hit, 2)
+        self.assertEqual(stats.strategy, 'anytime')
+        self.assertEqual(stats.solved, 1)
+
+        # Without a solution, the search is exhaustive and returns the best partial solution
+        board.add_target(3, 2)
+        best, targets_hit = solve_anytime(board, seed=0, print_log=False)
+        self.assertEqual(targets_hit, 2)
+        self.assertGreater(len(best.get_laser_segments()), 0)
+
+        best, targets_hit = solve_anytime(board, seed=0, max_candidates=1, print_log=False)
+        self.assertLessEqual(targets_hit, 2)
+        self.assertEqual(sorted(b for row in best.get_blocks() for b in row if not b.is_fixed() and b != Block.BLANK),
+                         [Block.REFLECT] * 3)
+
+    def test_trace_cache(self):
+        board = sample_board()
+        compiled = CompiledBoard(board)
+        source_states = [compiled.state(*l) for l in board.get_laser_sources()]
+        cache = TraceCache(compiled, source_states, maxsize=8, max_shapes=4)
+        rng = random.Random(0)
+        values = [int(b) for b in (Block.BLANK, Block.OPAQUE, Block.REFLECT, Block.REFRACT)]
+        for _ in range(500):
+            cells = [v if v >= 0 else rng.choice(values) for v in compiled.fixed]
+            passed = compiled.trace(cells, source_states)
+            self.assertEqual(cache.lit_points(cells), compiled.lit_points(passed))
+            self.assertEqual(set(cache.trace(cells)), set(passed))
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(cache.hit_rate, cache.hits / (cache.hits + cache.misses))
+        self.assertTrue(all(sum(len(beams) for _, beams in shapes.values()) <= 8 for shapes in cache._shapes))
+
+        stats = SolveStats()
+        solution = _solve_compiled_board(board, print_log=False, stats=stats)
+        self.assertEqual(reference_blocks, solution.get_blocks())
+        self.assertEqual(solution.get_laser_segments(),
+                         _solve_compiled_board(board, print_log=False, trace_cache=False).get_laser_segments())
+        self.assertEqual(stats.trace_cache_hits + stats.trace_cache_misses, stats.candidates * 2)
+        self.assertEqual(stats.traces, stats.trace_cache_misses)
+
+    def test_resolve(self):
+        board = sample_board()
+        previous = solve_board(board, print_log=False)
+        solution, stats = resolve(board, previous, return_stats=True, print_log=False)
+        self.assertEqual(reference_blocks, solution.get_blocks())
+        self.assertEqual(solution.get_laser_segments(), previous.get_laser_segments())
+        self.assertEqual((stats.strategy, stats.candidates), ('resolve', 1))
+
+        # One block less: the previous placement without one of its blocks
+        board = sample_board().copy(with_targets=False, with_available_blocks=False)
+        board.add_available_blocks(Block.REFLECT, 2)
+        board.add_target(4, 1)
+        solution, stats = resolve(board, previous, return_stats=True, print_log=False)
+        self.assertEqual(stats.strategy, 'resolve')
+        self.assertTrue(verify_solution(solution, board))
+
+        # Not solvable any more, proven by the fallback search
+        board = sample_board()
+        board.add_target(3, 2)
+        solution, stats = resolve(board, previous, return_stats=True, print_log=False)
+        self.assertIsNone(solution)
+        self.assertEqual(stats.strategy, 'resolve/compiled')
+        self.assertIsNone(resolve(board, previous, fallback=None, print_log=False))
+
+        # Strategy options only go to the fallback search
+        solution, stats = resolve(board, previous, return_stats=True, print_log=False, ordering=None, tracer='python')
+        self.assertIsNone(solution)
+        self.assertEqual(stats.strategy, 'resolve/compiled')
+        self.assertIsNotNone(resolve(sample_board(), previous, fallback='large', print_log=False, ordering=None))
+
+    def test_pinned_and_hint(self):
+        board = sample_board()
+        placed = [(x, y, b) for y, row in enumerate(reference_blocks) for x, b in enumerate(row) if b == Block.REFLECT]
+        for strategy in ('auto', 'compiled', 'sat'):
+            solution = solve_board(board, pinned=placed[:2], strategy=strategy, print_log=False)
+            self.assertEqual(reference_blocks, solution.get_blocks())
+            self.assertTrue(verify_solution(solution, board))
+
+        # A half-finished board: its placed blocks are kept
+        half_finished = board.copy()
+        half_finished.mod_block(*placed[0])
+        self.assertEqual(hint(half_finished, print_log=False), placed[1])
+        self.assertIsNone(hint(board, pinned=placed, print_log=False))
+
+        wrong = [(1, 1, Block.REFLECT)]
+        self.assertIsNone(solve_board(board, pinned=wrong, print_log=False))
+        self.assertIsNone(hint(board, pinned=wrong, print_log=False))
+        with self.assertRaises(ValueError):
+            solve_board(board, pinned=[(0, 2, Block.REFLECT)], print_log=False)
+        with self.assertRaises(ValueError):
+            solve_board(board, pinned={(0, 0): Block.OPAQUE}, print_log=False)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import unittest
+import itertools
+import os
+import sys
+import threading
+import time
+
+utilites_dir = os.path.join(os.path.dirname(__file__), '..', 'utilites')
+sys.path.insert(0, utilites_dir)
+
+from solve_screenshots import solve_screenshots, new_stats
+from pylazors.solver import solve_board
+from pylazors.verify import verify_solution
+from unittest import mock
+
+
+screenshot_dir = os.path.join(utilites_dir, 'img_reader')
+mad_7 = os.path.join(screenshot_dir, 'Mad_7.jpg')
+diagonal_3 = os.path.join(screenshot_dir, 'Diagonal_3.jpg')
+
+
+def slow_solve(board, kwargs):
+    # Solving function of the pipeline, taking a minute for mad_7
+    if board.name == 'mad_7':
+        time.sleep(60)
+    return solve_board(board, print_log=False, **kwargs)
+
+
+class TestSolveScreenshots(unittest.TestCase):
+
+    def test_input_order(self):
+        with open(diagonal_3, 'rb') as f:
+            diagonal_3_bytes = f.read()
+        # A slow board first, so that later ones finish before it
+        sources = [mad_7, diagonal_3_bytes, diagonal_3, mad_7]
+        for solvers in (0, 1):
+            stats = new_stats(solvers=solvers)
+            results = list(solve_screenshots(sources, solvers=solvers, stats=stats))
+            self.assertEqual([r[0] for r in results], sources)
+            self.assertEqual([r[1].name for r in results], ['mad_7', 'screenshot', 'diagonal_3', 'mad_7'])
+            for source, board, solution in results:
+                self.assertTrue(verify_solution(solution, board))
+            self.assertEqual([stage.items for stage in stats.stages], [4, 4, 4])
+            self.assertEqual(stats.errors, [])
+
+    def test_errors(self):
+        sources = [b'not an image', os.path.join(screenshot_dir, 'BG.png'), diagonal_3, 'no_such_file.png']
+        stats = new_stats(solvers=0)
+        results = list(solve_screenshots(sources, solvers=0, stats=stats))
+        self.assertEqual([r[0] for r in results], sources)
+        for source, board, solution in results:
+            if source is diagonal_3:
+                self.assertTrue(verify_solution(solution, board))
+            else:
+                self.assertEqual((board, solution), (None, None))
+        self.assertCountEqual([source for source, _ in stats.errors], sources[:2] + sources[3:])
+        self.assertEqual([stage.errors for stage in stats.stages], [2, 1, 0])
+
+    def test_close_endless_source(self):
+        threads_before = threading.active_count()
+        stats = new_stats(solvers=0)
+        results = solve_screenshots(itertools.cycle([diagonal_3]), solvers=0, queue_size=2, stats=stats)
+        for _ in range(3):
+            source, board, solution = next(results)
+            self.assertTrue(verify_solution(solution, board))
+        start_time = time.perf_counter()
+        results.close()
+        self.assertLess(time.perf_counter() - start_time, 5)
+        # All pipeline threads are joined
+        self.assertEqual(threading.active_count(), threads_before)
+        self.assertGreaterEqual(stats.stages[-1].items, 3)
+
+
+    def test_source_error(self):
+        def sources():
+            yield diagonal_3
+            raise OSError('Connection lost')
+
+        stats = new_stats(solvers=0)
+        results = solve_screenshots(sources(), solvers=0, stats=stats)
+        source, board, solution = next(results)
+        self.assertTrue(verify_solution(solution, board))
+        with self.assertRaises(OSError):
+            next(results)
+        self.assertEqual(stats.errors, [(None, 'OSError: Connection lost')])
+
+    def test_close_while_solving(self):
+        # Boards being solved in worker processes are not waited for. Two processes, so that diagonal_3 is
+        # solved even if mad_7 gets to a process first.
+        stats = new_stats(solvers=2)
+        with mock.patch('solve_screenshots._solve', slow_solve):
+            results = solve_screenshots([diagonal_3, mad_7], solvers=2, stats=stats)
+            source, board, solution = next(results)
+            self.assertTrue(verify_solution(solution, board))
+            time.sleep(0.5)
+            results.close()
+        self.assertLess(stats.wall_time, 20)
+        self.assertEqual(stats.errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from pylazors.formats.svg import write_svg
+from test_png import sample_solution
+import xml.etree.ElementTree as ET
+import tempfile
+import os
+
+
+class TestSVGFormat(unittest.TestCase):
+
+    def test_svg_writer(self):
+        solution = sample_solution()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_svg = os.path.join(tmp_dir, 'a.svg')
+
+            write_svg(solution, tmp_svg, note='a note')
+
+            try:
+                root = ET.parse(tmp_svg).getroot()
+            except (IOError, ET.ParseError):
+                self.fail('Output SVG file not exists or is not valid XML.')
+
+        ns = {'svg': 'http://www.w3.org/2000/svg'}
+        self.assertEqual('{http://www.w3.org/2000/svg}svg', root.tag)
+        self.assertEqual(len(root.findall('svg:g/svg:line', ns)), 8)
+        symbols = [s.get('id') for s in root.findall('svg:defs/svg:symbol', ns)]
+        self.assertEqual(len(symbols), len(set(symbols)))
+        self.assertIn('tex_target_hit', symbols)
+        self.assertNotIn('tex_target', symbols)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from pylazors.verify import *
+from pylazors.block import *
+from test_solevr import sample_board, reference_blocks
+
+
+def submission(blocks):
+    board = sample_board()
+    board.load_blocks(blocks)
+    return board
+
+
+class TestVerify(unittest.TestCase):
+
+    def test_verify_solution(self):
+        level = sample_board()
+        self.assertTrue(verify_solution(submission(reference_blocks)))
+        self.assertTrue(verify_solution(submission(reference_blocks), level))
+        self.assertFalse(verify_solution(level))
+
+        wrong_place = [[Block.REFLECT, Block.REFLECT, Block.REFLECT],
+                       [Block.BLANK, Block.BLANK, Block.BLANK],
+                       [Block.FIXED_OPAQUE, Block.BLANK, Block.BLANK]]
+        wrong_type = [[Block.REFLECT, Block.REFLECT, Block.BLANK],
+                      [Block.BLANK, Block.BLANK, Block.OPAQUE],
+                      [Block.FIXED_OPAQUE, Block.BLANK, Block.BLANK]]
+        fixed_moved = [[Block.REFLECT, Block.REFLECT, Block.BLANK],
+                       [Block.BLANK, Block.BLANK, Block.REFLECT],
+                       [Block.BLANK, Block.FIXED_OPAQUE, Block.BLANK]]
+        self.assertEqual(verify_solution(submission(wrong_place), level, return_reason=True),
+                         'Not all targets are on the laser path')
+        self.assertEqual(verify_solution(submission(wrong_type), level, return_reason=True),
+                         'Placed blocks mismatch available blocks')
+        self.assertEqual(verify_solution(submission(fixed_moved), level, return_reason=True),
+                         'Fixed blocks are changed')
+
+    def test_verify_many(self):
+        level = sample_board()
+        free = [(x, y) for y in range(3) for x in range(3) if (x, y) != (0, 2)]
+        boards = []
+        for i, a in enumerate(free):
+            for b in free[i + 1:]:
+                for c in free[free.index(b) + 1:]:
+                    blocks = level.get_blocks()
+                    for x, y in (a, b, c):
+                        blocks[y][x] = Block.REFLECT
+                    boards.append(submission(blocks))
+
+        expected = [verify_solution(b, level) for b in boards]
+        self.assertIn(True, expected)
+        self.assertEqual(verify_many(boards), expected)
+        self.assertEqual(verify_many(boards, compile_level(level)), expected)
+        self.assertEqual(verify_many(boards, level, vectorized=True), expected)
+        self.assertEqual(verify_many(boards + [level], vectorized=True), expected + [False])
+
+
+if __name__ == '__main__':
+    unittest.main()
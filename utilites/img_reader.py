@@ -1,27 +1,345 @@
-from PIL import Image, ImageChops, ImageEnhance
+"""
+Recognize a Lazors board from a screenshot of the game, see read_board_image().
+
+A screenshot is compared with a screenshot of the empty background (img_reader/BG.png) of the same size:
+
+    1. Grid: the difference from the background gives the tiles (and blocks) of the board. The cell size is the
+       period of their projection on both axes (the first peak of its autocorrelation), and the grid is placed
+       where tiles are the most above the gaps between them.
+    2. Cells: the inner part of every tile is scaled to _CELL x _CELL pixels, and compared with the block
+       textures of pylazors/formats/textures with normalized cross-correlation (NCC), all cells against all
+       textures in one matrix product, and by brightness. Cells no different from the background have no tile
+       (no block allowed).
+    3. Targets and laser sources: the middle of every cell side is compared with the target texture (NCC), on
+       half of it next to a block. Where a laser is on, a source is a shining end of a beam, and the beam gives
+       its direction, otherwise sources are found with the source texture.
+
+The background, and textures scaled and blended over the background color, are loaded once and kept for all
+later calls. Only the grid positions are searched (not every pixel), so the correlations are plain dot products
+of normalized patches, and a screenshot takes around 20 ms, plus the time to decode the file.
+
+Usage:
+
+    $ python3 utilites/img_reader.py utilites/img_reader/Mad_7.jpg
+"""
+
+from PIL import Image
+import functools
 import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pylazors.block import Block
+from pylazors.board import Board
+
+_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img_reader')
+BG_img_path = os.path.join(_DIR, 'BG.png')
+_TEXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pylazors', 'formats', 'textures')
+
+# Title bar and buttons at the top and bottom of a 1480 pixels high screenshot, not part of the play area
+_CROP = 200 / 1480
+# Cell size in pixels when classifying blocks, and when searching targets and sources
+_CELL = 32
+_POINT_CELL = 64
+# Minimum difference from the background of a tile pixel, in gray levels
+_TILE_DIFF = 12
+
+_block_textures = [(Block.BLANK, 'blank.png'), (Block.OPAQUE, 'opaque.png'), (Block.FIXED_OPAQUE, 'opaque_fixed.png'),
+                   (Block.REFLECT, 'reflect.png'), (Block.FIXED_REFLECT, 'reflect_fixed.png'),
+                   (Block.REFRACT, 'refract.png'), (Block.FIXED_REFRACT, 'refract_fixed.png')]
+# Size of textures relative to a cell in the game: tiles fill the cell but the gap, the ring of a target is
+# about 0.37 cells wide, a source dot about 0.08 cells. Blocks are compared on the inner part of tiles only,
+# which leaves out their edges, alike on all textures.
+_tile_scale = 0.9
+_tile_inner = 0.8
+_target_scale = 0.55
+_source_scale = 0.13
+# Difference of brightness (in gray levels) costing as much as a difference of 1 in NCC
+_brightness_scale = 200
+# NCC of the blank texture, which is flat: tiles matching no other texture better are blank
+_blank_score = 0.3
+# Minimum NCC of a target, and of an unlit laser source, and minimum opposite NCC of a lit target
+_target_threshold = 0.7
+_source_threshold = 0.5
+_lit_target_threshold = 0.6
+# Minimum gray level at the end of a beam, for a shining laser source
+_source_brightness = 180
+
+
+@functools.lru_cache(maxsize=4)
+def _background(size):
+    """ Return (gray float32 array of the background of *size* (width, height), median gray level) """
+
+    background = Image.open(BG_img_path).convert('L')
+    if background.size != size:
+        background = background.resize(size, Image.BILINEAR)
+    background = np.asarray(background, dtype=np.float32)
+    return background, int(round(np.median(background)))
+
+
+def _normalize(patches):
+    """ Return patches (n, ...) as rows of zero mean and unit norm, for NCC by dot products """
+
+    patches = patches.reshape(len(patches), -1).astype(np.float32)
+    patches = patches - patches.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(patches, axis=1, keepdims=True)
+    return patches / np.maximum(norms, 1e-6)
+
+
+def _texture_patch(fname, size, scale, background_level):
+    """
+    Return texture *fname* scaled to *scale* x *size* over a gray background, the center *size* x *size* pixels
+    """
+
+    texture = Image.open(os.path.join(_TEXTURE_DIR, fname)).convert('RGBA')
+    texture_size = max(int(round(size * scale)), 1)
+    texture = texture.resize((texture_size, texture_size), Image.BILINEAR)
+    patch_size = max(size, texture_size)
+    patch = Image.new('RGBA', (patch_size, patch_size), (background_level,) * 3 + (255,))
+    patch.alpha_composite(texture, ((patch_size - texture_size) // 2,) * 2)
+    offset = (patch_size - size) // 2
+    return np.asarray(patch.convert('L'), dtype=np.float32)[offset:offset + size, offset:offset + size]
+
+
+@functools.lru_cache(maxsize=4)
+def _templates(background_level):
+    """
+    Return (block types, normalized block templates, brightness of block templates, target templates, normalized
+    source template) on a background of gray level *background_level*. Target templates are (mask, normalized
+    template) of the whole target, and of its top, bottom, left and right halves.
+    """
+
+    types = [block for block, _ in _block_textures]
+    blocks = np.stack([_texture_patch(fname, _CELL, 1 / _tile_inner, background_level)
+                       for _, fname in _block_textures])
+    target = _texture_patch('target.png', _POINT_CELL // 2, _target_scale * 2, background_level)
+    half = _POINT_CELL // 4
+    masks = [np.ones(target.shape, dtype=bool)] + [np.zeros(target.shape, dtype=bool) for _ in range(4)]
+    masks[1][:half], masks[2][half:], masks[3][:, :half], masks[4][:, half:] = True, True, True, True
+    target_templates = [(mask, _normalize(target[mask][None])[0]) for mask in masks]
+    source = _texture_patch('source.png', _POINT_CELL // 4, _source_scale * 4, background_level)
+    return types, _normalize(blocks), blocks.mean(axis=(1, 2)), target_templates, _normalize(source[None])
+
+
+def _extent(profile):
+    """ Return (start, end) of lines with a share of tile pixels above a quarter of the highest """
+
+    lines = np.nonzero(profile > 0.25 * profile.max())[0]
+    return (lines[0], lines[-1] + 1) if len(lines) else (0, 0)
+
+
+def _pitch(profiles):
+    """ Return the size of a cell in pixels: the first peak of the autocorrelation of tile *profiles* """
+
+    correlation = None
+    for profile in profiles:
+        start, end = _extent(profile)
+        line = profile[start:end] - profile[start:end].mean()
+        c = np.correlate(line, line, 'full')[len(line) - 1:]
+        c = c / max(c[0], 1e-6)
+        correlation = c if correlation is None else correlation[:len(c)] + c[:len(correlation)]
+    for lag in range(20, len(correlation) - 1):
+        if correlation[lag] > 0 and correlation[lag - 1] <= correlation[lag] >= correlation[lag + 1]:
+            # Sub-pixel position of the peak
+            a, b, c = correlation[lag - 1:lag + 2]
+            return lag + 0.5 * (a - c) / min(a - 2 * b + c, -1e-6)
+    return 0
+
 
-BG_img_path = os.path.join("img_reader", "BG.png")
+def _axis_grid(profile, pitch):
+    """ Return (origin, count) of cells along one axis, from the share of tile pixels on each line """
 
+    start, end = _extent(profile)
+    # Gaps between tiles are about 12 % of a cell
+    count = max(int(round((end - start) / pitch + 0.12)), 1)
+    center = (start + end) / 2 - count * pitch / 2
+    # Move the grid to where tiles are the most above the gaps between them
+    cumulative = np.concatenate([[0], np.cumsum(profile)])
 
-def read_board_image(fptr):
-    Background_IMAGE = Image.open(BG_img_path)
-    WIDTH, HEIGHT = Background_IMAGE.size
-    Background_IMAGE = Background_IMAGE.crop((0, 200, WIDTH, HEIGHT - 200))
+    def window_means(starts, ends):
+        starts = np.clip(starts.astype(int), 0, len(profile) - 1)
+        ends = np.clip(ends.astype(int), starts + 1, len(profile))
+        return ((cumulative[ends] - cumulative[starts]) / (ends - starts)).mean(axis=1)
 
-    Board_IMAGE = Image.open(fptr)
-    WIDTH, HEIGHT = Board_IMAGE.size
-    fptr_2 = os.path.join("img_reader", "Result_IMAGE.png")
-    Board_IMAGE = Board_IMAGE.crop((0, 200, WIDTH, HEIGHT - 200))
+    # All origins at once, a row of grid lines for each
+    origins = np.arange(center - pitch / 4, center + pitch / 4 + 1)
+    lines = origins[:, None] + np.arange(count + 1)[None, :] * pitch
+    scores = window_means(lines[:, :-1] + 0.1 * pitch, lines[:, 1:] - 0.1 * pitch) - \
+        window_means(lines - 0.05 * pitch, lines + 0.05 * pitch)
+    return origins[np.argmax(scores)], count
 
-    Result_IMAGE = ImageChops.difference(Board_IMAGE, Background_IMAGE)
-    Result_IMAGE = Result_IMAGE.convert('LA')
-    enhancer = ImageEnhance.Brightness(Result_IMAGE)
-    Result_IMAGE = enhancer.enhance(5)
 
-    Result_IMAGE.save(fptr_2)
+def _resize(image, scale):
+    """ Return 2D array *image* resized by *scale* """
+
+    size = (max(int(image.shape[1] * scale), 1), max(int(image.shape[0] * scale), 1))
+    return np.asarray(Image.fromarray(image.astype(np.uint8)).resize(size, Image.BILINEAR), dtype=np.float32)
+
+
+def _patches(image, centers, size):
+    """ Return square patches of *size* pixels of 2D *image* around *centers* [(x, y), ...], padded by edge """
+
+    padded = np.pad(image, size, mode='edge')
+    h, w = padded.shape
+    corners = [(min(max(int(x) + size - size // 2, 0), w - size), min(max(int(y) + size - size // 2, 0), h - size))
+               for x, y in centers]
+    return np.stack([padded[y:y + size, x:x + size] for x, y in corners])
+
+
+def _laser_mask(rgb):
+    """ Return a boolean array of red laser pixels """
+
+    red = rgb[..., 0]
+    return (red > 150) & (red - np.maximum(rgb[..., 1], rgb[..., 2]) > 60)
+
+
+def _peak(gray, x, y, step):
+    """ Return the highest gray level around (x, y), in a window of a few pixels """
+
+    h, w = gray.shape
+    x, y = int(round(x)), int(round(y))
+    r = max(int(step * 0.05), 2)
+    if not (0 <= x < w and 0 <= y < h):
+        return 0
+    return float(gray[max(y - r, 0):y + r + 1, max(x - r, 0):x + r + 1].max())
+
+
+def _lit(mask, x, y, step):
+    """ Return whether laser pixels are around (x, y), in a window of a few pixels """
+
+    h, w = mask.shape
+    x, y = int(round(x)), int(round(y))
+    r = max(int(step * 0.05), 2)
+    if not (0 <= x < w and 0 <= y < h):
+        return False
+    return bool(mask[max(y - r, 0):y + r + 1, max(x - r, 0):x + r + 1].any())
+
+
+def recognize(image, name='screenshot'):
+    """
+    Return a pylazors.Board recognized from a screenshot.
+
+    **Parameters**
+
+        image: *PIL.Image or numpy array*
+            RGB screenshot of the game, e.g. 720 x 1480 pixels.
+
+        name: *str, optional*
+            name of the returned board.
+
+    **Returns**
+
+        board: *pylazors.Board object*
+            fixed blocks and cells without tile are fixed blocks of the board, movable blocks found on the
+            screenshot are the available blocks (the board is returned without them placed).
+    """
+
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.asarray(image, dtype=np.uint8)[..., :3])
+    width, height = image.size
+    background_gray, background_level = _background((width, height))
+    top, bottom = int(height * _CROP), height - int(height * _CROP)
+    image = image.crop((0, top, width, bottom))
+    background_gray = background_gray[top:bottom]
+
+    gray = np.asarray(image.convert('L'), dtype=np.float32)
+    tiles = np.abs(gray - background_gray) > _TILE_DIFF
+    column_profile, row_profile = tiles.mean(axis=0), tiles.mean(axis=1)
+    pitch = _pitch([column_profile, row_profile]) if tiles.any() else 0
+    if pitch <= 0:
+        raise ValueError('No board found on the screenshot')
+    x0, nx = _axis_grid(column_profile, pitch)
+    y0, ny = _axis_grid(row_profile, pitch)
+    types, block_templates, block_brightness, target_templates, source_template = _templates(background_level)
+    # From here on, only the board and half a cell around it are used.
+    left, upper = max(int(x0 - pitch / 2), 0), max(int(y0 - pitch / 2), 0)
+    right, lower = min(int(x0 + (nx + 0.5) * pitch) + 1, width), min(int(y0 + (ny + 0.5) * pitch) + 1, gray.shape[0])
+    image = image.crop((left, upper, right, lower))
+    gray, background_gray = gray[upper:lower, left:right], background_gray[upper:lower, left:right]
+    x0, y0 = x0 - left, y0 - upper
+
+    # Blocks: scale the board so that the inner part of a tile is _CELL pixels, and correlate all cells with all
+    # textures at once. NCC does not see brightness, which tells e.g. reflect (white) and opaque (dark) blocks apart.
+    scale = _CELL / (pitch * _tile_scale * _tile_inner)
+    small, small_diff = _resize(gray, scale), _resize(np.abs(gray - background_gray), scale)
+    centers = [((x0 + (x + 0.5) * pitch) * scale, (y0 + (y + 0.5) * pitch) * scale)
+               for y in range(ny) for x in range(nx)]
+    patches = _patches(small, centers, _CELL)
+    scores = _normalize(patches) @ block_templates.T
+    scores[:, types.index(Block.BLANK)] = _blank_score
+    scores -= np.abs(patches.mean(axis=(1, 2))[:, None] - block_brightness[None, :]) / _brightness_scale
+    no_tile = _patches(small_diff, centers, _CELL).mean(axis=(1, 2)) < _TILE_DIFF
+    cells = np.argmax(scores, axis=1)
+
+    board = Board(name, nx, ny)
+    for i, (cell, empty) in enumerate(zip(cells, no_tile)):
+        x, y = i % nx, i // nx
+        block = Block.FIXED_BLANK if empty else types[cell]
+        if block in (Block.OPAQUE, Block.REFLECT, Block.REFRACT):
+            board.add_available_blocks(block)
+            block = Block.BLANK
+        board.mod_block(x, y, block)
+
+    # Targets and sources, on the middle of cell sides only (points with x + y odd), where lasers pass.
+    covered = {(i % nx, i // nx) for i, (cell, empty) in enumerate(zip(cells, no_tile))
+               if not empty and types[cell] != Block.BLANK}
+    point_scale = _POINT_CELL / pitch
+    large = _resize(gray, point_scale)
+    points = [(x, y) for y in range(2 * ny + 1) for x in range(2 * nx + 1) if (x + y) % 2]
+    point_centers = [((x0 + x / 2 * pitch) * point_scale, (y0 + y / 2 * pitch) * point_scale) for x, y in points]
+    target_patches = _patches(large, point_centers, _POINT_CELL // 2)
+    # Scores on the whole target, and on each half, for targets half covered by a block
+    target_scores = [_normalize(target_patches[:, mask]) @ template for mask, template in target_templates]
+    source_scores = _normalize(_patches(large, point_centers, _POINT_CELL // 4)) @ source_template[0]
+
+    lasers = _laser_mask(np.asarray(image.convert('RGB'), dtype=np.int16))
+    step = pitch / 2
+    for i, (x, y) in enumerate(points):
+        # Cells on both sides of the point, and the half of the target next to each of them
+        if x % 2:
+            sides = [((x // 2, y // 2 - 1), 1), ((x // 2, y // 2), 2)]
+        else:
+            sides = [((x // 2 - 1, y // 2), 3), ((x // 2, y // 2), 4)]
+        visible = [half for cell, half in sides if cell not in covered]
+        if len(visible) == 2:
+            # A target lit by a laser is drawn over by its glow, which inverts the correlation.
+            if target_scores[0][i] > _target_threshold or target_scores[0][i] < -_lit_target_threshold:
+                board.add_target(x, y)
+                continue
+        elif visible and target_scores[visible[0]][i] > _target_threshold:
+            board.add_target(x, y)
+            continue
+        px, py = x0 + x / 2 * pitch, y0 + y / 2 * pitch
+        directions = [(vx, vy) for vx, vy in ((1, 1), (-1, 1), (1, -1), (-1, -1))
+                      if _lit(lasers, px + vx * step * 0.4, py + vy * step * 0.4, step) and
+                      _lit(lasers, px + vx * step * 0.8, py + vy * step * 0.8, step)]
+        if len(directions) == 1:
+            # The end of a beam is a laser source if it shines, beams also end on opaque blocks or off screen.
+            if _peak(gray, px, py, step) > _source_brightness:
+                board.add_laser_source(x, y, *directions[0])
+        elif not directions and source_scores[i] > _source_threshold:
+            # A source with the laser off: its direction is not shown, point it towards the board center.
+            board.add_laser_source(x, y, 1 if x < nx else -1, 1 if y < ny else -1)
+    return board
+
+
+def read_board_image(fptr, name=None):
+    """ Return a pylazors.Board recognized from the screenshot file *fptr*, see recognize() """
+
+    if name is None:
+        name = os.path.splitext(os.path.basename(fptr))[0].lower()
+    with Image.open(fptr) as image:
+        return recognize(image, name)
 
 
 if __name__ == "__main__":
-    fptr = os.path.join("img_reader", "Mad_7.jpg")
-    read_board_image(fptr)
+    import time
+
+    for fptr in sys.argv[1:] or [os.path.join(_DIR, "Mad_7.jpg")]:
+        t0 = time.perf_counter()
+        board = read_board_image(fptr)
+        print('# %s, recognized in %.1f ms' % (fptr, (time.perf_counter() - t0) * 1000))
+        print(board, board.get_available_blocks(), board.get_laser_sources(), board.get_targets())
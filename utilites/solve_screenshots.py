@@ -0,0 +1,377 @@
+"""
+Solve a folder, or any stream, of screenshots of the game, see solve_screenshots().
+
+Screenshots go through three stages, each run by its own workers and connected by bounded queues:
+
+    decode      open and decode image files, in a thread pool (image decoding releases the GIL),
+    recognize   recognize boards with img_reader.recognize(), in threads (mostly NumPy, which also releases it),
+    solve       solve boards with pylazors.solve_board(), in worker processes.
+
+Nothing is written to disk on the way. Results are yielded in input order: a result finished early waits for
+the ones before it, and at most *max_pending* screenshots are in the pipeline at once (queued, in a stage or
+waiting to be yielded), so memory stays bounded however long the stream is.
+
+Every stage counts the screenshots it handled, the time its workers were busy, and the time they waited for
+input (starved) or for room in the next queue (blocked). The stage busy the largest share of its workers' time
+is the bottleneck, see PipelineStats.report().
+
+Usage:
+
+    $ python3 utilites/solve_screenshots.py utilites/img_reader
+    $ python3 utilites/solve_screenshots.py --solvers 4 utilites/img_reader/*.jpg
+"""
+
+from PIL import Image
+import argparse
+import concurrent.futures
+import io
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import img_reader
+from pylazors.block import Block
+from pylazors.solver import solve_board
+
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# Ends the input of a stage
+_END = object()
+
+
+class _Stopped(Exception):
+    """ Raised by a stage function when the pipeline is stopped, the item goes on without counting as an error """
+
+
+class StageCounter:
+    """
+    Counters of one pipeline stage, updated by all its workers.
+
+    **Attributes**
+
+        name: *str*
+        workers: *int*
+            number of workers of the stage.
+        items, errors: *int*
+            number of screenshots handled (not counting ones failed in an earlier stage), and how many of them
+            failed.
+        busy, starved, blocked: *float*
+            seconds the workers spent working, waiting for input, and waiting for room in the next queue,
+            summed over all workers.
+    """
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items=0, errors=0, busy=0.0, starved=0.0, blocked=0.0):
+        with self._lock:
+            self.items += items
+            self.errors += errors
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+
+    @property
+    def throughput(self):
+        """ Screenshots per second the stage can handle with all its workers busy """
+
+        return self.items * self.workers / self.busy if self.busy else 0.0
+
+    def utilization(self, wall_time):
+        """ Share of the time of all workers spent working, over *wall_time* seconds """
+
+        return self.busy / (self.workers * wall_time) if wall_time else 0.0
+
+
+class PipelineStats:
+    """
+    Counters of a solve_screenshots() run.
+
+    **Attributes**
+
+        stages: *list, StageCounter*
+            counters of the decode, recognize and solve stages.
+        wall_time: *float*
+            seconds from the start until the last result is yielded, or until the pipeline is stopped.
+        errors: *list, (source, str)*
+            screenshots which could not be decoded or recognized, or whose solving failed, and why. Source is
+            None if iterating over the sources failed.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.wall_time = 0.0
+        self.errors = []
+
+    @property
+    def bottleneck(self):
+        """ Name of the stage busy the largest share of its workers' time """
+
+        return max(self.stages, key=lambda stage: stage.utilization(self.wall_time)).name
+
+    def report(self):
+        """ Return a human readable multi-line summary """
+
+        items = self.stages[-1].items
+        lines = ['%d screenshot(s) in %.2f s, %.1f per second, bottleneck: %s' % (
+            items, self.wall_time, items / self.wall_time if self.wall_time else 0.0, self.bottleneck)]
+        for stage in self.stages:
+            lines.append('%-10s %d worker(s), %d done, %d failed, %.1f per second, busy %.0f%%, starved %.2f s, '
+                         'blocked %.2f s' % (stage.name, stage.workers, stage.items, stage.errors, stage.throughput,
+                                             stage.utilization(self.wall_time) * 100, stage.starved, stage.blocked))
+        return '\n'.join(lines)
+
+
+def list_screenshots(path):
+    """ Return image files in directory *path*, sorted by name """
+
+    return [os.path.join(path, fname) for fname in sorted(os.listdir(path))
+            if os.path.splitext(fname)[1].lower() in _IMAGE_EXTENSIONS]
+
+
+def _decode(source):
+    """ Return (name, decoded RGB image) of a file name, file object or bytes """
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    fname = source if isinstance(source, str) else getattr(source, 'name', None)
+    name = os.path.splitext(os.path.basename(fname))[0].lower() if isinstance(fname, str) else 'screenshot'
+    with Image.open(source) as image:
+        return name, image.convert('RGB')
+
+
+def _recognize(decoded):
+    name, image = decoded
+    return img_reader.recognize(image, name)
+
+
+def _solve(board, kwargs):
+    return solve_board(board, print_log=False, **kwargs)
+
+
+def _run_stage(func, counter, inputs, outputs, errors, remaining, stop):
+    """
+    Worker loop of a stage: apply *func* to items (index, source, value) from *inputs*, put the results in
+    *outputs*. Failed items go on with value None, so that results stay in order, and once *stop* is set items
+    only go on. The last worker to finish ends the next stage.
+    """
+
+    while True:
+        start_time = time.perf_counter()
+        item = inputs.get()
+        work_time = time.perf_counter()
+        if item is _END:
+            # Let the other workers of the stage end too.
+            inputs.put(_END)
+            counter.add(starved=work_time - start_time)
+            break
+        i, source, value = item
+        done = failed = 0
+        if value is not None and not stop.is_set():
+            done = 1
+            try:
+                value = func(value)
+            except _Stopped:
+                value, done = None, 0
+            except Exception as e:
+                errors.append((source, '%s: %s' % (type(e).__name__, e)))
+                value, failed = None, 1
+        put_time = time.perf_counter()
+        outputs.put((i, source, value))
+        counter.add(items=done, errors=failed, busy=put_time - work_time, starved=work_time - start_time,
+                    blocked=time.perf_counter() - put_time)
+
+    with remaining[1]:
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            outputs.put(_END)
+
+
+def new_stats(decoders=2, recognizers=2, solvers=None):
+    """ Return a PipelineStats object for solve_screenshots() with these numbers of workers """
+
+    if solvers is None:
+        solvers = os.cpu_count() or 1
+    return PipelineStats([StageCounter('decode', decoders), StageCounter('recognize', recognizers),
+                          StageCounter('solve', max(solvers, 1))])
+
+
+def solve_screenshots(sources, decoders=2, recognizers=2, solvers=None, queue_size=8, max_pending=None,
+                      stats=None, **kwargs):
+    """
+    Solve screenshots of the game, and yield results in input order.
+
+    An exception raised while iterating over *sources* is raised here, after the results of the sources before it.
+    Closing the generator early stops the pipeline without waiting for boards being solved.
+
+    **Parameters**
+
+        sources: *str or iterable*
+            a directory of screenshots, or an iterable (possibly endless) of file names, file objects or image
+            file contents (bytes).
+
+        decoders, recognizers: *int, optional*
+            number of threads decoding images, and recognizing boards.
+
+        solvers: *int, optional*
+            number of solving processes, defaults to the number of CPUs. 0 solves in one thread of this process.
+
+        queue_size: *int, optional*
+            maximum number of items waiting between two stages.
+
+        max_pending: *int, optional*
+            maximum number of screenshots in the pipeline at once, defaults to all queues full plus one
+            screenshot in every worker.
+
+        stats: *PipelineStats object, optional*
+            counters to be filled in, see new_stats(). They can be read at any time during the run.
+
+        Other keyword arguments are passed to pylazors.solve_board().
+
+    **Yields**
+
+        source: *str, file object or bytes*
+            an item of *sources*.
+
+        board, solution_board: *pylazors.Board objects*
+            the recognized board and its solution (None if no solution found). Both are None if the screenshot
+            could not be decoded, recognized or solved, see *stats.errors*.
+    """
+
+    if isinstance(sources, str):
+        sources = list_screenshots(sources)
+    if solvers is None:
+        solvers = os.cpu_count() or 1
+    if stats is None:
+        stats = new_stats(decoders, recognizers, solvers)
+    if max_pending is None:
+        max_pending = 3 * queue_size + decoders + recognizers + max(solvers, 1)
+
+    executor = concurrent.futures.ProcessPoolExecutor(solvers) if solvers else None
+
+    def solve(board):
+        if executor is None:
+            return board, _solve(board, kwargs)
+        future = executor.submit(_solve, board, kwargs)
+        while True:
+            try:
+                return board, future.result(timeout=0.1)
+            except concurrent.futures.TimeoutError:
+                # Do not wait for the solution once the caller stops iterating.
+                if stop.is_set():
+                    future.cancel()
+                    raise _Stopped
+
+    start_time = time.perf_counter()
+    queues = [queue.Queue(queue_size) for _ in range(4)]
+    pending = threading.BoundedSemaphore(max_pending)
+    stop = threading.Event()
+    threads = []
+    for (func, workers), counter, inputs, outputs in zip(
+            ((_decode, decoders), (_recognize, recognizers), (solve, max(solvers, 1))),
+            stats.stages, queues, queues[1:]):
+        remaining = [workers, threading.Lock()]
+        threads += [threading.Thread(target=_run_stage, daemon=True,
+                                     args=(func, counter, inputs, outputs, stats.errors, remaining, stop))
+                    for _ in range(workers)]
+
+    # An exception raised by *sources*, re-raised after the results before it
+    source_error = []
+
+    def feed():
+        try:
+            for i, source in enumerate(sources):
+                # Wait for room in the pipeline, or for the caller to stop iterating.
+                while not pending.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                queues[0].put((i, source, source))
+        except Exception as e:
+            stats.errors.append((None, '%s: %s' % (type(e).__name__, e)))
+            source_error.append(e)
+        finally:
+            queues[0].put(_END)
+
+    threads.append(threading.Thread(target=feed, daemon=True))
+    for thread in threads:
+        thread.start()
+
+    finished = {}
+    next_index = 0
+    item = None
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _END:
+                break
+            finished[item[0]] = item
+            while next_index in finished:
+                _, source, value = finished.pop(next_index)
+                next_index += 1
+                pending.release()
+                stats.wall_time = time.perf_counter() - start_time
+                yield (source,) + (value if value is not None else (None, None))
+        if source_error:
+            raise source_error[0]
+    finally:
+        stop.set()
+        closed_early = item is not _END
+        # Items left in the pipeline only go through from now on, take them out so that no worker stays blocked.
+        while item is not _END:
+            item = queues[-1].get()
+        for thread in threads:
+            thread.join()
+        if executor is not None:
+            if closed_early:
+                # Boards still being solved are not waited for.
+                for process in list((executor._processes or {}).values()):
+                    process.terminate()
+            executor.shutdown(wait=not closed_early, cancel_futures=True)
+        stats.wall_time = time.perf_counter() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sources', nargs='+', help='screenshot files or directories of screenshots')
+    parser.add_argument('--decoders', type=int, default=2, help='number of decoding threads')
+    parser.add_argument('--recognizers', type=int, default=2, help='number of recognizing threads')
+    parser.add_argument('--solvers', type=int, default=None, help='number of solving processes, 0 for none')
+    parser.add_argument('--queue-size', type=int, default=8, help='maximum number of items between two stages')
+    args = parser.parse_args(argv)
+
+    sources = []
+    for source in args.sources:
+        sources += list_screenshots(source) if os.path.isdir(source) else [source]
+    stats = new_stats(args.decoders, args.recognizers, args.solvers)
+    for source, board, solution in solve_screenshots(sources, args.decoders, args.recognizers, args.solvers,
+                                                     args.queue_size, stats=stats):
+        if board is None:
+            print('# %s: failed' % source)
+        elif solution is None:
+            print('# %s: %s, no solution found' % (source, board))
+        else:
+            blocks = ['%s at (%d, %d)' % (block.name, x, y) for y, row in enumerate(solution.get_blocks())
+                      for x, block in enumerate(row) if block in (Block.OPAQUE, Block.REFLECT, Block.REFRACT)]
+            print('# %s: %s, solved: %s' % (source, board, ', '.join(blocks)))
+    for source, error in stats.errors:
+        print('[solve_screenshots] %s: %s' % (source, error))
+    print(stats.report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())